@@ -1,6 +1,5 @@
 import os
 from collections import defaultdict
-import matplotlib.pyplot as plt
 
 # ------------------ Config categorías ------------------
 CATEGORIES = {
@@ -111,6 +110,8 @@ if __name__ == "__main__":
         print(f"{nombre}: {fmt_size(total)}")
 
     # ------------------ Gráficos ------------------
+    # Import diferido: el informe de texto sale sin esperar a matplotlib
+    import matplotlib.pyplot as plt
 
     # Gráfico 1: Uso por carpeta
     labels = [nombre for nombre, _ in resumen]
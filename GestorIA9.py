@@ -1,161 +1,372 @@
 import os
+import time
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk
-from collections import defaultdict
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-# ------------------ Config categorías ------------------
-CATEGORIES = {
-    "Videos": {".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".mpeg", ".mpg"},
-    "Música": {".mp3", ".wav", ".flac", ".aac", ".m4a", ".ogg", ".wma"},
-    "Imágenes": {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp", ".heic"},
-    "Documentos": {".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".txt", ".csv", ".md"},
-    "Comprimidos": {".zip", ".rar", ".7z", ".tar", ".gz"},
-    "Instaladores": {".exe", ".msi", ".apk", ".dmg", ".pkg"},
-}
-
-def get_category(filename: str) -> str:
-    ext = os.path.splitext(filename)[1].lower()
-    for cat, exts in CATEGORIES.items():
-        if ext in exts:
-            return cat
-    return "Otros"
-
-def fmt_size(bytes_: int) -> str:
-    units = ["B", "KB", "MB", "GB", "TB"]
-    size = float(bytes_)
-    for u in units:
-        if size < 1024 or u == units[-1]:
-            return f"{size:.2f} {u}"
-        size /= 1024.0
-
-def safe_getsize(path: str) -> int:
-    try:
-        return os.path.getsize(path)
-    except (FileNotFoundError, PermissionError, OSError):
-        return 0
-
-def scan_directory(base_path: str, top_n_files: int = 20):
-    category_sizes = defaultdict(int)
-    files_info = []
-    errors = 0
-
-    for dirpath, _, filenames in os.walk(base_path, onerror=lambda e: None, followlinks=False):
-        for name in filenames:
-            fp = os.path.join(dirpath, name)
-            size = safe_getsize(fp)
-            if size == 0:
-                try:
-                    if os.path.getsize(fp) != 0:
-                        errors += 1
-                except Exception:
-                    errors += 1
-
-            cat = get_category(name)
-            category_sizes[cat] += size
-            files_info.append((fp, size, cat))
-
-    top_files = sorted(files_info, key=lambda x: x[1], reverse=True)[:top_n_files]
-    total_size = sum(category_sizes.values())
-
-    return total_size, top_files, category_sizes, errors
-
+from tkinter import ttk, messagebox
+from gestor_registros import FileStore
+from gestor_metricas import ScanMetrics
+from gestor_firmas import ContentSniffer
+from gestor_busqueda import RootIndexes, SearchIndex
+from gestor_edad import AGE_LABELS, age_histogram
+from gestor_histograma import DISPLAY_RANGES, SizeStats
+from gestor_recorrido import TraversalPolicy
+from gestor_muestreo import estimate_directory
+from gestor_consultas import QueryError, query_store
+from gestor_compresion import estimate_compression
+from gestor_limpieza import CleanupExecutor, LiveTotals
+from gestor_historial import UsageHistory
+from gestor_miniaturas import THUMB_SIZE, ThumbnailCache, can_preview, previews_available
+from gestor_core import fmt_size, scan_directory, iter_scan, default_target_folders
+
+# Segundos de muestreo (en total) antes de pintar la vista principal
+ESTIMATE_SECONDS = 1.0
+# Resultados por página en la barra de filtro de la vista de carpeta
+FILTER_PAGE_SIZE = 100
+
+# ------------------ Carga diferida de gráficos ------------------
+# matplotlib tarda casi un segundo en importarse: se carga la primera vez
+# que se dibuja un gráfico, no al abrir la ventana. Usamos Figure en vez de
+# pyplot para no pagar su inicialización ni acumular figuras globales.
+_plotting = None
+
+def load_plotting():
+    global _plotting
+    if _plotting is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        _plotting = (Figure, FigureCanvasTkAgg)
+    return _plotting
+
+def new_figure(figsize=(5, 5), ncols: int = 1):
+    Figure, _ = load_plotting()
+    fig = Figure(figsize=figsize)
+    if ncols == 1:
+        return fig, fig.add_subplot()
+    return fig, [fig.add_subplot(1, ncols, i + 1) for i in range(ncols)]
+
+def attach_canvas(fig, master):
+    _, FigureCanvasTkAgg = load_plotting()
+    canvas = FigureCanvasTkAgg(fig, master=master)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    return canvas
+
+# ------------------ Interfaz ------------------
 class GestorArchivosApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Gestor de Archivos con Estadísticas")
         self.current_view = "main"
 
-        user = os.getlogin()
-        base_user = os.path.join("C:\\Users", user)
-        self.target_folders = {
-            "Descargas": os.path.join(base_user, "Downloads"),
-            "Imágenes": os.path.join(base_user, "Pictures"),
-            "Escritorio": os.path.join(base_user, "Desktop"),
-            "Documentos": os.path.join(base_user, "Documents"),
-            "Música": os.path.join(base_user, "Music"),
-            "Videos": os.path.join(base_user, "Videos"),
-        }
+        self.target_folders = default_target_folders()
+        # Reclasifica "Otros" por contenido; la caché sobrevive entre vistas
+        self.sniffer = ContentSniffer()
+        # Índice de nombres por raíz; cada escaneo exacto lo reconstruye en su hilo
+        self.search_index = RootIndexes()
+        self._search_job = None
+        # No bajar a /proc, montajes de red ni similares que cuelguen de las carpetas
+        self.policy = TraversalPolicy()
+        # Escaneo exacto en segundo plano que refina la estimación inicial
+        self._scan_cancel = threading.Event()
+        self._scan_gen = 0
+        # Miniaturas de la lista de archivos (solo si hay Pillow o ffmpeg)
+        self.thumbnails = ThumbnailCache() if previews_available() else None
+        self._thumb_queue = queue.Queue()
+        self._thumb_images = {}
+        self.root.after(100, self._drain_thumbnails)
+        # Borrados por lotes con diario; cierra lo que quedara a medias
+        self.cleanup = CleanupExecutor()
+        # Correcciones de agregados que llegan de los hilos de limpieza
+        self._ui_calls = queue.Queue()
+        try:
+            self.cleanup.recover()
+        except OSError:
+            pass
+        # Totales de cada escaneo exacto, para ver la evolución
+        self.history = UsageHistory()
 
         self.frame = ttk.Frame(root)
         self.frame.pack(fill="both", expand=True)
 
         # 🔹 Vinculamos la tecla ESC a volver atrás
         self.root.bind("<Escape>", lambda e: self.go_back())
-
-        self.build_main_view()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # La ventana se pinta al instante; el escaneo y el gráfico llegan después
+        self.show_placeholder("Analizando carpetas...")
+        self.root.after(50, self.build_main_view)
+
+    def on_close(self):
+        """Para el escaneo y las miniaturas pendientes antes de cerrar la ventana"""
+        self.cancel_exact_scan()
+        if self.thumbnails is not None:
+            self.thumbnails.close()
+        self.root.destroy()
+
+    def _post_ui(self, fn, *args):
+        """Desde cualquier hilo: fn(*args) se ejecutará en el de tkinter"""
+        self._ui_calls.put((fn, args))
+
+    def _run_ui_calls(self):
+        try:
+            while True:
+                fn, args = self._ui_calls.get_nowait()
+                fn(*args)
+        except queue.Empty:
+            pass
+
+    def _drain_thumbnails(self):
+        """Los hilos de miniaturas dejan aquí su PNG; tkinter solo se toca en este hilo"""
+        try:
+            while True:
+                tree, iid, png = self._thumb_queue.get_nowait()
+                if png is None or not tree.winfo_exists() or not tree.exists(iid):
+                    continue
+                try:
+                    image = tk.PhotoImage(file=png)
+                except tk.TclError:
+                    continue
+                self._thumb_images[iid] = image   # sin referencia, Tk la borraría
+                tree.item(iid, image=image)
+        except queue.Empty:
+            pass
+        self.root.after(100, self._drain_thumbnails)
 
     def clear_frame(self):
         for widget in self.frame.winfo_children():
             widget.destroy()
 
+    def show_placeholder(self, text: str):
+        self.clear_frame()
+        ttk.Label(self.frame, text=text).pack(expand=True)
+        self.root.update_idletasks()
+
     def go_back(self):
         """Función que permite volver a la vista principal si no estamos ya en ella"""
         if self.current_view == "folder":
             self.build_main_view()
+        elif self.current_view in ("age", "compression"):
+            self.show_folder_view(self.folder_name)
+        elif self.current_view == "history":
+            self.build_main_view()
+
+    def export_metrics(self):
+        prom_file = os.environ.get("GESTORIA_METRICS_FILE")
+        if prom_file:
+            try:
+                self.metrics.write_prometheus(prom_file)
+            except OSError:
+                pass
 
     def build_main_view(self):
-        self.clear_frame()
+        self.show_placeholder("Estimando el uso de espacio...")
         self.current_view = "main"
+        self.cancel_exact_scan()
 
-        resumen = []
-        for nombre, ruta in self.target_folders.items():
-            if os.path.exists(ruta):
-                total, _, _, _ = scan_directory(ruta)
-                resumen.append((nombre, total))
+        # Métricas del último escaneo (opcionalmente exportadas a Prometheus)
+        self.metrics = ScanMetrics()
+        roots = {nombre: ruta for nombre, ruta in self.target_folders.items() if os.path.exists(ruta)}
 
-        if not resumen:
+        self.clear_frame()
+        if not roots:
             tk.Label(self.frame, text="No se encontraron carpetas para analizar").pack()
             return
 
-        labels = [nombre for nombre, _ in resumen]
-        sizes = [total for _, total in resumen]
+        # Primero una estimación por muestreo (segundos) y se pinta ya
+        with self.metrics.phase("estimate"):
+            estimates = {nombre: estimate_directory(ruta, max_seconds=ESTIMATE_SECONDS / len(roots),
+                                                    policy=self.policy.clone())
+                         for nombre, ruta in roots.items()}
+        self.main_sizes = {nombre: e.total for nombre, e in estimates.items()}
+        self.main_errors = {nombre: e.total_error for nombre, e in estimates.items()}
 
-        fig, ax = plt.subplots(figsize=(5, 5))
-        wedges, texts, autotexts = ax.pie(
-            sizes,
-            autopct='%1.1f%%',
-            textprops=dict(color="w")
-        )
-
-        for i, a in enumerate(autotexts):
-            a.set_text(f"{labels[i]} {a.get_text()}")
+        self.build_search_bar()
+        self.scan_status = ttk.Label(self.frame, text="Estimación por muestreo; calculando valores exactos...")
+        self.scan_status.pack()
+        ttk.Button(self.frame, text="📈 Evolución", command=self.show_history_view).pack()
 
-        ax.legend(wedges, labels, title="Carpetas", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
-        ax.set_title("Uso de espacio por carpetas principales")
-
-        canvas = FigureCanvasTkAgg(fig, master=self.frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        with self.metrics.phase("render"):
+            fig, ax = new_figure((5, 5))
+            canvas = attach_canvas(fig, self.frame)
+            self.draw_main_pie(ax)
 
         def on_click(event):
             if event.inaxes == ax:
-                for i, wedge in enumerate(wedges):
+                for nombre, wedge in zip(self.main_sizes, self._main_wedges):
                     if wedge.contains_point([event.x, event.y]):
-                        self.show_folder_view(labels[i])
+                        self.show_folder_view(nombre)
                         return
 
         fig.canvas.mpl_connect("button_press_event", on_click)
+        self.start_exact_scan(roots, ax, canvas)
+
+    def draw_main_pie(self, ax):
+        """Pastel por carpeta; las que aún no tienen valor exacto llevan ± error"""
+        ax.clear()
+        labels = list(self.main_sizes)
+        wedges, texts, autotexts = ax.pie(
+            list(self.main_sizes.values()),
+            autopct='%1.1f%%',
+            textprops=dict(color="w")
+        )
+
+        for i, a in enumerate(autotexts):
+            a.set_text(f"{labels[i]} {a.get_text()}")
+
+        leyenda = []
+        for nombre in labels:
+            err = self.main_errors[nombre]
+            size = self.main_sizes[nombre]
+            pct = f" ±{err / size:.0%}" if err and size else ""
+            leyenda.append(f"{nombre} ({'≈' if err else ''}{fmt_size(int(size))}{pct})")
+        ax.legend(wedges, leyenda, title="Carpetas", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+        estimado = any(self.main_errors.values())
+        ax.set_title("Uso de espacio por carpetas principales" + (" (estimación)" if estimado else ""))
+        self._main_wedges = wedges
+
+    # ---- Escaneo exacto en segundo plano ----
+    def cancel_exact_scan(self):
+        self._scan_cancel.set()
+        self._scan_gen += 1
+
+    def start_exact_scan(self, roots: dict, ax, canvas):
+        self._scan_cancel = cancel = threading.Event()
+        updates = queue.Queue()
+        # Copia propia de la política: la vista de carpeta usa la original
+        policy = self.policy.clone()
+        metrics = self.metrics
+
+        def worker():
+            for nombre, ruta in roots.items():
+                store = FileStore()
+                partial = 0
+                cats = {}
+                next_report = 0.0
+                with metrics.root(ruta):
+                    for summary in iter_scan(ruta, store, metrics, policy=policy):
+                        if cancel.is_set():
+                            return
+                        partial += summary.bytes
+                        for cat, size in summary.categories.items():
+                            cats[cat] = cats.get(cat, 0) + size
+                        now = time.monotonic()
+                        if now >= next_report:
+                            updates.put(("progress", nombre, partial))
+                            next_report = now + 0.25
+                    # El índice se construye aquí; la interfaz solo lo cambia por el viejo
+                    with metrics.phase("index"):
+                        index = SearchIndex()
+                        index.replace_root(ruta, store)
+                if cancel.is_set():
+                    return
+                updates.put(("done", nombre, partial, ruta, index, cats))
+            updates.put(("finished",))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(250, self._poll_exact_scan, self._scan_gen, updates, ax, canvas, {})
+
+    def _poll_exact_scan(self, gen: int, updates: queue.Queue, ax, canvas, categories: dict):
+        """Vuelca en la interfaz lo que ha avanzado el hilo (tkinter no es thread-safe)"""
+        if gen != self._scan_gen:
+            return
+        changed = finished = False
+        try:
+            while True:
+                msg = updates.get_nowait()
+                if msg[0] == "progress":
+                    _, nombre, partial = msg
+                    # Mientras tanto: nunca por debajo de lo ya contado
+                    if partial > self.main_sizes[nombre]:
+                        self.main_sizes[nombre] = partial
+                        changed = True
+                elif msg[0] == "done":
+                    _, nombre, total, ruta, index, cats = msg
+                    for cat, size in cats.items():
+                        categories[cat] = categories.get(cat, 0) + size
+                    self.main_sizes[nombre] = total
+                    self.main_errors[nombre] = 0.0
+                    self.search_index.swap(ruta, index)
+                    changed = True
+                else:
+                    finished = True
+        except queue.Empty:
+            pass
+
+        if changed:
+            with self.metrics.phase("render"):
+                self.draw_main_pie(ax)
+                canvas.draw_idle()
+        if finished:
+            self.metrics.bytes += int(sum(self.main_sizes.values()))
+            self.scan_status.config(text="Valores exactos")
+            self.export_metrics()
+            try:
+                self.history.record_totals(self.main_sizes, categories)
+            except OSError:
+                pass
+        else:
+            self.root.after(250, self._poll_exact_scan, gen, updates, ax, canvas, categories)
+
+    def build_search_bar(self):
+        """Caja de búsqueda: texto = subcadena, con * o ? = glob, ~texto = aproximada"""
+        bar = ttk.Frame(self.frame)
+        bar.pack(fill="x", padx=5, pady=5)
+        ttk.Label(bar, text="🔎 Buscar:").pack(side="left")
+        query = tk.StringVar()
+        entry = ttk.Entry(bar, textvariable=query)
+        entry.pack(side="left", fill="x", expand=True, padx=5)
+
+        results = tk.Listbox(self.frame, height=8)
+
+        def run_search():
+            self._search_job = None
+            entries = self.search_index.search(query.get())
+            results.delete(0, "end")
+            for index, e in entries:
+                results.insert("end", index.path(e))
+            if entries:
+                results.pack(fill="x", padx=5)
+            else:
+                results.pack_forget()
+
+        def on_key(event):
+            # Espera a que el usuario deje de teclear para no buscar en cada letra
+            if self._search_job is not None:
+                self.root.after_cancel(self._search_job)
+            self._search_job = self.root.after(150, run_search)
+
+        entry.bind("<KeyRelease>", on_key)
 
     def show_folder_view(self, folder_name):
-        self.clear_frame()
+        self.show_placeholder(f"Analizando {folder_name}...")
         self.current_view = "folder"
+        self.cancel_exact_scan()
 
         ruta = self.target_folders[folder_name]
         if not os.path.exists(ruta):
+            self.clear_frame()
             tk.Label(self.frame, text=f"La carpeta {folder_name} no existe.").pack()
             return
 
-        total, top_files, cats, errors = scan_directory(ruta)
+        # Se conserva el almacén para las vistas derivadas (antigüedad)
+        self.folder_name = folder_name
+        self.folder_store = FileStore()
+        size_stats = SizeStats()
+        total, top_files, cats, errors = scan_directory(ruta, store=self.folder_store, sniffer=self.sniffer,
+                                                        size_stats=size_stats, policy=self.policy)
+        self.clear_frame()
 
-        labels = list(cats.keys())
-        sizes = list(cats.values())
+        # Lo que se borre desde esta vista corrige estos agregados sin reescanear
+        self.cleanup.totals = LiveTotals(cats, getattr(self, "main_sizes", None), self.target_folders,
+                                         self.folder_store, size_stats, search_index=self.search_index,
+                                         post=self._post_ui)
 
-        if not sizes or sum(sizes) == 0:
-            tk.Label(self.frame, text=f"No se encontraron archivos en {folder_name}.").pack()
-        else:
-            fig, ax = plt.subplots(figsize=(5, 5))
+        def draw_charts(fig, ax, ax_hist):
+            labels = [c for c, v in cats.items() if v > 0]
+            sizes = [cats[c] for c in labels]
+            ax.clear()
+            ax_hist.clear()
             wedges, texts, autotexts = ax.pie(
                 sizes,
                 autopct='%1.1f%%',
@@ -165,42 +376,301 @@ class GestorArchivosApp:
             for i, a in enumerate(autotexts):
                 a.set_text(f"{labels[i]} {a.get_text()}")
 
-            ax.legend(wedges, labels, title="Categorías", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+            ax.legend(wedges, labels, title="Categorías", loc="upper left", fontsize="small")
             ax.set_title(f"Uso de espacio en {folder_name}")
 
-            canvas = FigureCanvasTkAgg(fig, master=self.frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill="both", expand=True)
-
-        # Sección con scroll
+            # Distribución de tamaños (nº de archivos por tramo) junto al pastel
+            overall = size_stats.overall()
+            ax_hist.bar([label for label, _ in DISPLAY_RANGES], overall.display_counts())
+            ax_hist.tick_params(axis="x", labelrotation=30, labelsize="small")
+            ax_hist.set_ylabel("Archivos")
+            ax_hist.set_title(f"Mediana {fmt_size(int(overall.quantile(0.5)))} · "
+                              f"p99 {fmt_size(int(overall.quantile(0.99)))}", fontsize="medium")
+            fig.tight_layout()
+
+        charts = None
+        if not cats or sum(cats.values()) == 0:
+            tk.Label(self.frame, text=f"No se encontraron archivos en {folder_name}.").pack()
+        else:
+            fig, (ax, ax_hist) = new_figure((9, 4.5), ncols=2)
+            draw_charts(fig, ax, ax_hist)
+            charts = (fig, ax, ax_hist, attach_canvas(fig, self.frame))
+
+        # Barra de filtro: category=Videos and size>1GB and age>365d and path~"2019"
+        filter_bar = ttk.Frame(self.frame)
+        filter_bar.pack(fill="x", padx=5, pady=(5, 0))
+        ttk.Label(filter_bar, text="Filtro:").pack(side="left")
+        filter_text = tk.StringVar()
+        filter_entry = ttk.Entry(filter_bar, textvariable=filter_text)
+        filter_entry.pack(side="left", fill="x", expand=True, padx=5)
+        filter_info = ttk.Label(filter_bar, text="")
+
+        # Lista de archivos: Treeview con miniatura en la columna #0; solo se
+        # piden las de las filas visibles y llegan sin bloquear la interfaz
+        list_title = ttk.Label(self.frame)
+        list_title.pack(pady=(5, 0))
         container = ttk.Frame(self.frame)
         container.pack(fill="both", expand=True)
 
-        canvas_scroll = tk.Canvas(container)
-        scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas_scroll.yview)
-        scroll_frame = ttk.Frame(canvas_scroll)
-
-        scroll_frame.bind(
-            "<Configure>",
-            lambda e: canvas_scroll.configure(scrollregion=canvas_scroll.bbox("all"))
-        )
-
-        canvas_scroll.create_window((0, 0), window=scroll_frame, anchor="nw")
-        canvas_scroll.configure(yscrollcommand=scrollbar.set)
-
-        canvas_scroll.pack(side="left", fill="both", expand=True)
+        style_name = "Treeview"
+        if self.thumbnails is not None:
+            style_name = "Miniaturas.Treeview"
+            ttk.Style(self.root).configure(style_name, rowheight=THUMB_SIZE[1] + 6)
+        tree = ttk.Treeview(container, columns=("size", "category", "name"), style=style_name)
+        tree.heading("size", text="Tamaño")
+        tree.heading("category", text="Categoría")
+        tree.heading("name", text="Archivo", anchor="w")
+        tree.column("#0", width=THUMB_SIZE[0] + 24 if self.thumbnails is not None else 0, stretch=False)
+        tree.column("size", width=90, anchor="e", stretch=False)
+        tree.column("category", width=100, stretch=False)
+        scrollbar = ttk.Scrollbar(container, orient="vertical", command=tree.yview)
+        rows = {}          # iid -> FileRecord
+        requested = set()
+
+        def load_visible(event=None):
+            if self.thumbnails is None or not tree.winfo_exists():
+                return
+            for iid, rec in rows.items():
+                if iid in requested or not tree.bbox(iid) or not can_preview(rec.name):
+                    continue
+                requested.add(iid)
+                self.thumbnails.request(rec.path, rec.mtime, rec.size,
+                                        lambda png, iid=iid: self._thumb_queue.put((tree, iid, png)))
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self.root.after_idle(load_visible)
+
+        tree.configure(yscrollcommand=on_scroll)
+        tree.bind("<Configure>", load_visible)
+        tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
-        # Archivos listados dentro del frame con scroll
-        ttk.Label(scroll_frame, text=f"TOP archivos más pesados en {folder_name}:").pack(pady=5)
-        for path, size, cat in top_files:
-            ttk.Label(scroll_frame, text=f"{fmt_size(size)} | {cat} | {os.path.basename(path)}").pack(anchor="w")
+        def show_records(title, records, relative=False):
+            list_title.config(text=title)
+            tree.delete(*tree.get_children())
+            rows.clear()
+            requested.clear()
+            self._thumb_images.clear()
+            for rec in records:
+                name = os.path.relpath(rec.path, ruta) if relative else rec.name
+                iid = tree.insert("", "end", values=(fmt_size(rec.size), rec.category, name))
+                rows[iid] = rec
+            tree.yview_moveto(0)
+            self.root.after_idle(load_visible)
+
+        show_records(f"TOP archivos más pesados en {folder_name}:", top_files)
+
+        page = [0]
+
+        def apply_filter(delta=0):
+            text = filter_text.get().strip()
+            if not text:
+                filter_info.pack_forget()
+                show_records(f"TOP archivos más pesados en {folder_name}:", top_files)
+                return
+            try:
+                result = query_store(self.folder_store, text, page=max(page[0] + delta, 0),
+                                     page_size=FILTER_PAGE_SIZE)
+            except QueryError as e:
+                filter_info.config(text=f"⚠ {e}")
+                filter_info.pack(side="left")
+                return
+            if delta and not result.records and result.count:
+                return  # ya estaba en la última página
+            page[0] = result.page
+            filter_info.config(text=f"{result.count} archivos · {fmt_size(result.total_bytes)} · "
+                                    f"pág. {page[0] + 1}/{result.pages}")
+            filter_info.pack(side="left")
+            show_records(f"Resultado de: {text}", result.records, relative=True)
+
+        def new_filter(event=None):
+            page[0] = 0
+            apply_filter()
+
+        filter_entry.bind("<Return>", new_filter)
+        ttk.Button(filter_bar, text="◀", width=2, command=lambda: apply_filter(-1)).pack(side="right")
+        ttk.Button(filter_bar, text="▶", width=2, command=lambda: apply_filter(1)).pack(side="right")
+
+        # Limpieza de las filas seleccionadas: en un hilo, y al terminar se
+        # redibuja con los agregados ya corregidos
+        cleanup_info = ttk.Label(self.frame, text="")
+
+        def after_cleanup(report, verb):
+            top_files[:] = self.folder_store.top_n(len(top_files) or 20)
+            apply_filter()
+            if charts is not None:
+                draw_charts(*charts[:3])
+                charts[3].draw_idle()
+            text = f"{verb}: {len(report.done)} archivos · {fmt_size(abs(report.freed_bytes))}"
+            if report.failed:
+                text += f" · {len(report.failed)} con error ({report.failed[0][1]})"
+            cleanup_info.config(text=text)
+            cleanup_info.pack(before=container)
+
+        def run_cleanup(work, verb):
+            result = queue.Queue()
+            threading.Thread(target=lambda: result.put(work()), daemon=True).start()
+            cleanup_info.config(text=f"{verb}...")
+            cleanup_info.pack(before=container)
+
+            def poll():
+                try:
+                    report = result.get_nowait()
+                except queue.Empty:
+                    report = None
+                # Las correcciones se aplican aquí, en el hilo de tkinter, aunque
+                # la vista ya se haya cerrado (main_sizes sigue en uso); todas
+                # llegan antes que el informe
+                self._run_ui_calls()
+                if report is None:
+                    self.root.after(100, poll)
+                elif tree.winfo_exists():
+                    after_cleanup(report, verb)
+
+            self.root.after(100, poll)
+
+        def trash_selected():
+            records = [rows[iid] for iid in tree.selection()]
+            if not records:
+                return
+            total = sum(rec.size for rec in records)
+            if not messagebox.askyesno("Mover a la papelera",
+                                       f"¿Mover {len(records)} archivos ({fmt_size(total)}) a la papelera?"):
+                return
+            run_cleanup(lambda: self.cleanup.execute(records), "Movidos a la papelera")
+
+        def undo_cleanup():
+            run_cleanup(self.cleanup.undo, "Restaurados")
 
         # Botón volver SIEMPRE visible
-        ttk.Button(self.frame, text="⬅️ Volver", command=self.build_main_view).pack(pady=10)
+        buttons = ttk.Frame(self.frame)
+        buttons.pack(pady=10)
+        ttk.Button(buttons, text="📅 Espacio por antigüedad",
+                   command=lambda: self.show_age_view("mtime")).pack(side="left", padx=5)
+        ttk.Button(buttons, text="🗜️ Ahorro por compresión",
+                   command=self.show_compression_view).pack(side="left", padx=5)
+        ttk.Button(buttons, text="🗑️ Mover a la papelera", command=trash_selected).pack(side="left", padx=5)
+        ttk.Button(buttons, text="↩️ Deshacer", command=undo_cleanup).pack(side="left", padx=5)
+        ttk.Button(buttons, text="⬅️ Volver", command=self.build_main_view).pack(side="left", padx=5)
+
+    def show_age_view(self, field: str = "mtime"):
+        """Barras apiladas: bytes por tramo de antigüedad y categoría (sin reescanear)"""
+        self.clear_frame()
+        self.current_view = "age"
+        hist = age_histogram(self.folder_store, by="category", field=field)
+
+        if not hist:
+            tk.Label(self.frame, text=f"No se encontraron archivos en {self.folder_name}.").pack()
+        else:
+            fig, ax = new_figure((6, 5))
+            bottom = [0] * len(AGE_LABELS)
+            for cat, row in sorted(hist.items(), key=lambda x: sum(x[1]), reverse=True):
+                gb = [b / 1024 ** 3 for b in row]
+                ax.bar(AGE_LABELS, gb, bottom=bottom, label=cat)
+                bottom = [a + b for a, b in zip(bottom, gb)]
+            ax.set_ylabel("GB")
+            ax.tick_params(axis="x", labelrotation=20)
+            ax.legend(title="Categorías", fontsize="small")
+            campo = "modificación" if field == "mtime" else "último acceso"
+            ax.set_title(f"Espacio por antigüedad ({campo}) en {self.folder_name}")
+            fig.tight_layout()
+            attach_canvas(fig, self.frame)
+
+        buttons = ttk.Frame(self.frame)
+        buttons.pack(pady=10)
+        other = "atime" if field == "mtime" else "mtime"
+        ttk.Button(buttons, text="Por último acceso" if other == "atime" else "Por modificación",
+                   command=lambda: self.show_age_view(other)).pack(side="left", padx=5)
+        ttk.Button(buttons, text="⬅️ Volver",
+                   command=lambda: self.show_folder_view(self.folder_name)).pack(side="left", padx=5)
+
+    def show_compression_view(self):
+        """Barras por subcarpeta: tamaño y bytes recuperables comprimiendo
+        (se lee ~1% de los datos en un hilo aparte para no congelar la ventana)"""
+        self.show_placeholder(f"Estimando el ahorro por compresión en {self.folder_name}...")
+        self.current_view = "compression"
+        self._scan_gen += 1
+        gen = self._scan_gen
+        result = queue.Queue()
+        store = self.folder_store
+        threading.Thread(target=lambda: result.put(estimate_compression(store)), daemon=True).start()
+
+        def poll():
+            if gen != self._scan_gen or self.current_view != "compression":
+                return
+            try:
+                est = result.get_nowait()
+            except queue.Empty:
+                self.root.after(200, poll)
+                return
+            self.draw_compression_view(est)
+
+        self.root.after(200, poll)
+
+    def draw_compression_view(self, est):
+        self.clear_frame()
+        folders = est.folders()[:15]
+        if not est.candidate_bytes:
+            tk.Label(self.frame, text=f"No hay archivos comprimibles en {self.folder_name}.").pack()
+        else:
+            fig, ax = new_figure((7, 5))
+            # Los archivos sueltos de la raíz cuentan como una barra más
+            root_files = est.dir_bytes[0] - sum(size for _, size, _ in est.folders())
+            rows = [(os.path.basename(path), size, saving) for path, size, saving in folders]
+            if root_files > 0:
+                direct = {m: est.saving(m) - sum(s[m] for _, _, s in est.folders()) for m in est.methods}
+                rows.append(("(archivos sueltos)", root_files, direct))
+            rows.sort(key=lambda r: r[2][est.methods[0]])
+            names = [r[0] for r in rows]
+            ax.barh(names, [r[1] / 1024 ** 3 for r in rows], color="lightgray", label="Tamaño")
+            for m in reversed(est.methods):
+                ax.barh(names, [r[2][m] / 1024 ** 3 for r in rows], label=f"Recuperable ({m})")
+            ax.set_xlabel("GB")
+            ax.legend(fontsize="small")
+            totales = " · ".join(f"{m}: {fmt_size(int(est.saving(m)))}" for m in est.methods)
+            ax.set_title(f"Ahorro por compresión en {self.folder_name}\n{totales} "
+                         f"(leído {est.sampled_bytes / est.candidate_bytes:.1%})", fontsize="medium")
+            fig.tight_layout()
+            attach_canvas(fig, self.frame)
+
+        buttons = ttk.Frame(self.frame)
+        buttons.pack(pady=10)
+        ttk.Button(buttons, text="⬅️ Volver",
+                   command=lambda: self.show_folder_view(self.folder_name)).pack(side="left", padx=5)
+
+    def show_history_view(self):
+        """Líneas: evolución del total de cada carpeta y de cada categoría"""
+        from datetime import datetime
+        self.cancel_exact_scan()
+        self.clear_frame()
+        self.current_view = "history"
+        roots = self.history.series("root:")
+        if not roots:
+            tk.Label(self.frame, text="Aún no hay escaneos completos guardados.").pack()
+        else:
+            fig, (ax, ax_cat) = new_figure((9, 5), ncols=2)
+            for ax_, prefix in ((ax, "root:"), (ax_cat, "category:")):
+                for name in self.history.series(prefix):
+                    points = self.history.query(name)
+                    if points:
+                        ax_.plot([datetime.fromtimestamp(t) for t, _ in points],
+                                 [b / 1024 ** 3 for _, b in points],
+                                 marker="." if len(points) < 50 else None, label=name[len(prefix):])
+                ax_.set_ylabel("GB")
+                ax_.legend(fontsize="small", loc="upper left")
+            ax.set_title("Evolución por carpeta")
+            ax_cat.set_title("Evolución por categoría")
+            fig.autofmt_xdate()
+            fig.tight_layout()
+            attach_canvas(fig, self.frame)
+
+        buttons = ttk.Frame(self.frame)
+        buttons.pack(pady=10)
+        ttk.Button(buttons, text="⬅️ Volver", command=self.build_main_view).pack(side="left", padx=5)
 
 if __name__ == "__main__":
     root = tk.Tk()
-    root.geometry("700x600")
+    root.geometry("900x700")
     app = GestorArchivosApp(root)
     root.mainloop()
@@ -0,0 +1,338 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import importlib
+import subprocess
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ------------------ Benchmarks reproducibles ------------------
+# 1) genera un árbol sintético determinista (semilla) con la mezcla de
+#    extensiones de CATEGORIES, enlaces duros y simbólicos;
+# 2) cronometra cada variante GestorIA*.scan_directory en un subproceso
+#    aislado (así el pico de RSS es de esa variante y no del resto);
+# 3) guarda todo en JSON para comparar entre ejecuciones.
+
+VARIANTS = ["GestorIA", "GestorIA2", "GestorIA3", "GestorIA4", "GestorIA5",
+            "GestorIA6", "GestorIA7", "GestorIA8", "GestorIA9", "gestor_paralelo"]
+
+# Presupuesto de arranque en frío (ms) medido con python -X importtime
+IMPORT_BUDGET_MS = {"gestor_core": 50, "gestor_cli": 100, "GestorIA9": 150}
+
+# Misma mezcla que CATEGORIES en GestorIA9 (copiada para no importar Tk aquí)
+EXT_MIX = {
+    "Videos": [".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".mpeg", ".mpg"],
+    "Música": [".mp3", ".wav", ".flac", ".aac", ".m4a", ".ogg", ".wma"],
+    "Imágenes": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp", ".heic"],
+    "Documentos": [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".txt", ".csv", ".md"],
+    "Comprimidos": [".zip", ".rar", ".7z", ".tar", ".gz"],
+    "Instaladores": [".exe", ".msi", ".apk", ".dmg", ".pkg"],
+    "Otros": ["", ".bin", ".dat", ".log", ".py"],
+}
+# Peso relativo de cada categoría en el árbol generado
+EXT_WEIGHTS = {"Videos": 2, "Música": 5, "Imágenes": 25, "Documentos": 30,
+               "Comprimidos": 3, "Instaladores": 2, "Otros": 33}
+
+
+def generate_tree(root: str, files: int = 10000, depth: int = 4, fanout: int = 5,
+                  seed: int = 1234, hardlinks: float = 0.01, symlinks: float = 0.01,
+                  max_size: int = 1 << 24) -> dict:
+    """Crea un árbol sintético en root. Los tamaños se generan con truncate
+    (archivos dispersos), así millones de bytes no ocupan disco real."""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+
+    dirs = [root]
+    frontier = [root]
+    for level in range(depth):
+        nxt = []
+        for d in frontier:
+            for i in range(fanout):
+                sub = os.path.join(d, f"d{level}_{i}")
+                os.makedirs(sub, exist_ok=True)
+                nxt.append(sub)
+        dirs.extend(nxt)
+        frontier = nxt
+
+    cats = list(EXT_WEIGHTS)
+    weights = [EXT_WEIGHTS[c] for c in cats]
+    created = []
+    n_hard = n_sym = 0
+    for i in range(files):
+        d = rng.choice(dirs)
+        ext = rng.choice(EXT_MIX[rng.choices(cats, weights)[0]])
+        path = os.path.join(d, f"f{i}{ext}")
+        r = rng.random()
+        if created and r < hardlinks:
+            try:
+                os.link(rng.choice(created), path)
+                n_hard += 1
+                continue
+            except OSError:
+                pass
+        elif created and r < hardlinks + symlinks:
+            try:
+                os.symlink(rng.choice(created), path)
+                n_sym += 1
+                continue
+            except OSError:
+                pass
+        # Distribución log-uniforme: muchos archivos pequeños, pocos enormes
+        size = int(2 ** rng.uniform(0, max_size.bit_length() - 1))
+        with open(path, "wb") as f:
+            f.truncate(size)
+        created.append(path)
+
+    return {"root": root, "files": files, "dirs": len(dirs), "depth": depth,
+            "fanout": fanout, "seed": seed, "hardlinks": n_hard, "symlinks": n_sym}
+
+
+def peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS devuelve bytes, Linux kilobytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run_one(module_name: str, tree: str, repeat: int) -> dict:
+    """Se ejecuta dentro del subproceso: importa la variante y la cronometra"""
+    t0 = time.perf_counter()
+    try:
+        mod = importlib.import_module(module_name)
+    except Exception as e:
+        return {"variant": module_name, "skipped": f"{type(e).__name__}: {e}"}
+    import_s = time.perf_counter() - t0
+    # gestor_paralelo expone el escaneo en varios procesos con otro nombre
+    scan = getattr(mod, "parallel_scan_directory", mod.scan_directory)
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        scan(tree)
+        times.append(time.perf_counter() - t0)
+
+    # tracemalloc ralentiza mucho: se mide la memoria en una pasada aparte
+    tracemalloc.start()
+    scan(tree)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"variant": module_name, "import_seconds": import_s,
+            "seconds": min(times), "runs": times,
+            "py_peak_bytes": py_peak, "peak_rss_kb": peak_rss_kb()}
+
+
+def bench_helpers(tree: str, repeat: int) -> list:
+    """Microbenchmarks de las funciones auxiliares de GestorIA9"""
+    try:
+        mod = importlib.import_module("GestorIA9")
+    except Exception as e:
+        return [{"helper": "GestorIA9", "skipped": f"{type(e).__name__}: {e}"}]
+
+    names = []
+    for _, _, filenames in os.walk(tree):
+        names.extend(filenames)
+    sizes = [random.Random(i).randrange(1 << 40) for i in range(len(names))]
+
+    def timeit(label, fn, n):
+        best = min(_elapsed(fn) for _ in range(repeat))
+        return {"helper": label, "seconds": best, "calls": n,
+                "ns_per_call": best / n * 1e9 if n else 0.0}
+
+    out = [
+        timeit("get_category", lambda: [mod.get_category(n) for n in names], len(names)),
+        timeit("fmt_size", lambda: [mod.fmt_size(s) for s in sizes], len(sizes)),
+    ]
+    store = mod.FileStore()
+    mod.scan_directory(tree, store=store)
+    out.append(timeit("FileStore.top_n(20)", lambda: store.top_n(20), len(store)))
+    return out
+
+
+def bench_backend(tree: str, repeat: int, latency_ms: float, per_item_ms: float,
+                  error_rate: float, seed: int) -> dict:
+    """scan_directory sobre un origen simulado (NFS lento, errores EACCES)
+    con los metadatos del árbol copiados en memoria: el resultado depende
+    solo de los parámetros, no del disco de esta máquina"""
+    from gestor_core import scan_directory
+    from gestor_origenes import MemoryBackend, SimulatedBackend
+    snapshot = MemoryBackend.snapshot(tree)
+    times = []
+    for _ in range(repeat):
+        sim = SimulatedBackend(snapshot, latency=latency_ms / 1000, per_item=per_item_ms / 1000,
+                               error_rate=error_rate, seed=seed)
+        t0 = time.perf_counter()
+        total, _, _, errors = scan_directory(tree, backend=sim)
+        times.append(time.perf_counter() - t0)
+    return dict(sim.report(), latency_ms=latency_ms, per_item_ms=per_item_ms, error_rate=error_rate,
+                seed=seed, seconds=min(times), runs=times, total_size=total, scan_errors=errors)
+
+
+def _elapsed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def measure_import(module_name: str, repeat: int = 3) -> dict:
+    """Tiempo acumulado de importar el módulo en un intérprete nuevo (mejor de N)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+                              capture_output=True, text=True, cwd=here)
+        if proc.returncode != 0:
+            return {"module": module_name, "skipped": proc.stderr.strip().splitlines()[-1]}
+        for line in proc.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module_name:
+                us = int(parts[1].strip())
+                best = us if best is None else min(best, us)
+    ms = best / 1000 if best is not None else 0.0
+    budget = IMPORT_BUDGET_MS.get(module_name)
+    return {"module": module_name, "import_ms": ms, "budget_ms": budget,
+            "over_budget": budget is not None and ms > budget}
+
+
+def check_imports() -> list:
+    out = []
+    for module_name in IMPORT_BUDGET_MS:
+        r = measure_import(module_name)
+        if "skipped" in r:
+            print(f"import {module_name:12} omitido: {r['skipped']}")
+        else:
+            flag = "⚠️ FUERA DE PRESUPUESTO" if r["over_budget"] else "ok"
+            print(f"import {module_name:12} {r['import_ms']:8.1f} ms (presupuesto {r['budget_ms']} ms) {flag}")
+        out.append(r)
+    return out
+
+
+def count_files(tree: str) -> int:
+    return sum(len(f) for _, _, f in os.walk(tree))
+
+
+def compare(old_path: str, new: dict, threshold: float) -> int:
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    prev = {r["variant"]: r for r in old.get("results", []) if "seconds" in r}
+    regressions = 0
+    print(f"\n=== Comparación con {old_path} ===")
+    for r in new["results"]:
+        o = prev.get(r["variant"])
+        if not o or "seconds" not in r:
+            continue
+        delta = (r["seconds"] - o["seconds"]) / o["seconds"] if o["seconds"] else 0.0
+        flag = "⚠️ REGRESIÓN" if delta > threshold else ""
+        if flag:
+            regressions += 1
+        print(f"{r['variant']:10} {o['seconds']:.4f}s -> {r['seconds']:.4f}s ({delta:+.1%}) {flag}")
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmarks de las variantes de GestorIA")
+    p.add_argument("--tree", help="Árbol existente (si no, se genera uno temporal)")
+    p.add_argument("--files", type=int, default=10000)
+    p.add_argument("--depth", type=int, default=4)
+    p.add_argument("--fanout", type=int, default=5)
+    p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--hardlinks", type=float, default=0.01)
+    p.add_argument("--symlinks", type=float, default=0.01)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--variants", nargs="*", default=VARIANTS)
+    p.add_argument("--output", default="bench_output.json")
+    p.add_argument("--compare", help="JSON de una ejecución anterior")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="Empeoramiento relativo que se considera regresión")
+    p.add_argument("--imports-only", action="store_true",
+                   help="Solo comprueba el tiempo de arranque contra IMPORT_BUDGET_MS")
+    p.add_argument("--latency", type=float, metavar="MS",
+                   help="Mide además un escaneo sobre un origen simulado con esta latencia por llamada")
+    p.add_argument("--per-item-latency", type=float, default=0.0, metavar="MS",
+                   help="Latencia extra por archivo en cada lote de stat del origen simulado")
+    p.add_argument("--error-rate", type=float, default=0.0,
+                   help="Fracción de rutas que fallan con EACCES en el origen simulado")
+    p.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.tree, args.repeat)))
+        return 0
+
+    imports = check_imports()
+    over_budget = any(r.get("over_budget") for r in imports)
+    if args.imports_only:
+        return 1 if over_budget else 0
+
+    tmp = None
+    if args.tree:
+        tree_info = {"root": args.tree}
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="gestoria_bench_")
+        tree_info = generate_tree(os.path.join(tmp.name, "tree"), args.files, args.depth,
+                                  args.fanout, args.seed, args.hardlinks, args.symlinks)
+    tree = tree_info["root"]
+    n_files = count_files(tree)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    try:
+        for variant in args.variants:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-one", variant,
+                 "--tree", tree, "--repeat", str(args.repeat)],
+                capture_output=True, text=True, cwd=here,
+            )
+            try:
+                r = json.loads(proc.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                r = {"variant": variant, "skipped": proc.stderr.strip()[-300:]}
+            if "seconds" in r:
+                r["files_per_second"] = n_files / r["seconds"] if r["seconds"] else 0.0
+                print(f"{variant:10} {r['seconds']:.4f}s  {r['files_per_second']:>12,.0f} archivos/s"
+                      f"  RSS pico {r['peak_rss_kb'] / 1024:.1f} MB")
+            else:
+                print(f"{variant:10} omitida: {r['skipped']}")
+            results.append(r)
+
+        helpers = bench_helpers(tree, args.repeat)
+        simulated = None
+        if args.latency is not None or args.error_rate:
+            simulated = bench_backend(tree, args.repeat, args.latency or 0.0, args.per_item_latency,
+                                      args.error_rate, args.seed)
+            print(f"{'simulado':10} {simulated['seconds']:.4f}s  {simulated['calls']} llamadas"
+                  f"  {simulated['scan_errors']} errores")
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        "meta": {"timestamp": time.time(), "python": sys.version.split()[0],
+                 "platform": platform.platform(), "tree": tree_info, "files_seen": n_files,
+                 "repeat": args.repeat},
+        "results": results,
+        "helpers": helpers,
+        "simulated": simulated,
+        "imports": imports,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {args.output}")
+
+    regressions = compare(args.compare, report, args.threshold) if args.compare else 0
+    return 1 if regressions or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
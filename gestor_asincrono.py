@@ -0,0 +1,115 @@
+import asyncio
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from gestor_core import iter_scan
+from gestor_registros import FileStore
+from gestor_metricas import ScanMetrics
+
+# ------------------ API asíncrona de escaneo ------------------
+# Para servicios asyncio: el recorrido avanza una carpeta cada vez dentro de
+# un ThreadPoolExecutor acotado y compartido, así el bucle de eventos nunca
+# se bloquea y muchos escaneos simultáneos no crean hilos sin límite.
+# Es un modelo "pull": no se lee la siguiente carpeta hasta que el
+# consumidor pide el siguiente agregado (contrapresión natural), y dejar de
+# iterar o cancelar la tarea detiene el recorrido.
+
+MAX_SCAN_THREADS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Pool común a todos los escaneos del proceso (se crea al primer uso)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_SCAN_THREADS,
+                                           thread_name_prefix="gestoria-scan")
+    return _executor
+
+
+class AsyncScan:
+    """Escaneo iterable con `async for`, una DirSummary por carpeta:
+
+        scan = AsyncScan(ruta, timeout=30)
+        async for carpeta in scan:
+            ...
+        total, top_files, categorias, errores = await scan.result()
+
+    `timeout` limita la duración total (asyncio.TimeoutError al agotarse).
+    Acepta store, metrics, size_stats, policy y throttle como scan_directory."""
+
+    def __init__(self, base_path: str, top_n_files: int = 20, store: FileStore = None,
+                 metrics: ScanMetrics = None, size_stats=None, policy=None,
+                 timeout: float = None, executor=None, throttle=None):
+        self.base_path = base_path
+        self.top_n_files = top_n_files
+        self.store = FileStore() if store is None else store
+        self.metrics = ScanMetrics() if metrics is None else metrics
+        self.size_stats = size_stats
+        self.policy = policy
+        self.timeout = timeout
+        self.executor = executor
+        self.throttle = throttle
+        self.category_sizes = defaultdict(int)
+        self.errors = 0
+        self.started = False
+        self.done = False
+
+    def __aiter__(self):
+        if self.started:
+            raise RuntimeError("Un AsyncScan solo se puede recorrer una vez")
+        self.started = True
+        return self._iterate()
+
+    async def _iterate(self):
+        loop = asyncio.get_running_loop()
+        executor = self.executor or shared_executor()
+        deadline = loop.time() + self.timeout if self.timeout is not None else None
+        walker = iter_scan(self.base_path, self.store, self.metrics, self.size_stats, self.policy,
+                           throttle=self.throttle)
+        pending = None
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError(f"Escaneo de {self.base_path} sin terminar")
+                pending = loop.run_in_executor(executor, next, walker, None)
+                # shield: si vence el plazo o se cancela, el paso en curso termina
+                # en su hilo y solo entonces se cierra el generador
+                summary = await asyncio.wait_for(asyncio.shield(pending), remaining)
+                pending = None
+                if summary is None:
+                    break
+                for cat, size in summary.categories.items():
+                    self.category_sizes[cat] += size
+                self.errors += summary.errors
+                yield summary
+            self.metrics.bytes += sum(self.category_sizes.values())
+            self.done = True
+        finally:
+            if pending is not None and not pending.done():
+                pending.add_done_callback(lambda _: walker.close())
+            else:
+                walker.close()
+
+    async def result(self) -> tuple:
+        """(total, top_files, categorías, errores), como scan_directory"""
+        if not self.started:
+            async for _ in self:
+                pass
+        if not self.done:
+            raise RuntimeError("El escaneo se interrumpió antes de terminar")
+        loop = asyncio.get_running_loop()
+        top_files = await loop.run_in_executor(self.executor or shared_executor(),
+                                               self.store.top_n, self.top_n_files)
+        total_size = sum(self.category_sizes.values())
+        return total_size, top_files, self.category_sizes, self.errors
+
+
+async def scan_directory_async(base_path: str, top_n_files: int = 20, **kwargs) -> tuple:
+    """Versión awaitable de scan_directory (sin agregados intermedios)"""
+    return await AsyncScan(base_path, top_n_files, **kwargs).result()
@@ -0,0 +1,341 @@
+import os
+import re
+import json
+import struct
+import fnmatch
+import heapq
+from array import array
+
+# ------------------ Índice de búsqueda por nombre ------------------
+# Índice invertido de trigramas sobre nombres de archivo y de carpeta.
+# Cada trigrama apunta a la lista (array) de entradas que lo contienen;
+# una consulta solo verifica los candidatos del trigrama más raro, así que
+# responde en milisegundos aunque haya millones de rutas.
+# La búsqueda aproximada trabaja por palabras: cada palabra de la consulta se
+# compara (distancia de edición con transposiciones) con el vocabulario de
+# palabras de los nombres, que tiene su propio índice de trigramas y es
+# mucho más pequeño que la lista de entradas; luego se buscan las entradas
+# que contienen las palabras parecidas.
+
+KIND_FILE = 0
+KIND_DIR = 1
+GLOB_CHARS = set("*?[")
+MAX_FUZZY_HITS = 5000       # entradas por palabra parecida
+_WORD_RE = re.compile(r"[^\W_]+")
+_MAGIC = b"GSIX"
+_FORMAT = 1
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein con transposición de vecinas (una errata = 1); si pasa
+    de `limit` devuelve limit + 1 sin terminar la tabla"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SearchIndex:
+    def __init__(self):
+        self.dirs = []          # tabla de carpetas (ruta completa)
+        self.names = []         # nombre original de cada entrada
+        self.parents = array("l")   # carpeta de la entrada (para un dir, él mismo)
+        self.kinds = array("b")
+        self.postings = {}          # trigrama -> array("i") de entradas
+        self.vocab = set()          # palabras (>= 3 letras) de los nombres
+        self.vocab_tris = {}        # trigrama -> palabras del vocabulario
+        self.roots = {}             # raíz indexada -> rango [primera, última) de entradas
+        self.deleted = set()        # entradas de raíces reemplazadas
+        self.hidden = set()         # entradas borradas desde la interfaz (deshacer las recupera)
+
+    def __len__(self):
+        return len(self.names) - len(self.deleted)
+
+    # ---- Construcción incremental ----
+    def _add_entry(self, name: str, parent: int, kind: int):
+        entry = len(self.names)
+        self.names.append(name)
+        self.parents.append(parent)
+        self.kinds.append(kind)
+        lower = name.lower()
+        postings = self.postings
+        for t in trigrams(lower):
+            p = postings.get(t)
+            if p is None:
+                postings[t] = p = array("i")
+            p.append(entry)
+        for word in _WORD_RE.findall(lower):
+            if len(word) >= 3 and word not in self.vocab:
+                self._add_word(word)
+
+    def _add_word(self, word: str):
+        self.vocab.add(word)
+        for t in trigrams(word):
+            self.vocab_tris.setdefault(t, []).append(word)
+
+    def replace_root(self, root: str, store):
+        """Indexa (o reindexa tras un nuevo escaneo) todo lo que hay bajo root"""
+        self.remove_root(root)
+        first_entry = len(self.names)
+        dir_map = {}
+        for dir_id, d in enumerate(store.dirs):
+            gid = len(self.dirs)
+            self.dirs.append(d)
+            dir_map[dir_id] = gid
+            self._add_entry(os.path.basename(d) or d, gid, KIND_DIR)
+        for i in range(len(store)):
+            self._add_entry(store.name(i), dir_map[store.dir_ids[i]], KIND_FILE)
+        self.roots[root] = (first_entry, len(self.names))
+        # Demasiadas entradas borradas: compensa reconstruir las listas
+        if len(self.deleted) > len(self.names) // 2:
+            self.compact()
+
+    def remove_root(self, root: str):
+        span = self.roots.pop(root, None)
+        if span is not None:
+            self.deleted.update(range(*span))
+
+    def compact(self):
+        old = (self.dirs, self.names, self.parents, self.kinds, self.roots, self.deleted, self.hidden)
+        dirs, names, parents, kinds, roots, deleted, hidden = old
+        self.__init__()
+        for root, (start, end) in roots.items():
+            first_entry = len(self.names)
+            dir_map = {}
+            for e in range(start, end):
+                if e in deleted:
+                    continue
+                gid = dir_map.get(parents[e])
+                if gid is None:
+                    gid = dir_map[parents[e]] = len(self.dirs)
+                    self.dirs.append(dirs[parents[e]])
+                if e in hidden:
+                    self.hidden.add(len(self.names))
+                self._add_entry(names[e], gid, kinds[e])
+            self.roots[root] = (first_entry, len(self.names))
+
+    def hide(self, path: str, hidden: bool = True):
+        """Oculta (o vuelve a mostrar, al deshacer) la entrada de path y, si
+        es una carpeta, todo lo que contiene"""
+        name = os.path.basename(path)
+        entries = [e for e in self._candidates([name])
+                   if self.kinds[e] == KIND_FILE and self.names[e] == name and self.path(e) == path]
+        if not entries:
+            # Carpeta: una pasada por las entradas (borrar carpetas es lo raro)
+            prefix = os.path.join(path, "")
+            under = {d for d, p in enumerate(self.dirs) if p == path or p.startswith(prefix)}
+            entries = [e for e, d in enumerate(self.parents) if d in under]
+        if hidden:
+            self.hidden.update(entries)
+        else:
+            self.hidden.difference_update(entries)
+
+    # ---- Consultas ----
+    def path(self, entry: int) -> str:
+        d = self.dirs[self.parents[entry]]
+        return d if self.kinds[entry] == KIND_DIR else os.path.join(d, self.names[entry])
+
+    def _candidates(self, literals):
+        """Entradas del trigrama más raro entre todos los literales (sin literales, todas)"""
+        best = None
+        for lit in literals:
+            for t in trigrams(lit.lower()):
+                p = self.postings.get(t)
+                if p is None:
+                    return array("i")
+                if best is None or len(p) < len(best):
+                    best = p
+        return best if best is not None else range(len(self.names))
+
+    def _collect(self, candidates, match, limit: int):
+        out = []
+        deleted, hidden = self.deleted, self.hidden
+        for e in candidates:
+            if e not in deleted and e not in hidden and match(self.names[e]):
+                out.append(e)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def substring(self, query: str, limit: int = 200) -> list:
+        q = query.lower()
+        return self._collect(self._candidates([q]), lambda n: q in n.lower(), limit)
+
+    def glob(self, pattern: str, limit: int = 200) -> list:
+        regex = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+        literals = [lit for lit in re.split(r"[*?]|\[[^\]]*\]", pattern) if len(lit) >= 3]
+        return self._collect(self._candidates(literals), regex.match, limit)
+
+    def _close_words(self, word: str) -> list:
+        """[(palabra del vocabulario, similitud)]: las que empiezan por `word`
+        y las que están a 1 errata (2 si la palabra es larga)"""
+        limit = 1 if len(word) <= 5 else 2
+        seen = set()
+        for t in trigrams(word):
+            seen.update(self.vocab_tris.get(t, ()))
+        out = []
+        for cand in seen:
+            if cand.startswith(word):
+                out.append((cand, 1.0))
+                continue
+            d = edit_distance(word, cand, limit)
+            if d <= limit:
+                out.append((cand, 1.0 - d / len(word)))
+        return out
+
+    def fuzzy(self, query: str, limit: int = 50, min_score: float = 0.6) -> list:
+        """Por palabras, en cualquier orden; tolera erratas (letras cambiadas,
+        de más, de menos o traspuestas). La nota es la similitud media de las
+        palabras de la consulta con las del nombre."""
+        return [e for _, e in self.fuzzy_scored(query, limit, min_score)]
+
+    def fuzzy_scored(self, query: str, limit: int = 50, min_score: float = 0.6) -> list:
+        """Como fuzzy pero [(nota, entrada)], de mayor a menor nota"""
+        words = _WORD_RE.findall(query.lower())
+        long_words = [w for w in words if len(w) >= 3]
+        if not long_words:
+            return [(1.0, e) for e in self.substring(query, limit)]
+        scores = {}
+        for k, word in enumerate(long_words):
+            for cand, sim in self._close_words(word):
+                hits = self._collect(self._candidates([cand]), lambda n, c=cand: c in n.lower(),
+                                     MAX_FUZZY_HITS)
+                for e in hits:
+                    row = scores.setdefault(e, [0.0] * len(long_words))
+                    if sim > row[k]:
+                        row[k] = sim
+        # Las palabras cortas (sin trigramas) solo cuentan como subcadena exacta
+        short = [w for w in words if len(w) < 3]
+        ranked = []
+        for e, row in scores.items():
+            lower = self.names[e].lower()
+            score = (sum(row) + sum(w in lower for w in short)) / len(words)
+            if score >= min_score:
+                ranked.append((score, -e))
+        return [(score, -e) for score, e in heapq.nlargest(limit, ranked)]
+
+    def search(self, query: str, limit: int = 200) -> list:
+        """'~texto' = fuzzy, con * ? [ = glob, si no subcadena"""
+        query = query.strip()
+        if not query:
+            return []
+        if query.startswith("~"):
+            return self.fuzzy(query[1:], limit)
+        if GLOB_CHARS & set(query):
+            return self.glob(query, limit)
+        return self.substring(query, limit)
+
+    # ---- Persistencia ----
+    # Cabecera JSON (tablas pequeñas y vocabulario) y detrás las columnas y
+    # las listas de trigramas como bytes crudos, igual que FileStore.to_blob.
+    # Nada de pickle: el archivo puede estar en una carpeta compartida.
+    def save(self, path: str):
+        tris = list(self.postings)
+        header = {
+            "format": _FORMAT,
+            "itemsize": self.parents.itemsize,
+            "dirs": self.dirs,
+            "names": self.names,
+            "roots": {root: list(span) for root, span in self.roots.items()},
+            "deleted": sorted(self.deleted),
+            "vocab": sorted(self.vocab),
+            "trigrams": tris,
+            "lengths": [len(self.postings[t]) for t in tris],
+        }
+        head = json.dumps(header).encode("utf-8")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC + struct.pack("<I", len(head)) + head)
+            f.write(self.parents.tobytes())
+            f.write(self.kinds.tobytes())
+            for t in tris:
+                f.write(self.postings[t].tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        """Índice guardado con save(); vacío si no existe o no se entiende"""
+        index = cls()
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            if raw[:4] != _MAGIC:
+                raise ValueError("no es un índice de búsqueda")
+            (n,) = struct.unpack_from("<I", raw, 4)
+            header = json.loads(raw[8:8 + n].decode("utf-8"))
+            if header["format"] != _FORMAT or header["itemsize"] != index.parents.itemsize:
+                raise ValueError("formato de otra versión")
+            pos = 8 + n
+            count = len(header["names"])
+            for col in (index.parents, index.kinds):
+                size = col.itemsize * count
+                col.frombytes(raw[pos:pos + size])
+                pos += size
+            for t, length in zip(header["trigrams"], header["lengths"]):
+                p = index.postings[t] = array("i")
+                p.frombytes(raw[pos:pos + 4 * length])
+                pos += 4 * length
+            index.dirs = header["dirs"]
+            index.names = header["names"]
+            index.roots = {root: tuple(span) for root, span in header["roots"].items()}
+            index.deleted = set(header["deleted"])
+            for word in header["vocab"]:
+                index._add_word(word)
+        except (OSError, ValueError, KeyError, TypeError, struct.error, UnicodeDecodeError):
+            return cls()
+        return index
+
+
+class RootIndexes:
+    """Un SearchIndex por raíz. Cada uno se construye entero en el hilo del
+    escaneo y aquí solo se cambia la referencia, así que el hilo de la
+    interfaz nunca indexa ni ve un índice a medio construir."""
+
+    def __init__(self):
+        self.indexes = {}       # raíz -> SearchIndex
+
+    def __len__(self):
+        return sum(len(index) for index in self.indexes.values())
+
+    def swap(self, root: str, index: SearchIndex):
+        self.indexes[root] = index
+
+    def remove(self, root: str):
+        self.indexes.pop(root, None)
+
+    def hide(self, path: str, hidden: bool = True):
+        for root, index in self.indexes.items():
+            if path == root or path.startswith(os.path.join(root, "")):
+                index.hide(path, hidden)
+
+    def search(self, query: str, limit: int = 200) -> list:
+        """[(índice, entrada)]; las aproximadas se ordenan por nota entre todas
+        las raíces, el resto van por raíz en el orden en que se añadieron"""
+        query = query.strip()
+        indexes = list(self.indexes.values())
+        if not query:
+            return []
+        if query.startswith("~"):
+            every = ((score, -k, -n, e) for k, index in enumerate(indexes)
+                     for n, (score, e) in enumerate(index.fuzzy_scored(query[1:], limit)))
+            return [(indexes[-k], e) for _, k, _, e in heapq.nlargest(limit, every)]
+        out = []
+        for index in indexes:
+            out.extend((index, e) for e in index.search(query, limit - len(out)))
+            if len(out) >= limit:
+                break
+        return out
@@ -0,0 +1,446 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+from gestor_core import fmt_size, scan_directory, default_target_folders
+from gestor_registros import FileStore
+from gestor_histograma import SizeStats
+from gestor_metricas import ScanMetrics
+
+# ------------------ Modo sin interfaz (CLI / daemon) ------------------
+# Pensado para servidores Linux sin pantalla y para cron: solo importa el
+# núcleo (biblioteca estándar), nunca tkinter ni matplotlib.
+
+
+def summarize_root(nombre: str, ruta: str, top_n: int, metrics: ScanMetrics,
+                   stats_total: SizeStats = None, sniffer=None, classifier=None,
+                   projects: bool = False, index=None, age: bool = False,
+                   archives: bool = False, policy=None, workers: int = 1, throttle=None,
+                   duplicates=None, query=None, page: int = 0, page_size: int = 50,
+                   image: bool = False, compression: float = None) -> dict:
+    backend = None
+    if image:
+        # La raíz es una imagen .tar/.zip: se recorre su índice sin extraerla
+        if not os.path.isfile(ruta):
+            return {"name": nombre, "root": ruta, "exists": False}
+        from gestor_origenes import ImageBackend
+        try:
+            backend = ImageBackend(ruta)
+        except OSError as e:
+            return {"name": nombre, "root": ruta, "exists": True, "error": str(e)}
+    elif not os.path.isdir(ruta):
+        return {"name": nombre, "root": ruta, "exists": False}
+
+    store = FileStore()
+    size_stats = SizeStats()
+    suggestions = [] if classifier is not None else None
+    inspector = None
+    if archives:
+        from gestor_comprimidos import ArchiveInspector
+        inspector = ArchiveInspector()
+    if workers > 1:
+        from gestor_paralelo import parallel_scan_directory
+        total, top_files, cats, errors = parallel_scan_directory(
+            ruta, top_n_files=top_n, store=store, metrics=metrics, size_stats=size_stats,
+            archive_inspector=inspector, policy=policy, workers=workers)
+    else:
+        total, top_files, cats, errors = scan_directory(ruta, top_n_files=top_n, store=store,
+                                                        metrics=metrics, sniffer=sniffer,
+                                                        classifier=classifier, size_stats=size_stats,
+                                                        archive_inspector=inspector, policy=policy,
+                                                        throttle=throttle, backend=backend,
+                                                        suggestions=suggestions)
+    summary = {
+        "name": nombre,
+        "root": ruta,
+        "exists": True,
+        "total_size": total,
+        "total_human": fmt_size(total),
+        "categories": dict(sorted(cats.items(), key=lambda x: x[1], reverse=True)),
+        "top_files": [
+            {"path": rec.path, "size": rec.size, "category": rec.category, "mtime": rec.mtime}
+            for rec in top_files
+        ],
+        "errors": errors,
+        "size_stats": size_stats.summary(),
+    }
+    if stats_total is not None:
+        stats_total.merge(size_stats)
+    if suggestions:
+        # Aparte de "categories": son conjeturas del modelo, no cambian los totales
+        by_cat = {}
+        for idx, cat, _ in suggestions:
+            entry = by_cat.setdefault(cat, {"files": 0, "size": 0})
+            entry["files"] += 1
+            entry["size"] += store.sizes[idx]
+        suggestions.sort(key=lambda s: store.sizes[s[0]], reverse=True)
+        summary["suggestions"] = {
+            "categories": dict(sorted(by_cat.items(), key=lambda x: x[1]["size"], reverse=True)),
+            "files": [{"path": store.path(idx), "size": store.sizes[idx], "category": cat,
+                       "confidence": round(conf, 3)} for idx, cat, conf in suggestions[:top_n]],
+        }
+    if inspector is not None:
+        summary["archives"] = inspector.summary()
+    if policy is not None and ruta in policy.truncated:
+        summary["truncated"] = policy.truncated[ruta]
+    if index is not None:
+        with metrics.phase("index"):
+            index.replace_root(ruta, store)
+    if age:
+        from gestor_edad import AGE_LABELS, age_histogram
+        summary["age_buckets"] = AGE_LABELS
+        summary["age_by_category"] = age_histogram(store, "category", "mtime")
+        summary["age_by_folder"] = age_histogram(store, "folder", "mtime", root=ruta)
+        summary["access_age_by_category"] = age_histogram(store, "category", "atime")
+    if query is not None:
+        with metrics.phase("query"):
+            result = query.run(store, page=page, page_size=page_size)
+        summary["query"] = dict(result.to_dict(), expression=query.text)
+    if duplicates is not None:
+        from gestor_duplicados import find_duplicate_folders
+        with metrics.phase("duplicates"):
+            summary["duplicate_folders"] = find_duplicate_folders(store, duplicates)
+    if compression and backend is None:   # hay que leer contenido: solo en disco
+        from gestor_compresion import estimate_compression
+        with metrics.phase("compression"):
+            summary["compression"] = estimate_compression(store, sample_fraction=compression).to_dict()
+    if projects:
+        from gestor_ia import suggest_projects
+        summary["projects"] = [{"root": r, "files": n, "size": size}
+                               for r, n, size in suggest_projects(store)]
+    return summary
+
+
+def run_scan(roots: dict, top_n: int, metrics: ScanMetrics = None, **opts) -> dict:
+    """opts se pasan tal cual a summarize_root (sniffer, classifier, index...)"""
+    if metrics is None:
+        metrics = ScanMetrics()
+    stats_global = SizeStats()
+    resumen = [summarize_root(nombre, ruta, top_n, metrics, stats_global, **opts)
+               for nombre, ruta in roots.items()]
+    categorias_global = {}
+    for r in resumen:
+        for cat, size in r.get("categories", {}).items():
+            categorias_global[cat] = categorias_global.get(cat, 0) + size
+    total = sum(r.get("total_size", 0) for r in resumen)
+    return {
+        "timestamp": time.time(),
+        "total_size": total,
+        "total_human": fmt_size(total),
+        "categories": dict(sorted(categorias_global.items(), key=lambda x: x[1], reverse=True)),
+        "size_stats": stats_global.summary(),
+        "roots": resumen,
+        "metrics": metrics.report(),
+    }
+
+
+def stream_scan(roots: dict, out, metrics: ScanMetrics = None, policy=None):
+    """Una línea JSON por carpeta en cuanto se lee, sin guardar el árbol"""
+    from gestor_core import iter_scan
+    for nombre, ruta in roots.items():
+        for summary in iter_scan(ruta, metrics=metrics, policy=policy):
+            line = summary.to_dict()
+            line["root"] = nombre
+            out.write(json.dumps(line, ensure_ascii=False) + "\n")
+        out.flush()
+
+
+def sorted_listing(roots: dict, memory_budget: int, metrics: ScanMetrics = None, policy=None):
+    """Todos los archivos de todas las raíces ordenados por tamaño con
+    memoria acotada; el llamante debe cerrar el ExternalSizeSort devuelto"""
+    from gestor_core import iter_scan
+    from gestor_ordenacion import ExternalSizeSort
+    sorter = ExternalSizeSort(memory_budget)
+    try:
+        for ruta in roots.values():
+            if os.path.isdir(ruta):
+                for _ in iter_scan(ruta, metrics=metrics, policy=policy, file_sink=sorter):
+                    pass
+        return sorter.finish()
+    except BaseException:
+        sorter.close()
+        raise
+
+
+def write_json(data: dict, output: str, indent):
+    text = json.dumps(data, indent=indent, ensure_ascii=False)
+    if output in (None, "-"):
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+        return
+    # Escritura atómica para que otros procesos nunca lean un JSON a medias
+    tmp = f"{output}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    os.replace(tmp, output)
+
+
+def parse_roots(values) -> dict:
+    """Acepta rutas sueltas o pares nombre=ruta"""
+    if not values:
+        return default_target_folders()
+    roots = {}
+    for v in values:
+        nombre, sep, ruta = v.partition("=")
+        if not sep or not nombre or os.path.exists(v):
+            nombre, ruta = v, v
+        roots[nombre] = os.path.abspath(ruta)
+    return roots
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Escaneo de carpetas sin interfaz con salida JSON")
+    p.add_argument("roots", nargs="*",
+                   help="Rutas a analizar (o nombre=ruta). Por defecto, las carpetas personales")
+    p.add_argument("--top", type=int, default=20, help="Número de archivos más pesados por raíz")
+    p.add_argument("-o", "--output", default="-", help="Archivo JSON de salida ('-' = stdout)")
+    p.add_argument("--indent", type=int, default=None, help="Sangría del JSON (por defecto compacto)")
+    p.add_argument("--metrics-file", help="Escribe además las métricas en formato Prometheus")
+    p.add_argument("--sniff", action="store_true",
+                   help="Reclasifica los archivos 'Otros' leyendo sus primeros bytes")
+    p.add_argument("--sniff-cache", help="Archivo JSON donde persistir los veredictos de --sniff")
+    p.add_argument("--smart", action="store_true",
+                   help="Sugiere categoría con el modelo local para lo que siga en 'Otros' "
+                        "(en 'suggestions', sin cambiar los totales)")
+    p.add_argument("--model", help="Modelo del clasificador (se crea al primer uso si no existe)")
+    p.add_argument("--projects", action="store_true", help="Agrupa los archivos por proyecto")
+    p.add_argument("--age", action="store_true",
+                   help="Añade histogramas de bytes por antigüedad (categoría y subcarpeta)")
+    p.add_argument("--archives", action="store_true",
+                   help="Lee el índice de zip/tar/gz y reparte su contenido por categorías")
+    p.add_argument("-q", "--query",
+                   help='Filtra los archivos, p. ej. \'category=Videos and size>1GB and age>365d and path~"Downloads"\'')
+    p.add_argument("--page", type=int, default=0, help="Página de resultados de --query o --sorted (desde 0)")
+    p.add_argument("--page-size", type=int, default=50, help="Resultados por página de --query o --sorted")
+    p.add_argument("--sorted", action="store_true",
+                   help="Lista TODOS los archivos de mayor a menor con memoria acotada (ordenación externa)")
+    p.add_argument("--sort-memory", type=int, default=64, metavar="MB",
+                   help="Memoria máxima de --sorted antes de volcar tramos a disco")
+    p.add_argument("--export", help="Con --sorted, vuelca el listado completo (.csv, .jsonl o TSV; '-' = stdout)")
+    p.add_argument("--duplicates", action="store_true",
+                   help="Busca carpetas idénticas o casi idénticas (copias enteras)")
+    p.add_argument("--hash-cache", help="Archivo JSON donde guardar los hashes de contenido de --duplicates")
+    p.add_argument("--image", action="store_true",
+                   help="Las raíces son imágenes .tar/.zip: se recorre su índice sin extraerlas")
+    p.add_argument("--compression", type=float, nargs="?", const=0.01, metavar="FRACCIÓN",
+                   help="Estima el ahorro por compresión leyendo esa fracción de los bytes (por defecto 0.01)")
+    p.add_argument("-x", "--one-file-system", action="store_true",
+                   help="No cruza puntos de montaje (se queda en el dispositivo de cada raíz)")
+    p.add_argument("--exclude", action="append", default=[],
+                   help="Glob o 're:regex' a excluir (nombre o ruta completa); repetible")
+    p.add_argument("--skip-fstype", action="append", default=None,
+                   help="Tipo de sistema de archivos a no recorrer; repetible "
+                        "(por defecto proc, sysfs, nfs, cifs, sshfs...)")
+    p.add_argument("--max-seconds", type=float, help="Tiempo máximo por raíz")
+    p.add_argument("--max-entries", type=int, help="Máximo de entradas (archivos + carpetas) por raíz")
+    p.add_argument("-j", "--workers", type=int, default=1,
+                   help="Procesos para recorrer cada raíz en paralelo (0 = uno por núcleo)")
+    p.add_argument("--throttle", type=float, metavar="OPS",
+                   help="Máximo de operaciones de E/S (stat + lecturas de carpeta) por segundo; "
+                        "baja solo si la latencia del disco sube")
+    p.add_argument("--target-latency", type=float, default=5.0,
+                   help="Latencia por llamada (ms) a partir de la cual --throttle frena")
+    p.add_argument("--idle", action="store_true",
+                   help="Prioridad mínima de CPU y E/S (para servidores en producción)")
+    p.add_argument("--index", help="Índice de búsqueda persistente que se actualiza con cada escaneo")
+    p.add_argument("--search", help="Busca en --index sin escanear (~texto = aproximada, * ? = glob)")
+    p.add_argument("--clean", metavar="LISTA",
+                   help="Mueve a la papelera las rutas de LISTA (una por línea, '-' = stdin) sin escanear")
+    p.add_argument("--unlink", action="store_true", help="Con --clean, borra definitivamente (sin deshacer)")
+    p.add_argument("--undo", nargs="?", const="", metavar="LOTE",
+                   help="Restaura lo que un lote de --clean movió a la papelera (por defecto el último)")
+    p.add_argument("--journal", help="Diario de --clean/--undo (por defecto en ~/.local/state/gestoria)")
+    p.add_argument("--history", nargs="?", const="", metavar="DIR",
+                   help="Apunta los totales de cada escaneo en el histórico (por defecto en ~/.local/share/gestoria)")
+    p.add_argument("--history-query", metavar="SERIE",
+                   help="Muestra el histórico sin escanear: 'total', 'root:<nombre>', 'category:<cat>' o un prefijo")
+    p.add_argument("--since", type=float, metavar="DÍAS", help="Con --history-query, solo los últimos DÍAS")
+    p.add_argument("--estimate", type=float, metavar="SEGUNDOS",
+                   help="Solo estima por muestreo (con intervalos de confianza) en ese tiempo por raíz")
+    p.add_argument("--stream", action="store_true",
+                   help="Emite JSON Lines con el agregado de cada carpeta según se lee")
+    p.add_argument("--interval", type=float, default=0,
+                   help="Modo daemon: repite el escaneo cada N segundos")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    if args.workers > 1 and args.image:
+        build_parser().error("--image no se puede combinar con --workers")
+    if args.workers > 1 and args.throttle:
+        build_parser().error("--throttle limita un solo recorrido: no se combina con --workers")
+    if args.workers > 1 and (args.sniff or args.sniff_cache or args.smart or args.model):
+        build_parser().error("--workers no se puede combinar con --sniff ni --smart")
+    if args.page < 0 or args.page_size < 1:
+        build_parser().error("--page empieza en 0 y --page-size debe ser al menos 1")
+    index = None
+    if args.index:
+        from gestor_busqueda import SearchIndex
+        index = SearchIndex.load(args.index)
+    if args.search is not None:
+        if index is None:
+            build_parser().error("--search necesita --index")
+        entries = index.search(args.search)
+        write_json({"query": args.search, "results": [index.path(e) for e in entries]},
+                   args.output, args.indent)
+        return 0 if entries else 1
+
+    if args.clean is not None or args.undo is not None:
+        from gestor_limpieza import CleanupExecutor, CleanupItem, disk_size
+        executor = CleanupExecutor(args.journal, mode="unlink" if args.unlink else "trash")
+        recovered = executor.recover()
+        if args.undo is not None:
+            report = executor.undo(args.undo or None)
+        else:
+            if args.clean == "-":
+                lines = sys.stdin.read().splitlines()
+            else:
+                with open(args.clean, encoding="utf-8", errors="surrogateescape") as f:
+                    lines = f.read().splitlines()
+            items = []
+            for line in lines:
+                path = line.strip()
+                if path:
+                    items.append(CleanupItem(os.path.abspath(path), disk_size(path)))
+            report = executor.execute(items)
+        write_json(dict(report.to_dict(), recovered=recovered), args.output, args.indent)
+        return 1 if report.failed else 0
+
+    history = None
+    if args.history is not None or args.history_query is not None:
+        from gestor_historial import UsageHistory
+        history = UsageHistory(args.history or None)
+    if args.history_query is not None:
+        start = time.time() - args.since * 86400 if args.since else None
+        names = history.series(args.history_query)
+        write_json({"series": {name: {"points": history.query(name, start),
+                                      "growth": history.growth(name, start)}
+                               for name in names}},
+                   args.output, args.indent)
+        return 0 if names else 1
+
+    roots = parse_roots(args.roots)
+
+    sniffer = None
+    if args.sniff or args.sniff_cache:
+        from gestor_firmas import ContentSniffer
+        sniffer = ContentSniffer(cache_path=args.sniff_cache)
+
+    classifier = None
+    if args.smart or args.model:
+        from gestor_ia import SmartClassifier
+        classifier = SmartClassifier(model_path=args.model)
+
+    from gestor_recorrido import SLOW_FSTYPES, TraversalPolicy
+    policy = TraversalPolicy(one_device=args.one_file_system, exclude=args.exclude,
+                             skip_fstypes=SLOW_FSTYPES if args.skip_fstype is None else args.skip_fstype,
+                             max_seconds=args.max_seconds, max_entries=args.max_entries)
+
+    if args.estimate is not None:
+        from gestor_muestreo import estimate_directory
+        estimates = [dict(estimate_directory(ruta, max_seconds=args.estimate, policy=policy).to_dict(),
+                          name=nombre)
+                     for nombre, ruta in roots.items() if os.path.isdir(ruta)]
+        write_json({"timestamp": time.time(), "estimates": estimates}, args.output, args.indent)
+        return 0
+
+    if args.stream:
+        metrics = ScanMetrics()
+        if args.output in (None, "-"):
+            stream_scan(roots, sys.stdout, metrics, policy)
+        else:
+            with open(args.output, "w", encoding="utf-8") as out:
+                stream_scan(roots, out, metrics, policy)
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
+        return 0
+
+    if args.sorted:
+        metrics = ScanMetrics()
+        with metrics.phase("sort"):
+            sorter = sorted_listing(roots, args.sort_memory * 1024 * 1024, metrics, policy)
+        with sorter:
+            data = {
+                "timestamp": time.time(),
+                "files": len(sorter),
+                "total_size": sorter.total_bytes,
+                "total_human": fmt_size(sorter.total_bytes),
+                "spills": sorter.spills,
+                "page": args.page,
+                "pages": sorter.pages(args.page_size),
+                "results": [rec.to_dict() for rec in sorter.page(args.page, args.page_size)],
+            }
+            if args.export:
+                with metrics.phase("export"):
+                    data["exported"] = sorter.export(args.export)
+            data["metrics"] = metrics.report()
+        if args.export != "-":
+            write_json(data, args.output, args.indent)
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
+        return 0
+
+    query = None
+    if args.query is not None:
+        from gestor_consultas import Query, QueryError
+        try:
+            query = Query(args.query)
+        except QueryError as e:
+            build_parser().error(f"--query: {e}")
+
+    hash_cache = None
+    if args.duplicates or args.hash_cache:
+        from gestor_duplicados import HashCache
+        hash_cache = HashCache(cache_path=args.hash_cache)
+
+    throttle = None
+    if args.throttle:
+        from gestor_ritmo import AdaptiveThrottle
+        throttle = AdaptiveThrottle(rate=args.throttle, target_latency=args.target_latency / 1000)
+    if args.idle:
+        from gestor_ritmo import set_background_priority
+        set_background_priority()
+
+    opts = dict(sniffer=sniffer, classifier=classifier, projects=args.projects,
+                index=index, age=args.age, archives=args.archives, policy=policy,
+                workers=args.workers, throttle=throttle, duplicates=hash_cache,
+                query=query, page=args.page, page_size=args.page_size, image=args.image,
+                compression=args.compression)
+
+    while True:
+        metrics = ScanMetrics()
+        data = run_scan(roots, args.top, metrics, **opts)
+        data["traversal"] = policy.report()
+        if throttle is not None:
+            data["throttle"] = throttle.report()
+        write_json(data, args.output, args.indent)
+        if index is not None:
+            index.save(args.index)
+        if sniffer is not None:
+            sniffer.save()
+        if hash_cache is not None:
+            hash_cache.save()
+        if history is not None:
+            history.record_scan(data)
+        if classifier is not None and args.model and classifier.classes:
+            classifier.save()
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
+        if args.interval <= 0:
+            break
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            break
+
+    # Código 2 si alguna raíz no existe, útil en cron
+    return 0 if all(r["exists"] for r in data["roots"]) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import os
+import heapq
+import zlib
+import struct
+import tarfile
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from gestor_core import get_category
+
+# ------------------ Contenido de archivos comprimidos ------------------
+# Atribuye el contenido descomprimido de .zip/.tar/.gz a categorías sin
+# extraer nada: de un zip solo se lee el directorio central (al final del
+# archivo), de un tar sin comprimir solo las cabeceras (saltando los datos
+# con seek). Un .gz pequeño se descomprime al vuelo sin guardar nada y da
+# el tamaño exacto; de uno grande se usa el campo ISIZE de sus últimos 4
+# bytes. Un tar comprimido no se puede recorrer sin descomprimir, así que
+# se trata como gz.
+# ISIZE es el tamaño original módulo 2**32 y solo del último miembro: si se
+# ve un segundo miembro (p. ej. concatenados con cat) y no se puede leer
+# entero, el tamaño queda como desconocido (size_unknown). Si con la razón
+# máxima de deflate cabe otra vuelta de 4 GiB, el tamaño se marca truncated
+# (cota inferior), igual que un tar que agota el presupuesto de cabeceras.
+
+MAX_TAR_HEADERS = 100_000  # presupuesto de cabeceras por tar
+MAX_DEFLATE_RATIO = 1032   # lo máximo que deflate puede reducir (bloques de ceros)
+GZIP_SCAN_BYTES = 32 << 20  # .gz hasta este tamaño se descomprimen para medirlos
+GZIP_SCAN_OUTPUT = 1 << 30  # ...salvo que den más de esto (bombas de ceros)
+
+
+class ArchiveInfo:
+    __slots__ = ("path", "kind", "members", "uncompressed", "category_sizes",
+                 "largest", "truncated", "size_unknown", "error")
+
+    def __init__(self, path: str, kind: str):
+        self.path = path
+        self.kind = kind
+        self.members = 0
+        self.uncompressed = 0
+        self.category_sizes = defaultdict(int)
+        self.largest = []  # (tamaño, nombre)
+        self.truncated = False
+        self.size_unknown = False
+        self.error = None
+
+    def add_member(self, name: str, size: int, top_n: int):
+        self.members += 1
+        self.uncompressed += size
+        self.category_sizes[get_category(name)] += size
+        if len(self.largest) < top_n:
+            heapq.heappush(self.largest, (size, name))
+        elif size > self.largest[0][0]:
+            heapq.heapreplace(self.largest, (size, name))
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "kind": self.kind,
+            "members": self.members,
+            "uncompressed": self.uncompressed,
+            "categories": dict(self.category_sizes),
+            "largest": [{"name": n, "size": s} for s, n in sorted(self.largest, reverse=True)],
+            "truncated": self.truncated,
+            "size_unknown": self.size_unknown,
+            "error": self.error,
+        }
+
+
+def _inspect_zip(path: str, info: ArchiveInfo, top_n: int):
+    # ZipFile solo lee el registro EOCD y el directorio central; no descomprime
+    with zipfile.ZipFile(path) as zf:
+        for zi in zf.infolist():
+            if not zi.is_dir():
+                info.add_member(zi.filename, zi.file_size, top_n)
+
+
+def _inspect_tar(path: str, info: ArchiveInfo, top_n: int, max_headers: int):
+    # Modo "r:" = sin compresión: TarFile.next() salta los datos con seek
+    with tarfile.open(path, mode="r:") as tf:
+        member = tf.next()
+        n = 0
+        while member is not None:
+            if n >= max_headers:
+                info.truncated = True
+                break
+            if member.isfile():
+                info.add_member(member.name, member.size, top_n)
+            # No acumular TarInfo: con millones de miembros agotaría la memoria
+            tf.members.clear()
+            n += 1
+            member = tf.next()
+
+
+def _scan_gzip(f) -> tuple:
+    """Descomprime descartando la salida, dentro del presupuesto.
+    Devuelve (bytes descomprimidos, miembros completos, si llegó al final)"""
+    f.seek(0)
+    d = zlib.decompressobj(31)
+    seen = members = 0
+    fresh = True        # el miembro actual aún no ha recibido datos
+    pending = b""
+    while True:
+        if not pending:
+            if f.tell() >= GZIP_SCAN_BYTES:
+                return seen, members, False
+            pending = f.read(1 << 20)
+            if not pending:
+                break
+        if fresh:
+            # Relleno de ceros tras el último miembro (lo admite gzip)
+            pending = pending.lstrip(b"\0")
+            if not pending:
+                continue
+            fresh = False
+        seen += len(d.decompress(pending, 1 << 20))
+        pending = d.unconsumed_tail
+        if seen > GZIP_SCAN_OUTPUT:
+            return seen, members, False
+        if d.eof:
+            members += 1
+            pending = d.unused_data
+            d = zlib.decompressobj(31)
+            fresh = True
+    if not fresh:
+        raise EOFError("gzip incompleto")
+    return seen, members, True
+
+
+def _inspect_gzip(path: str, info: ArchiveInfo, top_n: int):
+    with open(path, "rb") as f:
+        if f.read(2) != b"\x1f\x8b":
+            raise ValueError("no es gzip")
+        compressed = f.seek(0, os.SEEK_END)
+        # ISIZE: tamaño original (del último miembro) módulo 2**32 en los últimos 4 bytes
+        f.seek(-4, os.SEEK_END)
+        (isize,) = struct.unpack("<I", f.read(4))
+        seen, members, done = _scan_gzip(f)
+    inner = os.path.basename(path)
+    for suffix in (".tgz", ".gz"):
+        if inner.lower().endswith(suffix):
+            inner = inner[: -len(suffix)] + (".tar" if suffix == ".tgz" else "")
+            break
+    if done:
+        # Leído entero: tamaño exacto, tenga los miembros que tenga
+        info.add_member(inner, seen, top_n)
+        return
+    if members:
+        # Hay más de un miembro y ISIZE solo es del último: no se adivina
+        info.members += 1
+        info.size_unknown = True
+        return
+    # Deflate no agranda más de un ~0.01% (bloques sin comprimir) más las
+    # cabeceras, y lo ya descomprimido es cota inferior: se suman las
+    # vueltas de 2**32 que falten hasta la mayor de las dos
+    floor = max(seen, compressed * 0.99 - 1024)
+    while isize < floor:
+        isize += 1 << 32
+    info.add_member(inner, isize, top_n)
+    # Solo es ambiguo si cabe otra vuelta más sin pasar de la razón máxima
+    info.truncated = isize + (1 << 32) <= compressed * MAX_DEFLATE_RATIO
+
+
+def _sniff_kind(path: str) -> str:
+    """Para los que llegaron a "Comprimidos" por contenido y no por extensión"""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(262)
+    except OSError:
+        return "unsupported"
+    if head[:2] == b"\x1f\x8b":
+        return "gzip"
+    if head[257:262] == b"ustar":
+        return "tar"
+    return "unsupported"
+
+
+def inspect_archive(path: str, top_n: int = 10, max_headers: int = MAX_TAR_HEADERS) -> ArchiveInfo:
+    lower = path.lower()
+    if lower.endswith(".zip") or zipfile.is_zipfile(path):
+        kind = "zip"
+    elif lower.endswith((".gz", ".tgz")):
+        kind = "gzip"
+    elif lower.endswith(".tar"):
+        kind = "tar"
+    else:
+        kind = _sniff_kind(path)
+
+    info = ArchiveInfo(path, kind)
+    try:
+        if kind == "zip":
+            _inspect_zip(path, info, top_n)
+        elif kind == "tar":
+            _inspect_tar(path, info, top_n, max_headers)
+        elif kind == "gzip":
+            _inspect_gzip(path, info, top_n)
+    except (OSError, ValueError, EOFError, zlib.error, zipfile.BadZipFile, tarfile.TarError) as e:
+        info.error = f"{type(e).__name__}: {e}"
+    return info
+
+
+class ArchiveInspector:
+    """Se pasa a scan_directory(archive_inspector=...) para analizar los
+    archivos de la categoría "Comprimidos" al final del recorrido."""
+
+    def __init__(self, top_n: int = 10, max_headers: int = MAX_TAR_HEADERS, max_workers: int = 8):
+        self.top_n = top_n
+        self.max_headers = max_headers
+        self.max_workers = max_workers
+        self.results = {}
+
+    def inspect_many(self, paths):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for info in pool.map(lambda p: inspect_archive(p, self.top_n, self.max_headers), paths):
+                self.results[info.path] = info
+
+    def category_sizes(self) -> dict:
+        total = defaultdict(int)
+        for info in self.results.values():
+            for cat, size in info.category_sizes.items():
+                total[cat] += size
+        return dict(total)
+
+    def largest_members(self, n: int = 20) -> list:
+        every = ((size, name, info.path) for info in self.results.values() for size, name in info.largest)
+        return [{"archive": a, "name": name, "size": size}
+                for size, name, a in heapq.nlargest(n, every)]
+
+    def summary(self) -> dict:
+        return {
+            "archives": len(self.results),
+            "members": sum(i.members for i in self.results.values()),
+            "uncompressed": sum(i.uncompressed for i in self.results.values()),
+            "categories": self.category_sizes(),
+            "largest_members": self.largest_members(),
+            "size_unknown": [p for p, i in self.results.items() if i.size_unknown],
+            "errors": {p: i.error for p, i in self.results.items() if i.error},
+        }
@@ -0,0 +1,370 @@
+import re
+import time
+import heapq
+import fnmatch
+import operator
+
+from gestor_registros import FileRecord, numpy_or_none
+
+# ------------------ Consultas sobre el almacén ------------------
+# Un pequeño lenguaje de filtros que se compila a máscaras booleanas sobre
+# las columnas del FileStore, p. ej.:
+#     category=Videos and size>1GB and age>365d and path~"Downloads"
+# Con NumPy cada comparación es una operación vectorizada sobre todo el
+# array; los filtros de texto trabajan sobre la tabla de carpetas (pocas
+# filas) o buscan directamente en el buffer de nombres. Sin NumPy se evalúa
+# fila a fila con el mismo resultado. NumPy se importa en la primera
+# consulta, no al cargar el módulo (la interfaz lo importa al abrir).
+#
+# Campos: category (cat), size, age / access (días desde modificación /
+# último acceso), mtime / atime (fecha AAAA-MM-DD), name, ext, path, dir.
+# Operadores: = != > >= < <= ~ (contiene) !~ (no contiene); and, or, not,
+# paréntesis. Dos condiciones seguidas sin operador equivalen a "and".
+# En name y ext, "=" admite comodines (*.mkv).
+
+DAY = 86400
+SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "kb": 1024, "m": 1024 ** 2, "mb": 1024 ** 2,
+              "g": 1024 ** 3, "gb": 1024 ** 3, "t": 1024 ** 4, "tb": 1024 ** 4}
+AGE_UNITS = {"": 1, "d": 1, "h": 1 / 24, "w": 7, "m": 30, "y": 365}
+FIELD_ALIASES = {"cat": "category", "categoria": "category", "categoría": "category"}
+FIELDS = {"category", "size", "age", "access", "mtime", "atime", "name", "ext", "path", "dir"}
+ORDER_FIELDS = {"size", "mtime", "atime", "name", "path"}
+
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|(>=|<=|!=|!~|=|~|>|<)|"([^"]*)"|\'([^\']*)\'|([^\s()=<>!~"\']+))')
+_CMP = {"=": operator.eq, "!=": operator.ne, ">": operator.gt, ">=": operator.ge,
+        "<": operator.lt, "<=": operator.le}
+
+
+class QueryError(ValueError):
+    pass
+
+
+# ---- Análisis ----
+def tokenize(text: str) -> list:
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None or m.end() == pos:
+            raise QueryError(f"Carácter inesperado en la posición {pos}: {text[pos:pos + 10]!r}")
+        pos = m.end()
+        lpar, rpar, op, dq, sq, word = m.groups()
+        if lpar:
+            tokens.append(("(", lpar))
+        elif rpar:
+            tokens.append((")", rpar))
+        elif op:
+            tokens.append(("op", op))
+        elif word is not None and word.lower() in ("and", "or", "not"):
+            tokens.append((word.lower(), word))
+        else:
+            tokens.append(("str", dq if dq is not None else sq if sq is not None else word))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self, kind=None):
+        if self.pos >= len(self.tokens):
+            raise QueryError("La consulta termina de forma inesperada")
+        tok = self.tokens[self.pos]
+        if kind is not None and tok[0] != kind:
+            raise QueryError(f"Se esperaba {kind!r} y llegó {tok[1]!r}")
+        self.pos += 1
+        return tok
+
+    def parse(self):
+        node = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise QueryError(f"Sobra {self.tokens[self.pos][1]!r}")
+        return node
+
+    def or_expr(self):
+        node = self.and_expr()
+        while self.peek() == "or":
+            self.take()
+            node = ("or", node, self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.peek() in ("and", "not", "(", "str"):
+            if self.peek() == "and":
+                self.take()
+            node = ("and", node, self.not_expr())
+        return node
+
+    def not_expr(self):
+        if self.peek() == "not":
+            self.take()
+            return ("not", self.not_expr())
+        if self.peek() == "(":
+            self.take()
+            node = self.or_expr()
+            self.take(")")
+            return node
+        field = self.take("str")[1].lower()
+        field = FIELD_ALIASES.get(field, field)
+        if field not in FIELDS:
+            raise QueryError(f"Campo desconocido: {field} (válidos: {', '.join(sorted(FIELDS))})")
+        op = self.take("op")[1]
+        if self.peek() not in ("str", "and", "or", "not"):
+            raise QueryError(f"Falta el valor después de {field}{op}")
+        value = self.take()[1]
+        return ("cmp", field, op, _convert(field, op, value))
+
+
+def parse_size(text: str) -> int:
+    m = re.fullmatch(r"\s*([\d.]+)\s*([a-z]*?)(?:i?b)?\s*", text, re.IGNORECASE)
+    unit = m.group(2).lower() if m else None
+    try:
+        if m is None or unit not in SIZE_UNITS:
+            raise ValueError(text)
+        return int(float(m.group(1)) * SIZE_UNITS[unit])   # "1.2.3" también falla aquí
+    except ValueError:
+        raise QueryError(f"Tamaño no válido: {text!r} (ej.: 500MB, 1.5GB)") from None
+
+
+def parse_age(text: str) -> float:
+    """Días (ej.: 365d, 2y, 6m, 3w, 12h)"""
+    m = re.fullmatch(r"\s*([\d.]+)\s*([a-zA-Z]?)\s*", text)
+    try:
+        if m is None or m.group(2).lower() not in AGE_UNITS:
+            raise ValueError(text)
+        return float(m.group(1)) * AGE_UNITS[m.group(2).lower()]
+    except ValueError:
+        raise QueryError(f"Antigüedad no válida: {text!r} (ej.: 30d, 6m, 2y)") from None
+
+
+def _convert(field: str, op: str, value: str):
+    text_op = op in ("~", "!~")
+    if field in ("size", "age", "access", "mtime", "atime"):
+        if text_op:
+            raise QueryError(f"{field} no admite {op}")
+        if field == "size":
+            return parse_size(value)
+        if field in ("age", "access"):
+            return parse_age(value)
+        try:
+            return time.mktime(time.strptime(value, "%Y-%m-%d"))
+        except ValueError:
+            raise QueryError(f"Fecha no válida: {value!r} (formato AAAA-MM-DD)") from None
+    if op not in ("=", "!=", "~", "!~"):
+        raise QueryError(f"{field} solo admite = != ~ !~")
+    return value
+
+
+# ---- Evaluación ----
+class _Backend:
+    """Operaciones sobre máscaras: arrays de NumPy o listas de bool"""
+
+    def __init__(self, store, now: float):
+        self.store = store
+        self.now = now
+        self.n = len(store)
+        self.np = numpy_or_none()
+        self.vector = self.np is not None
+
+    def column(self, name):
+        col = getattr(self.store, name)
+        if self.vector:
+            np = self.np
+            return np.frombuffer(col, dtype=np.dtype(col.typecode)) if len(col) else np.zeros(0, np.int64)
+        return col
+
+    def compare(self, col, op, value):
+        if self.vector:
+            return _CMP[op](col, value)
+        fn = _CMP[op]
+        return [fn(v, value) for v in col]
+
+    def from_indices(self, indices):
+        if self.vector:
+            np = self.np
+            mask = np.zeros(self.n, dtype=bool)
+            mask[np.asarray(indices, dtype=np.int64)] = True
+            return mask
+        mask = [False] * self.n
+        for i in indices:
+            mask[i] = True
+        return mask
+
+    def from_groups(self, codes_col, allowed: list):
+        """Máscara por fila a partir de una tabla pequeña (carpetas, categorías)"""
+        if self.vector:
+            np = self.np
+            return np.asarray(allowed, dtype=bool)[self.column(codes_col)] if self.n else np.zeros(0, bool)
+        return [allowed[c] for c in getattr(self.store, codes_col)]
+
+    def by_row(self, predicate):
+        if self.vector:
+            return self.np.fromiter((predicate(i) for i in range(self.n)), dtype=bool, count=self.n)
+        return [predicate(i) for i in range(self.n)]
+
+    def logical(self, kind, a, b=None):
+        if self.vector:
+            return ~a if kind == "not" else (a & b if kind == "and" else a | b)
+        if kind == "not":
+            return [not x for x in a]
+        return [x and y for x, y in zip(a, b)] if kind == "and" else [x or y for x, y in zip(a, b)]
+
+
+def _eval(node, be: _Backend):
+    kind = node[0]
+    if kind == "not":
+        return be.logical("not", _eval(node[1], be))
+    if kind in ("and", "or"):
+        return be.logical(kind, _eval(node[1], be), _eval(node[2], be))
+
+    _, field, op, value = node
+    negate = op in ("!=", "!~")
+    store = be.store
+    if field == "size":
+        return be.compare(be.column("sizes"), op, value)
+    if field in ("age", "access"):
+        # age > 365d  <=>  fecha < ahora - 365 días
+        cutoff = be.now - value * DAY
+        flipped = {">": "<", ">=": "<=", "<": ">", "<=": ">=", "=": "=", "!=": "!="}[op]
+        return be.compare(be.column("mtimes" if field == "age" else "atimes"), flipped, cutoff)
+    if field in ("mtime", "atime"):
+        return be.compare(be.column(field + "s"), op, value)
+
+    if field == "category":
+        v = value.lower()
+        if op in ("=", "!="):
+            allowed = [c.lower() == v for c in store.categories]
+        else:
+            allowed = [v in c.lower() for c in store.categories]
+        mask = be.from_groups("cat_codes", allowed or [False])
+    elif field == "dir" or (field == "path" and op in ("~", "!~") and "/" not in value and "\\" not in value):
+        v = value.lower()
+        if op in ("~", "!~"):
+            allowed = [v in d.lower() for d in store.dirs]
+        else:
+            allowed = [fnmatch.fnmatch(d.lower(), v) for d in store.dirs]
+        mask = be.from_groups("dir_ids", allowed or [False])
+        if field == "path":
+            # path~texto: en la carpeta o en el nombre del archivo
+            mask = be.logical("or", mask, be.from_indices(store.find_in_names(value)))
+    elif field in ("name", "ext"):
+        if field == "ext" and not value.startswith("."):
+            value = "." + value
+        if op in ("~", "!~"):
+            mask = be.from_indices(store.find_in_names(value))
+        elif not set("*?[") & set(value):
+            # name=x exacto / ext=.mp4 como sufijo, ambos sobre el buffer de nombres
+            mask = be.from_indices(store.find_in_names(value, suffix=True, whole=field == "name"))
+        else:
+            pattern = value.lower() if field == "name" else "*" + value.lower()
+            mask = be.by_row(lambda i: fnmatch.fnmatchcase(store.name(i).lower(), pattern))
+    else:  # path con separadores: se compara la ruta completa
+        v = value.lower()
+        if op in ("~", "!~"):
+            mask = be.by_row(lambda i: v in store.path(i).lower())
+        else:
+            mask = be.by_row(lambda i: fnmatch.fnmatchcase(store.path(i).lower(), v))
+    return be.logical("not", mask) if negate else mask
+
+
+class Query:
+    def __init__(self, text: str):
+        self.text = text
+        self.ast = _Parser(tokenize(text)).parse() if text.strip() else None
+
+    def mask(self, store, now: float = None):
+        be = _Backend(store, time.time() if now is None else now)
+        if self.ast is None:
+            mask = be.np.ones(be.n, dtype=bool) if be.vector else [True] * be.n
+        else:
+            mask = _eval(self.ast, be)
+        if store.deleted:
+            # Filas ya borradas: siguen en el almacén pero no son resultados
+            mask = be.logical("and", mask, be.logical("not", be.from_indices(sorted(store.deleted))))
+        return mask
+
+    def run(self, store, order: str = "-size", page: int = 0, page_size: int = 50,
+            now: float = None) -> "QueryResult":
+        """Filtra, ordena y devuelve solo la página pedida"""
+        desc = order.startswith("-")
+        key = order.lstrip("-+")
+        if key not in ORDER_FIELDS:
+            raise QueryError(f"No se puede ordenar por {key}")
+        if page < 0:
+            raise QueryError(f"Página no válida: {page} (la primera es la 0)")
+        if page_size < 1:
+            raise QueryError(f"Tamaño de página no válido: {page_size}")
+        mask = self.mask(store, now)
+        start, stop = page * page_size, (page + 1) * page_size
+
+        np = numpy_or_none()
+        if np is not None:
+            idx = np.flatnonzero(mask)
+            count = len(idx)
+            sizes = np.frombuffer(store.sizes, dtype=np.int64) if len(store) else np.zeros(0, np.int64)
+            total_bytes = int(sizes[idx].sum())
+            if key in ("size", "mtime", "atime"):
+                col = np.frombuffer(getattr(store, key + "s"), dtype=np.int64)[idx]
+                if desc:
+                    col = -col
+                # partition: solo se ordena lo necesario para llegar a la página.
+                # Se queda todo lo que empata con el último puesto, y los empates
+                # van por nº de fila: cada página ve el mismo orden total
+                if stop < len(idx):
+                    keep = col <= np.partition(col, stop - 1)[stop - 1]
+                    idx, col = idx[keep], col[keep]
+                page_idx = idx[np.lexsort((idx, col))][start:stop].tolist()
+            else:
+                page_idx = _sorted_page(store, idx.tolist(), key, desc, stop)[start:]
+        else:
+            idx = [i for i, m in enumerate(mask) if m]
+            total_bytes = sum(store.sizes[i] for i in idx)
+            count = len(idx)
+            page_idx = _sorted_page(store, idx, key, desc, stop)[start:]
+        return QueryResult(store, count, total_bytes, [FileRecord(store, i) for i in page_idx],
+                           page, page_size)
+
+
+def _sorted_page(store, idx: list, key: str, desc: bool, stop: int) -> list:
+    # nlargest/nsmallest son estables: con idx ascendente los empates van por nº de fila
+    if key in ("size", "mtime", "atime"):
+        col = getattr(store, key + "s")
+        keyfn = col.__getitem__
+    else:
+        keyfn = store.name if key == "name" else store.path
+    pick = heapq.nlargest if desc else heapq.nsmallest
+    return pick(stop, idx, key=keyfn)
+
+
+class QueryResult:
+    def __init__(self, store, count: int, total_bytes: int, records: list, page: int, page_size: int):
+        self.store = store
+        self.count = count
+        self.total_bytes = total_bytes
+        self.records = records
+        self.page = page
+        self.page_size = page_size
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.count // self.page_size))
+
+    def to_dict(self) -> dict:
+        return {
+            "matches": self.count,
+            "bytes": self.total_bytes,
+            "page": self.page,
+            "pages": self.pages,
+            "results": [{"path": r.path, "size": r.size, "category": r.category, "mtime": r.mtime}
+                        for r in self.records],
+        }
+
+
+def query_store(store, text: str, **kwargs) -> QueryResult:
+    """Atajo: query_store(store, 'size>1GB and ext=.iso', page=0)"""
+    return Query(text).run(store, **kwargs)
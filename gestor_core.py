@@ -0,0 +1,215 @@
+import os
+from collections import defaultdict
+from gestor_registros import FileStore, DirSummary
+from gestor_metricas import ScanMetrics
+from gestor_origenes import LOCAL
+
+# Núcleo sin interfaz: solo biblioteca estándar, para que la CLI y los
+# escaneos programados arranquen en milisegundos (sin tkinter ni matplotlib).
+
+# ------------------ Config categorías ------------------
+CATEGORIES = {
+    "Videos": {".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".mpeg", ".mpg"},
+    "Música": {".mp3", ".wav", ".flac", ".aac", ".m4a", ".ogg", ".wma"},
+    "Imágenes": {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp", ".heic"},
+    "Documentos": {".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".txt", ".csv", ".md"},
+    "Comprimidos": {".zip", ".rar", ".7z", ".tar", ".gz"},
+    "Instaladores": {".exe", ".msi", ".apk", ".dmg", ".pkg"},
+}
+
+def get_category(filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    for cat, exts in CATEGORIES.items():
+        if ext in exts:
+            return cat
+    return "Otros"
+
+def fmt_size(bytes_: int) -> str:
+    units = ["B", "KB", "MB", "GB", "TB"]
+    size = float(bytes_)
+    for u in units:
+        if size < 1024 or u == units[-1]:
+            return f"{size:.2f} {u}"
+        size /= 1024.0
+
+def safe_getsize(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except (FileNotFoundError, PermissionError, OSError):
+        return 0
+
+def stat_key(path: str, st) -> str:
+    """Clave de caché estable mientras el archivo no cambie"""
+    # Sin número de inodo (algunos sistemas devuelven 0) se usa la ruta
+    ident = f"{st.st_dev}:{st.st_ino}" if st.st_ino else path
+    return f"{ident}:{st.st_mtime_ns}"
+
+def iter_scan(base_path: str, store: FileStore = None, metrics: ScanMetrics = None,
+              size_stats=None, policy=None, otros: list = None, throttle=None, file_sink=None,
+              backend=None):
+    """Recorre base_path y entrega un DirSummary por carpeta en cuanto la lee.
+
+    Es perezoso: nada se lee hasta que se pide la siguiente carpeta. Sin
+    `store` no se guarda ninguna fila por archivo, así que una cadena de
+    generadores puede procesar árboles enormes con memoria constante. Si se
+    pasa la lista `otros` (necesita `store`), se le añade (índice, ruta,
+    stat_key) de cada archivo no vacío de categoría "Otros", que es lo que
+    reclasifican sniffer y classifier. Con `throttle`
+    (gestor_ritmo.AdaptiveThrottle) cada lectura de carpeta y cada stat
+    esperan su turno. A `file_sink` (gestor_ordenacion.ExternalSizeSort) se
+    le pasa cada archivo con file_sink.add(carpeta, nombre, tamaño, mtime, categoría).
+    `backend` (gestor_origenes) es de dónde se listan carpetas y se hace
+    stat; por defecto el disco local.
+    """
+    if metrics is None:
+        metrics = ScanMetrics()
+
+    def on_walk_error(e):
+        metrics.record_error(e, "listdir")
+
+    if policy is not None:
+        policy.start(base_path)
+
+    fs = LOCAL if backend is None else backend
+    stat_many = fs.stat_many
+    walk_next = next
+    if throttle is not None:
+        # Un lote de stat cuenta como una operación por archivo
+        stat_many = throttle.wrap(fs.stat_many, cost=lambda dirpath, names: len(names))
+        walk_next = throttle.wrap(next)
+    walker = fs.walk(base_path, onerror=on_walk_error)
+    while True:
+        with metrics.phase("walk"):
+            entry = walk_next(walker, None)
+        if entry is None:
+            break
+        dirpath, dirnames, filenames = entry
+        if policy is not None:
+            if policy.exhausted():
+                break
+            filenames = policy.filter(dirpath, dirnames, filenames)
+        summary = DirSummary(dirpath, store.add_dir(dirpath) if store is not None else None)
+        metrics.dirs += 1
+
+        # Un solo stat por archivo: tamaño y fechas de modificación y acceso
+        with metrics.phase("stat"):
+            stats = stat_many(dirpath, filenames)
+            for i, st in enumerate(stats):
+                if isinstance(st, OSError):
+                    metrics.record_error(st, "stat")
+                    summary.errors += 1
+                    stats[i] = None
+        metrics.stat_calls += len(filenames)
+
+        with metrics.phase("categorize"):
+            cats = summary.categories
+            for name, st in zip(filenames, stats):
+                size, mtime, atime = (st.st_size, int(st.st_mtime), int(st.st_atime)) if st else (0, 0, 0)
+                cat = get_category(name)
+                if cat == "Otros" and otros is not None and st is not None and size:
+                    fp = os.path.join(dirpath, name)
+                    otros.append((len(store), fp, stat_key(fp, st)))
+                cats[cat] = cats.get(cat, 0) + size
+                if size_stats is not None and st is not None:
+                    size_stats.add(cat, size)
+                if store is not None:
+                    store.append(summary.dir_id, name, size, mtime, cat, atime)
+                if file_sink is not None:
+                    file_sink.add(dirpath, name, size, mtime, cat)
+        summary.files = len(filenames)
+        summary.bytes = sum(cats.values())
+        metrics.files += len(filenames)
+        yield summary
+
+def scan_directory(base_path: str, top_n_files: int = 20, store: FileStore = None,
+                   metrics: ScanMetrics = None, sniffer=None, classifier=None, size_stats=None,
+                   archive_inspector=None, policy=None, throttle=None, backend=None,
+                   suggestions: list = None):
+    """Recorre base_path guardando cada archivo en un FileStore compacto.
+
+    Si se pasa `store` se rellena ese almacén para poder consultarlo después.
+    Si se pasa `metrics` se acumulan en él los tiempos por fase y los errores.
+    Si se pasa `sniffer` (gestor_firmas.ContentSniffer) los archivos "Otros"
+    se reclasifican por su contenido al final del recorrido, y si se pasa
+    `classifier` (gestor_ia.SmartClassifier) y una lista `suggestions`, a esta
+    se añade (fila, categoría, acierto esperado) de los que sigan en "Otros":
+    son sugerencias, no cambian las categorías ni los totales. Con `size_stats`
+    (gestor_histograma.SizeStats) se acumula la distribución de tamaños, y con
+    `archive_inspector` (gestor_comprimidos.ArchiveInspector) se lee el índice
+    interno de los "Comprimidos" sin extraerlos. `policy`
+    (gestor_recorrido.TraversalPolicy) decide qué carpetas se podan y cuándo
+    se agota el presupuesto de la raíz, y `throttle` limita el ritmo de E/S.
+    Con un `backend` que no es el disco local (imagen .tar/.zip, árbol en
+    memoria) se omiten las fases que leen contenido: sniffer y comprimidos.
+    """
+    if backend is not None and not backend.local:
+        sniffer = archive_inspector = None
+    if store is None:
+        store = FileStore()
+    if metrics is None:
+        metrics = ScanMetrics()
+    category_sizes = defaultdict(int)
+    errors = 0
+    first_index = len(store)
+    if suggestions is None:
+        classifier = None
+    otros = [] if sniffer is not None or classifier is not None else None
+
+    with metrics.root(base_path):
+        for summary in iter_scan(base_path, store, metrics, size_stats, policy, otros, throttle,
+                                 backend=backend):
+            for cat, size in summary.categories.items():
+                category_sizes[cat] += size
+            errors += summary.errors
+
+        def recategorize(idx, cat):
+            size = store.sizes[idx]
+            category_sizes["Otros"] -= size
+            category_sizes[cat] += size
+            if size_stats is not None:
+                size_stats.move(size, "Otros", cat)
+            store.set_category(idx, cat)
+
+        if sniffer is not None and otros:
+            with metrics.phase("sniff"):
+                cats = sniffer.classify_batch([(fp, key) for _, fp, key in otros])
+                for (idx, _, _), cat in zip(otros, cats):
+                    if cat != "Otros":
+                        recategorize(idx, cat)
+                otros = [o for o, cat in zip(otros, cats) if cat == "Otros"]
+
+        if classifier is not None and otros:
+            with metrics.phase("classify"):
+                # Sin modelo guardado se entrena con lo que ya tiene categoría
+                if not classifier.ensure_loaded():
+                    classifier.fit_store(store)
+                preds = classifier.classify_store(store, [idx for idx, _, _ in otros],
+                                                  [key for _, _, key in otros])
+                suggestions.extend((idx, pred[0], pred[1])
+                                   for (idx, _, _), pred in zip(otros, preds) if pred is not None)
+
+        if archive_inspector is not None and "Comprimidos" in store.categories:
+            with metrics.phase("archives"):
+                code = store.category_code("Comprimidos")
+                archive_inspector.inspect_many(
+                    [store.path(i) for i in range(first_index, len(store)) if store.cat_codes[i] == code])
+
+        with metrics.phase("sort"):
+            top_files = store.top_n(top_n_files)
+        total_size = sum(category_sizes.values())
+    metrics.bytes += total_size
+
+    return total_size, top_files, category_sizes, errors
+
+def default_target_folders(base_user: str = None) -> dict:
+    """Carpetas personales habituales, sin depender de os.getlogin() ni de C:\\Users"""
+    if base_user is None:
+        base_user = os.path.expanduser("~")
+    return {
+        "Descargas": os.path.join(base_user, "Downloads"),
+        "Imágenes": os.path.join(base_user, "Pictures"),
+        "Escritorio": os.path.join(base_user, "Desktop"),
+        "Documentos": os.path.join(base_user, "Documents"),
+        "Música": os.path.join(base_user, "Music"),
+        "Videos": os.path.join(base_user, "Videos"),
+    }
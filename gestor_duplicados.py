@@ -0,0 +1,270 @@
+import os
+import json
+import hashlib
+import itertools
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------ Carpetas duplicadas (huellas tipo Merkle) ------------------
+# La deduplicación por archivo no ve el caso más habitual: carpetas enteras
+# copiadas ("Fotos 2019 (copia)"). Cada carpeta recibe una huella calculada
+# de abajo arriba a partir de las huellas ordenadas de sus hijos:
+#   archivo    -> (nombre, tamaño, hash del contenido o solo tamaño)
+#   subcarpeta -> (nombre, huella de la subcarpeta)
+# El nombre de la propia carpeta no entra, así que la copia renombrada
+# coincide con el original. Primero se calculan las huellas baratas (solo
+# nombre y tamaño) y el contenido se lee únicamente donde chocan: archivos
+# de carpetas con la misma huella barata y archivos con el mismo nombre y
+# tamaño en otra carpeta. De esos se hashean los primeros 64 KB y solo los
+# que además coinciden en eso se leen enteros; todo en caché por
+# (ruta, tamaño, mtime). Luego se rehacen las huellas con el contenido.
+# Todo es lineal en el número de entradas: el almacén guarda las carpetas en
+# el orden de os.walk (padre antes que hijos), así que recorrerlas al revés
+# ya es un orden de abajo arriba.
+
+HASH_CHUNK = 1024 * 1024
+HEAD_BYTES = 64 * 1024  # hash parcial que descarta la mayoría antes de leer entero
+NEAR_MAX_POSTING = 64   # huellas de hijo más comunes que esto no generan candidatos
+
+
+def _digest(*parts) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode("utf-8", "surrogateescape"))
+        h.update(b"\0")
+    return h.digest()
+
+
+def hash_file(path: str, limit: int = None) -> str:
+    """Hash del contenido, o solo de los primeros `limit` bytes"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        if limit is not None:
+            h.update(f.read(limit))
+        else:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class HashCache:
+    """Hashes de contenido persistidos en JSON; la clave cambia si el archivo cambia"""
+
+    def __init__(self, cache_path: str = None, max_workers: int = 8):
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.cache = {}
+        self.hits = 0
+        self.reads = 0
+        if cache_path:
+            self.load()
+
+    def hash_many(self, items, limit: int = None) -> list:
+        """items: lista de (ruta, tamaño, mtime). Devuelve un hash (o None) por
+        item, del contenido entero o de sus primeros `limit` bytes."""
+        out = [None] * len(items)
+        pending = []
+        suffix = "" if limit is None else f":{limit}"
+        for i, (path, size, mtime) in enumerate(items):
+            cached = self.cache.get(f"{path}:{size}:{mtime}{suffix}")
+            if cached is not None:
+                out[i] = cached
+                self.hits += 1
+            else:
+                pending.append(i)
+
+        def work(i):
+            try:
+                return hash_file(items[i][0], limit)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for i, digest in zip(pending, pool.map(work, pending)):
+                self.reads += 1
+                out[i] = digest
+                if digest is not None:
+                    path, size, mtime = items[i]
+                    self.cache[f"{path}:{size}:{mtime}{suffix}"] = digest
+        return out
+
+    def load(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save(self):
+        if not self.cache_path:
+            return
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f)
+        os.replace(tmp, self.cache_path)
+
+
+class FolderDigests:
+    """Huella, bytes y nº de archivos de cada carpeta del almacén (por dir_id)"""
+
+    def __init__(self, store, hash_cache: HashCache = None, content: bool = True):
+        self.store = store
+        # normpath: una raíz pasada como "/datos/" deja "/datos/" en la tabla
+        # pero sus hijas son "/datos/x", cuyo dirname es "/datos"
+        norm = [os.path.normpath(d) for d in store.dirs]
+        dir_index = {d: i for i, d in enumerate(norm)}
+        self.parent = [dir_index.get(os.path.dirname(d), -1) for d in norm]
+        # Un dir_id nunca es su propio padre (la raíz "/" es su propio dirname)
+        self.parent = [p if p != i else -1 for i, p in enumerate(self.parent)]
+
+        self._build({})
+        if content:
+            content_hash = self._content_hashes(hash_cache or HashCache())
+            if content_hash:
+                self._build(content_hash)
+
+    def _content_hashes(self, cache: HashCache) -> dict:
+        """Fila -> clave de contenido, solo para los archivos donde chocan las
+        huellas baratas"""
+        store = self.store
+        sizes = store.sizes
+        # Las subcarpetas de dos carpetas con la misma huella también chocan
+        # entre sí, así que basta mirar la carpeta directa de cada archivo
+        repeated = Counter(dg for d, dg in enumerate(self.digest) if self.bytes[d])
+        colliding = [repeated[dg] > 1 for dg in self.digest]
+        same_name = Counter((store.name(i), sizes[i]) for i in range(len(store)) if sizes[i])
+        want = [i for i in range(len(store)) if sizes[i]
+                and (colliding[store.dir_ids[i]] or same_name[(store.name(i), sizes[i])] > 1)]
+        items = [(store.path(i), sizes[i], store.mtimes[i]) for i in want]
+
+        # Cabecera primero: si (tamaño, cabecera) no se repite no hay copia
+        heads = cache.hash_many(items, HEAD_BYTES)
+        twins = Counter((sizes[i], h) for i, h in zip(want, heads) if h is not None)
+        full = [j for j, (i, h) in enumerate(zip(want, heads))
+                if h is not None and sizes[i] > HEAD_BYTES and twins[(sizes[i], h)] > 1]
+        keys = {i: f"h:{h}" for i, h in zip(want, heads) if h is not None}
+        for j, digest in zip(full, cache.hash_many([items[j] for j in full])):
+            keys[want[j]] = f"c:{digest}" if digest is not None else ""
+        return keys
+
+    def _build(self, content_hash: dict):
+        store = self.store
+        sizes = store.sizes
+        n_dirs = len(store.dirs)
+        # Hijos de cada carpeta: (huella, bytes, nombre, dir_id de la subcarpeta o -1)
+        self.children = [[] for _ in range(n_dirs)]
+        self.bytes = [0] * n_dirs
+        self.files = [0] * n_dirs
+        for i in range(len(store)):
+            d = store.dir_ids[i]
+            size, name = sizes[i], store.name(i)
+            self.children[d].append((_digest("f", name, size, content_hash.get(i, "")), size, name, -1))
+            self.bytes[d] += size
+            self.files[d] += 1
+
+        self.digest = [b""] * n_dirs
+        for d in range(n_dirs - 1, -1, -1):
+            self.digest[d] = _digest(*sorted(c[0] for c in self.children[d]))
+            p = self.parent[d]
+            if p >= 0:
+                name = os.path.basename(store.dirs[d])
+                self.children[p].append((_digest("d", name, self.digest[d].hex()), self.bytes[d], name, d))
+                self.bytes[p] += self.bytes[d]
+                self.files[p] += self.files[d]
+
+    def common_bytes(self, a: int, b: int) -> int:
+        """Bytes que a y b tienen en común, emparejando hijos por nombre y
+        bajando solo por las subcarpetas homónimas que difieren"""
+        if self.digest[a] == self.digest[b]:
+            return self.bytes[a]
+        by_name = {(c[2], c[3] >= 0): c for c in self.children[b]}
+        common = 0
+        for digest, size, name, sub in self.children[a]:
+            other = by_name.get((name, sub >= 0))
+            if other is None:
+                continue
+            if other[0] == digest:
+                common += size
+            elif sub >= 0:
+                common += self.common_bytes(sub, other[3])
+        return common
+
+
+def _is_ancestor(parent: list, a: int, b: int) -> bool:
+    while b >= 0:
+        if b == a:
+            return True
+        b = parent[b]
+    return False
+
+
+def find_duplicate_folders(store, hash_cache: HashCache = None, content: bool = True,
+                           min_bytes: int = 1024 * 1024, near_threshold: float = 0.8,
+                           limit: int = 50) -> dict:
+    """{"identical": [...], "near": [...]} ordenados por bytes recuperables.
+
+    Idénticas: misma huella (las subcarpetas de una copia ya informada no se
+    repiten salvo que tengan copias propias). Casi idénticas: comparten al menos
+    `near_threshold` de sus bytes, emparejando hijos por nombre."""
+    fd = FolderDigests(store, hash_cache, content)
+    dirs = store.dirs
+
+    groups = defaultdict(list)
+    for d, dg in enumerate(fd.digest):
+        if fd.bytes[d] >= min_bytes:
+            groups[dg].append(d)
+
+    identical = []
+    for dg, members in groups.items():
+        if len(members) < 2:
+            continue
+        # Las copias que cuelgan de carpetas que ya son copias entre sí se
+        # cuentan una sola vez por cada copia del padre
+        per_parent = Counter(fd.digest[fd.parent[m]] if fd.parent[m] >= 0 else None for m in members)
+        effective = 0
+        for pdg, n in per_parent.items():
+            copies = len(groups.get(pdg, ())) if pdg is not None else 0
+            effective += n // copies if copies >= 2 else n
+        if effective < 2:
+            continue
+        identical.append({
+            "folders": [dirs[m] for m in members],
+            "bytes": fd.bytes[members[0]],
+            "files": fd.files[members[0]],
+            "reclaimable": fd.bytes[members[0]] * (effective - 1),
+        })
+    identical.sort(key=lambda g: g["reclaimable"], reverse=True)
+
+    # Casi idénticas: una carpeta representante por huella; los candidatos
+    # salen de un índice invertido huella de hijo -> carpetas que la contienen
+    postings = defaultdict(list)
+    for members in groups.values():
+        d = members[0]
+        for child, size, _, _ in fd.children[d]:
+            if size:
+                postings[child].append(d)
+    candidates = set()
+    for entries in postings.values():
+        if 2 <= len(entries) <= NEAR_MAX_POSTING:
+            candidates.update(itertools.combinations(sorted(entries), 2))
+    near, similar = [], set()
+    for a, b in sorted(candidates):
+        if _is_ancestor(fd.parent, a, b) or _is_ancestor(fd.parent, b, a):
+            continue
+        common = fd.common_bytes(a, b)
+        similarity = common / max(fd.bytes[a], fd.bytes[b])
+        if similarity < near_threshold:
+            continue
+        # Si los padres ya se parecen entre sí, basta con informar de ellos
+        pa, pb = fd.parent[a], fd.parent[b]
+        if pa >= 0 and pb >= 0 and frozenset((fd.digest[pa], fd.digest[pb])) in similar:
+            continue
+        similar.add(frozenset((fd.digest[a], fd.digest[b])))
+        near.append({
+            "folders": [dirs[a], dirs[b]],
+            "bytes": [fd.bytes[a], fd.bytes[b]],
+            "similarity": round(similarity, 4),
+            "reclaimable": common,
+        })
+    near.sort(key=lambda g: g["reclaimable"], reverse=True)
+    return {"identical": identical[:limit], "near": near[:limit]}
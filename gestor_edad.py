@@ -0,0 +1,104 @@
+import os
+import time
+from bisect import bisect_right
+
+from gestor_registros import numpy_or_none
+
+# ------------------ Antigüedad de los datos ------------------
+# Histogramas de bytes por tramo de antigüedad (por categoría o por
+# subcarpeta) calculados sobre las columnas del FileStore, sin volver a
+# recorrer el disco. Con NumPy es una sola pasada vectorizada (bincount).
+# NumPy se importa al primer cálculo: la interfaz carga este módulo al abrir
+# y su importación duplicaría el arranque.
+# Ojo: con montajes noatime/relatime la fecha de acceso es aproximada.
+
+DAY = 86400
+# Límites (en días) de cada tramo; el último tramo es "más de 5 años"
+AGE_BUCKETS_DAYS = [30, 90, 365, 730, 1825]
+AGE_LABELS = ["< 1 mes", "1-3 meses", "3-12 meses", "1-2 años", "2-5 años", "> 5 años"]
+
+
+def _columns(store, field: str):
+    if field not in ("mtime", "atime"):
+        raise ValueError(f"Campo de fecha desconocido: {field}")
+    return store.sizes, store.mtimes if field == "mtime" else store.atimes
+
+
+def folder_groups(store, root: str, depth: int = 1) -> tuple:
+    """Asigna cada carpeta del almacén a su subcarpeta de primer nivel bajo root.
+    Devuelve (nombres de grupo, grupo por dir_id)."""
+    names, index, dir_group = [], {}, []
+    root = os.path.normpath(root)
+    for d in store.dirs:
+        rel = os.path.relpath(d, root)
+        parts = [] if rel == os.curdir else rel.split(os.sep)
+        key = os.sep.join(parts[:depth]) if parts else "."
+        g = index.get(key)
+        if g is None:
+            g = index[key] = len(names)
+            names.append(key)
+        dir_group.append(g)
+    return names, dir_group
+
+
+def age_histogram(store, by: str = "category", field: str = "mtime", root: str = None,
+                  now: float = None) -> dict:
+    """{grupo: [bytes por tramo]} agrupando por "category" o por "folder"."""
+    now = time.time() if now is None else now
+    sizes, times = _columns(store, field)
+    nb = len(AGE_LABELS)
+
+    if by == "category":
+        groups, codes = store.categories, store.cat_codes
+        group_of = None
+    elif by == "folder":
+        groups, dir_group = folder_groups(store, root or (store.dirs[0] if store.dirs else ""))
+        codes, group_of = store.dir_ids, dir_group
+    else:
+        raise ValueError(f"Agrupación desconocida: {by}")
+
+    if not len(sizes):
+        return {}
+
+    np = numpy_or_none()
+    if np is not None:
+        s = np.frombuffer(sizes, dtype=np.int64)
+        t = np.frombuffer(times, dtype=np.int64)
+        g = np.frombuffer(codes, dtype=np.dtype(codes.typecode))
+        if group_of is not None:
+            g = np.asarray(group_of, dtype=np.int64)[g]
+        age_days = (now - t) / DAY
+        bucket = np.searchsorted(np.asarray(AGE_BUCKETS_DAYS, dtype=float), age_days, side="right")
+        flat = np.bincount(g.astype(np.int64) * nb + bucket, weights=s, minlength=len(groups) * nb)
+        table = flat.reshape(len(groups), nb).astype(np.int64).tolist()
+    else:
+        table = [[0] * nb for _ in groups]
+        for i in range(len(sizes)):
+            grp = codes[i] if group_of is None else group_of[codes[i]]
+            table[grp][bisect_right(AGE_BUCKETS_DAYS, (now - times[i]) / DAY)] += sizes[i]
+
+    return {name: row for name, row in zip(groups, table) if any(row)}
+
+
+def bytes_older_than(store, days: float, category: str = None, field: str = "atime",
+                     now: float = None) -> int:
+    """Ej.: bytes_older_than(store, 730, "Videos") -> bytes de vídeo sin tocar en 2 años"""
+    now = time.time() if now is None else now
+    sizes, times = _columns(store, field)
+    cutoff = now - days * DAY
+    code = None
+    if category is not None:
+        if category not in store.categories:
+            return 0
+        code = store.categories.index(category)
+
+    np = numpy_or_none()
+    if np is not None:
+        s = np.frombuffer(sizes, dtype=np.int64)
+        mask = np.frombuffer(times, dtype=np.int64) < cutoff
+        if code is not None:
+            mask &= np.frombuffer(store.cat_codes, dtype=np.int8) == code
+        return int(s[mask].sum())
+
+    return sum(sizes[i] for i in range(len(sizes))
+               if times[i] < cutoff and (code is None or store.cat_codes[i] == code))
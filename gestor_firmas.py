@@ -0,0 +1,150 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------ Clasificación por contenido (magic bytes) ------------------
+# get_category solo mira la extensión; los archivos que acaban en "Otros"
+# (sin extensión, .bin, mal renombrados) se reclasifican leyendo solo su
+# cabecera. Las firmas se compilan una vez en un trie de prefijos por offset
+# y el veredicto se cachea por (dispositivo, inodo, mtime).
+
+# (categoría, [(offset, bytes), ...]) — todas las partes deben coincidir
+SIGNATURES = [
+    ("Imágenes", [(0, b"\xff\xd8\xff")]),
+    ("Imágenes", [(0, b"\x89PNG\r\n\x1a\n")]),
+    ("Imágenes", [(0, b"GIF87a")]),
+    ("Imágenes", [(0, b"GIF89a")]),
+    ("Imágenes", [(0, b"II*\x00")]),
+    ("Imágenes", [(0, b"MM\x00*")]),
+    ("Imágenes", [(0, b"BM")]),
+    ("Imágenes", [(0, b"RIFF"), (8, b"WEBP")]),
+    ("Imágenes", [(4, b"ftypheic")]),
+    ("Imágenes", [(4, b"ftypheix")]),
+    ("Imágenes", [(4, b"ftypmif1")]),
+    ("Videos", [(4, b"ftyp")]),
+    ("Videos", [(0, b"\x1a\x45\xdf\xa3")]),
+    ("Videos", [(0, b"RIFF"), (8, b"AVI ")]),
+    ("Videos", [(0, b"\x00\x00\x01\xba")]),
+    ("Videos", [(0, b"\x00\x00\x01\xb3")]),
+    ("Videos", [(0, b"FLV\x01")]),
+    ("Videos", [(0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11")]),
+    ("Música", [(4, b"ftypM4A")]),
+    ("Música", [(0, b"ID3")]),
+    ("Música", [(0, b"fLaC")]),
+    ("Música", [(0, b"OggS")]),
+    ("Música", [(0, b"RIFF"), (8, b"WAVE")]),
+    ("Música", [(0, b"\xff\xfb")]),
+    ("Música", [(0, b"\xff\xf3")]),
+    ("Documentos", [(0, b"%PDF-")]),
+    ("Documentos", [(0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")]),
+    ("Documentos", [(0, b"{\\rtf")]),
+    ("Comprimidos", [(0, b"PK\x03\x04")]),
+    ("Comprimidos", [(0, b"PK\x05\x06")]),
+    ("Comprimidos", [(0, b"Rar!\x1a\x07")]),
+    ("Comprimidos", [(0, b"7z\xbc\xaf\x27\x1c")]),
+    ("Comprimidos", [(0, b"\x1f\x8b")]),
+    ("Comprimidos", [(0, b"BZh")]),
+    ("Comprimidos", [(0, b"\xfd7zXZ\x00")]),
+    ("Comprimidos", [(0, b"\x28\xb5\x2f\xfd")]),
+    ("Comprimidos", [(257, b"ustar")]),
+    ("Instaladores", [(0, b"MZ")]),
+    ("Instaladores", [(0, b"xar!")]),
+]
+
+DEFAULT_HEAD_BYTES = 4096
+_TERMINAL = None  # clave reservada del trie para las firmas que acaban en ese nodo
+
+
+class SignatureTrie:
+    """Un trie de bytes por cada offset de anclaje. Cada nodo terminal guarda
+    las firmas cuya primera parte termina ahí (y las partes extra a verificar)."""
+
+    def __init__(self, signatures=SIGNATURES):
+        self.roots = {}
+        self.min_head = 0
+        for category, parts in signatures:
+            (offset, anchor), extra = parts[0], parts[1:]
+            node = self.roots.setdefault(offset, {})
+            for b in anchor:
+                node = node.setdefault(b, {})
+            node.setdefault(_TERMINAL, []).append((category, extra))
+            self.min_head = max(self.min_head, *(o + len(p) for o, p in parts))
+
+    def match(self, head: bytes):
+        best, best_len = None, 0
+        for offset, node in self.roots.items():
+            depth = 0
+            for b in head[offset:]:
+                node = node.get(b)
+                if node is None:
+                    break
+                depth += 1
+                # Se prefiere la coincidencia más larga (ftypM4A antes que ftyp)
+                if _TERMINAL in node and depth > best_len:
+                    for category, extra in node[_TERMINAL]:
+                        if all(head[o:o + len(p)] == p for o, p in extra):
+                            best, best_len = category, depth + sum(len(p) for _, p in extra)
+                            break
+        return best
+
+
+def read_head(path: str, nbytes: int):
+    try:
+        with open(path, "rb") as f:
+            return f.read(nbytes)
+    except OSError:
+        return None
+
+
+class ContentSniffer:
+    def __init__(self, head_bytes: int = DEFAULT_HEAD_BYTES, max_workers: int = None,
+                 cache_path: str = None, trie: SignatureTrie = None):
+        self.trie = trie or SignatureTrie()
+        # Nunca menos de lo necesario para la firma más lejana (tar: 262 bytes)
+        self.head_bytes = max(head_bytes, self.trie.min_head)
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.cache_path = cache_path
+        self.cache = {}
+        self.hits = 0
+        self.reads = 0
+        if cache_path:
+            self.load()
+
+    def classify_batch(self, items, default: str = "Otros") -> list:
+        """items: lista de (ruta, clave_cache). Devuelve una categoría por item."""
+        result = [None] * len(items)
+        pending = []
+        for i, (path, key) in enumerate(items):
+            cat = self.cache.get(key)
+            if cat is None:
+                pending.append(i)
+            else:
+                result[i] = cat
+                self.hits += 1
+
+        if pending:
+            paths = [items[i][0] for i in pending]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                heads = pool.map(read_head, paths, [self.head_bytes] * len(paths))
+                for i, head in zip(pending, heads):
+                    cat = (self.trie.match(head) if head else None) or default
+                    result[i] = cat
+                    if head is not None:
+                        self.cache[items[i][1]] = cat
+            self.reads += len(pending)
+        return result
+
+    def load(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save(self):
+        if not self.cache_path:
+            return
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, ensure_ascii=False)
+        os.replace(tmp, self.cache_path)
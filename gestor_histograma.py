@@ -0,0 +1,189 @@
+from array import array
+
+# ------------------ Distribución de tamaños (streaming) ------------------
+# Histograma logarítmico de tamaño fijo: cada potencia de 2 se parte en
+# SUB tramos, así la memoria es constante (~4 KB por categoría) y los
+# percentiles tienen un error relativo máximo de 1/SUB. Dos histogramas se
+# combinan sumando sus contadores, lo que permite repartir el trabajo entre
+# hilos, procesos o raíces distintas.
+
+SUB = 8
+N_BUCKETS = 1 + 64 * SUB
+SMALL_FILE = 4096  # por debajo de un bloque típico se desperdicia espacio
+# (los archivos vacíos no ocupan bloques de datos: no cuentan como pequeños)
+
+# Tramos que se muestran en el gráfico de barras (límite superior en bytes)
+DISPLAY_RANGES = [
+    ("< 4 KB", 4 * 1024),
+    ("4-64 KB", 64 * 1024),
+    ("64 KB-1 MB", 1024 ** 2),
+    ("1-16 MB", 16 * 1024 ** 2),
+    ("16-256 MB", 256 * 1024 ** 2),
+    ("256 MB-4 GB", 4 * 1024 ** 3),
+    ("> 4 GB", None),
+]
+
+
+def bucket_of(size: int) -> int:
+    if size <= 0:
+        return 0
+    e = size.bit_length() - 1
+    return 1 + e * SUB + (((size - (1 << e)) * SUB) >> e)
+
+
+def bucket_bounds(b: int) -> tuple:
+    if b == 0:
+        return 0.0, 0.0
+    e, sub = divmod(b - 1, SUB)
+    width = (1 << e) / SUB
+    low = (1 << e) + sub * width
+    return low, low + width
+
+
+class LogHistogram:
+    __slots__ = ("counts", "count", "total", "min", "max", "small", "small_waste")
+
+    def __init__(self):
+        self.counts = array("q", bytes(8 * N_BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.small = 0
+        self.small_waste = 0
+
+    def add(self, size: int):
+        self.counts[bucket_of(size)] += 1
+        self.count += 1
+        self.total += size
+        if self.min is None or size < self.min:
+            self.min = size
+        if self.max is None or size > self.max:
+            self.max = size
+        if 0 < size < SMALL_FILE:
+            self.small += 1
+            self.small_waste += SMALL_FILE - size
+
+    def discard(self, size: int):
+        """Quita un valor ya añadido (min/max quedan como cotas)"""
+        self.counts[bucket_of(size)] -= 1
+        self.count -= 1
+        self.total -= size
+        if 0 < size < SMALL_FILE:
+            self.small -= 1
+            self.small_waste -= SMALL_FILE - size
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        self.small += other.small
+        self.small_waste += other.small_waste
+        return self
+
+    def quantile(self, q: float) -> float:
+        if self.count <= 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for b, n in enumerate(self.counts):
+            if n and seen + n > rank:
+                low, high = bucket_bounds(b)
+                value = low + (high - low) * ((rank - seen + 0.5) / n)
+                return float(min(max(value, self.min), self.max))
+            seen += n
+        return float(self.max)
+
+    def display_counts(self) -> list:
+        """Nº de archivos en cada tramo de DISPLAY_RANGES"""
+        out = [0] * len(DISPLAY_RANGES)
+        j = 0
+        for b, n in enumerate(self.counts):
+            if not n:
+                continue
+            low, _ = bucket_bounds(b)
+            while DISPLAY_RANGES[j][1] is not None and low >= DISPLAY_RANGES[j][1]:
+                j += 1
+            out[j] += n
+        return out
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min or 0,
+            "max": self.max or 0,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p99": self.quantile(0.99),
+            "small_files": self.small,
+            "small_waste": self.small_waste,
+        }
+
+    # Formato binario compacto para enviar entre procesos
+    def to_bytes(self) -> bytes:
+        head = array("q", [self.count, self.total, -1 if self.min is None else self.min,
+                           -1 if self.max is None else self.max, self.small, self.small_waste])
+        return head.tobytes() + self.counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LogHistogram":
+        h = cls()
+        head = array("q")
+        head.frombytes(data[:48])
+        h.count, h.total, mn, mx, h.small, h.small_waste = head
+        h.min = None if mn < 0 else mn
+        h.max = None if mx < 0 else mx
+        h.counts = array("q")
+        h.counts.frombytes(data[48:])
+        return h
+
+
+class SizeStats:
+    """Un LogHistogram por categoría"""
+
+    def __init__(self):
+        self.by_category = {}
+
+    def add(self, category: str, size: int):
+        h = self.by_category.get(category)
+        if h is None:
+            h = self.by_category[category] = LogHistogram()
+        h.add(size)
+
+    def move(self, size: int, old: str, new: str):
+        self.by_category[old].discard(size)
+        self.add(new, size)
+
+    def merge(self, other: "SizeStats") -> "SizeStats":
+        for cat, h in other.by_category.items():
+            mine = self.by_category.get(cat)
+            if mine is None:
+                self.by_category[cat] = mine = LogHistogram()
+            mine.merge(h)
+        return self
+
+    def to_bytes(self) -> dict:
+        return {cat: h.to_bytes() for cat, h in self.by_category.items()}
+
+    @classmethod
+    def from_bytes(cls, blobs: dict) -> "SizeStats":
+        stats = cls()
+        stats.by_category = {cat: LogHistogram.from_bytes(b) for cat, b in blobs.items()}
+        return stats
+
+    def overall(self) -> LogHistogram:
+        total = LogHistogram()
+        for h in self.by_category.values():
+            total.merge(h)
+        return total
+
+    def summary(self) -> dict:
+        return {cat: h.summary() for cat, h in self.by_category.items() if h.count}
@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+from array import array
+from contextlib import contextmanager
+from operator import sub
+from itertools import accumulate
+from bisect import bisect_left, bisect_right
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ------------------ Histórico de uso (serie temporal) ------------------
+# Tras cada escaneo se apunta el total de cada raíz, de cada categoría y el
+# global. Las escrituras solo añaden registros de 16 bytes (segundo, serie,
+# bytes) a head.bin; cuando crece, compact() lo junta con el archivo
+# comprimido, reduce la resolución de lo antiguo y reescribe archive.z:
+#   últimas 48 h   -> un punto por hora
+#   hasta 90 días  -> uno por día
+#   más antiguo    -> uno por semana
+# De cada tramo se queda el último valor (es un nivel, no un contador). El
+# archivo guarda cada serie como columnas de deltas (tiempo y bytes) que zlib
+# comprime muy bien: miles de carpetas con un escaneo diario ocupan pocos MB.
+# La interfaz y un escaneo programado pueden escribir a la vez: append() y
+# compact() se hacen con un cerrojo de archivo (historial.lock), append()
+# hace fsync, y compact() relee del disco lo que otros hayan añadido.
+# Las consultas usan una caché que se recarga si head.bin o archive.z han
+# cambiado (tamaño o fecha) desde que se leyó.
+
+RECORD = struct.Struct("<IIq")      # segundo unix, id de serie, bytes
+RETENTION = ((2 * 86400, 3600), (90 * 86400, 86400), (None, 7 * 86400))
+HEAD_LIMIT = 1024 * 1024            # bytes de head.bin que disparan compact()
+
+
+def default_history_dir() -> str:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "gestoria", "historial")
+
+
+def downsample(times, values, now: float) -> tuple:
+    """Último valor de cada tramo según su antigüedad (entrada ordenada por tiempo)"""
+    keep = []
+    hi = len(times)
+    # De lo más reciente a lo más antiguo: cada nivel es un trozo contiguo
+    for limit, step in RETENTION:
+        lo = 0 if limit is None else bisect_left(times, now - limit, 0, hi)
+        buckets = [t // step for t in times[lo:hi]]
+        keep.extend(lo + i for i in range(len(buckets) - 1, -1, -1)
+                    if i == len(buckets) - 1 or buckets[i] != buckets[i + 1])
+        hi = lo
+    keep.reverse()
+    return array("q", [times[i] for i in keep]), array("q", [values[i] for i in keep])
+
+
+def _deltas(col: array) -> array:
+    return array("q", map(sub, col, [0] + col[:-1].tolist())) if col else array("q")
+
+
+def _undeltas(col: array) -> array:
+    return array("q", accumulate(col))
+
+
+class UsageHistory:
+    def __init__(self, directory: str = None):
+        self.directory = directory or default_history_dir()
+        os.makedirs(self.directory, exist_ok=True)
+        self._names_path = os.path.join(self.directory, "series.json")
+        self._head_path = os.path.join(self.directory, "head.bin")
+        self._archive_path = os.path.join(self.directory, "archive.z")
+        self._lock_path = os.path.join(self.directory, "historial.lock")
+        self._load_names()
+        self._cache = None      # id -> (tiempos, valores), cargado al consultar
+        self._cache_stamp = None    # _stamp() de los archivos que leyó la caché
+
+    @contextmanager
+    def _locked(self):
+        """Cerrojo exclusivo entre procesos (advisory)"""
+        with open(self._lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _stamp(self) -> tuple:
+        """(tamaño, mtime) de head.bin y archive.z: cambia si alguien escribe"""
+        out = []
+        for path in (self._head_path, self._archive_path):
+            try:
+                st = os.stat(path)
+                out.append((st.st_size, st.st_mtime_ns))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def _load_names(self):
+        try:
+            with open(self._names_path, encoding="utf-8") as f:
+                self.names = json.load(f)
+        except (OSError, ValueError):
+            self.names = []
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    # ---- Escritura ----
+    def _series_id(self, name: str) -> int:
+        sid = self._ids.get(name)
+        if sid is None:
+            sid = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return sid
+
+    def _save_names(self):
+        tmp = f"{self._names_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.names, f, ensure_ascii=False)
+        os.replace(tmp, self._names_path)
+
+    def append(self, points: dict, timestamp: float = None):
+        """points: {serie: bytes} medidos en el mismo instante"""
+        ts = int(time.time() if timestamp is None else timestamp)
+        with self._locked():
+            # Otro proceso puede haber dado ya ids a series nuevas
+            if any(name not in self._ids for name in points):
+                self._load_names()
+            known = len(self.names)
+            # La caché solo se puede ampliar en sitio si nadie más ha escrito
+            in_sync = self._cache is not None and self._cache_stamp == self._stamp()
+            records = b"".join(RECORD.pack(ts, self._series_id(name), int(value))
+                               for name, value in points.items())
+            # Los nombres nuevos se guardan antes que los registros que los usan
+            if len(self.names) != known:
+                self._save_names()
+            with open(self._head_path, "ab") as f:
+                f.write(records)
+                f.flush()
+                os.fsync(f.fileno())
+            if in_sync:
+                for name, value in points.items():
+                    times, values = self._cache.setdefault(self._ids[name], (array("q"), array("q")))
+                    if not times or ts >= times[-1]:
+                        times.append(ts)
+                        values.append(int(value))
+                self._cache_stamp = self._stamp()
+            else:
+                self._cache = None
+            try:
+                full = os.path.getsize(self._head_path) > HEAD_LIMIT
+            except OSError:
+                full = False
+            if full:
+                self._compact(time.time())
+
+    def record_totals(self, roots: dict, categories: dict = None, timestamp: float = None):
+        """roots: {nombre: bytes}; categories: {categoría: bytes}"""
+        points = {f"root:{nombre}": size for nombre, size in roots.items()}
+        points.update({f"category:{cat}": size for cat, size in (categories or {}).items()})
+        points["total"] = sum(roots.values())
+        self.append(points, timestamp)
+
+    def record_scan(self, data: dict):
+        """Apunta la salida de gestor_cli.run_scan"""
+        roots = {r["name"]: r.get("total_size", 0) for r in data["roots"] if r.get("exists")}
+        self.record_totals(roots, data.get("categories"), data.get("timestamp"))
+
+    # ---- Lectura ----
+    def _read_head(self) -> list:
+        try:
+            with open(self._head_path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return []
+        usable = len(raw) - len(raw) % RECORD.size   # registro cortado al final
+        return list(RECORD.iter_unpack(raw[:usable]))
+
+    def _read_archive(self) -> dict:
+        series = {}
+        try:
+            with open(self._archive_path, "rb") as f:
+                raw = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return series
+        pos = 0
+        while pos < len(raw):
+            sid, n = struct.unpack_from("<II", raw, pos)
+            pos += 8
+            times, values = array("q"), array("q")
+            times.frombytes(raw[pos:pos + 8 * n])
+            values.frombytes(raw[pos + 8 * n:pos + 16 * n])
+            pos += 16 * n
+            series[sid] = (_undeltas(times), _undeltas(values))
+        return series
+
+    def _load(self) -> dict:
+        if self._cache is None:
+            series = self._read_archive()
+            for ts, sid, value in sorted(self._read_head()):
+                times, values = series.setdefault(sid, (array("q"), array("q")))
+                if times and ts < times[-1]:
+                    continue        # más antiguo que lo ya archivado
+                times.append(ts)
+                values.append(value)
+            self._cache = series
+        return self._cache
+
+    def query(self, name: str, start: float = None, end: float = None) -> list:
+        """[(segundo, bytes)] de una serie en [start, end]"""
+        if self._cache is None or self._cache_stamp != self._stamp():
+            with self._locked():    # que no se cuele un compact() a medias
+                # Otro proceso ha escrito (o compactado): se relee todo
+                self._load_names()
+                self._cache = None
+                self._load()
+                self._cache_stamp = self._stamp()
+        sid = self._ids.get(name)
+        if sid is None:
+            return []
+        times, values = self._cache.get(sid, ((), ()))
+        lo = 0 if start is None else bisect_left(times, start)
+        hi = len(times) if end is None else bisect_right(times, end)
+        return list(zip(times[lo:hi], values[lo:hi]))
+
+    def series(self, prefix: str = "") -> list:
+        return [name for name in self.names if name.startswith(prefix)]
+
+    def growth(self, name: str, start: float = None, end: float = None) -> int:
+        """Bytes ganados (o perdidos) en el intervalo"""
+        points = self.query(name, start, end)
+        return points[-1][1] - points[0][1] if points else 0
+
+    # ---- Mantenimiento ----
+    def compact(self, now: float = None):
+        """Junta head.bin con el archivo reduciendo la resolución de lo antiguo"""
+        with self._locked():
+            self._compact(time.time() if now is None else now)
+
+    def _compact(self, now: float):
+        # Con el cerrojo puesto: se relee todo, la caché puede no tener lo
+        # que añadieron otros procesos
+        self._load_names()
+        self._cache = None
+        series = self._load()
+        chunks = []
+        for sid in sorted(series):
+            times, values = downsample(*series[sid], now)
+            series[sid] = (times, values)
+            chunks.append(struct.pack("<II", sid, len(times)))
+            chunks.append(_deltas(times).tobytes())
+            chunks.append(_deltas(values).tobytes())
+        tmp = f"{self._archive_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(b"".join(chunks), 6))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._archive_path)
+        # Lo que estaba en head.bin ya está en el archivo (nadie ha podido
+        # añadir nada mientras: tenemos el cerrojo)
+        with open(self._head_path, "wb"):
+            pass
+        self._cache_stamp = self._stamp()
+
+    def nbytes(self) -> int:
+        total = 0
+        for path in (self._names_path, self._head_path, self._archive_path):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import math
+import time
+import zlib
+from bisect import bisect_right
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # funciona igual (más lento) sin NumPy
+    np = None
+
+# ------------------ Clasificación "inteligente" local ------------------
+# Naive Bayes multinomial sobre características hasheadas: tokens del nombre,
+# carpetas de la ruta, tamaño y antigüedad. Se entrena sin conexión con los
+# propios archivos del usuario cuya extensión ya indica la categoría y luego
+# sugiere categoría para los que quedaron en "Otros". La inferencia va por
+# lotes vectorizados con NumPy; el modelo se carga de disco solo al usarse.
+# Las probabilidades de Naive Bayes salen muy exageradas (0.99 sin motivo),
+# así que al entrenar se aparta una parte de los archivos conocidos y se mide
+# el acierto real por tramo de confianza; min_confidence se compara con ese
+# acierto medido. La extensión no es característica: es de donde sale la
+# etiqueta y en "Otros" nunca coincide con una conocida, así que inflaría el
+# acierto medido. Las sugerencias nunca cambian la categoría real.
+
+N_FEATURES = 1 << 18
+BATCH_SIZE = 8192
+HOLDOUT_EVERY = 5           # una de cada 5 filas conocidas se aparta para calibrar
+MAX_HOLDOUT = 20000
+CALIBRATION_EDGES = (0.5, 0.7, 0.9, 0.99, 0.999, 0.9999)   # tramos de confianza bruta
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+
+# Marcadores que identifican la raíz de un proyecto
+PROJECT_MARKERS = {
+    ".git", "package.json", "pyproject.toml", "setup.py", "Cargo.toml", "pom.xml",
+    "build.gradle", "go.mod", "CMakeLists.txt", "Makefile", "composer.json", "Gemfile",
+}
+
+
+class FeatureHasher:
+    """Convierte un archivo en índices de características estables entre procesos
+    (crc32, no hash(), que cambia con PYTHONHASHSEED)"""
+
+    def __init__(self, n_features: int = N_FEATURES, now: float = None):
+        self.n_features = n_features
+        self.now = now if now is not None else time.time()
+        self._cache = {}
+
+    def _h(self, token: str) -> int:
+        idx = self._cache.get(token)
+        if idx is None:
+            idx = zlib.crc32(token.encode("utf-8", "surrogateescape")) % self.n_features
+            if len(self._cache) < 1_000_000:
+                self._cache[token] = idx
+        return idx
+
+    def features(self, dirpath: str, name: str, size: int, mtime: int) -> list:
+        stem = os.path.splitext(name.lower())[0]
+        feats = [self._h("tok:" + t) for t in _TOKEN_RE.findall(stem)]
+        # Últimas tres carpetas de la ruta
+        for comp in dirpath.replace("\\", "/").rsplit("/", 3)[-3:]:
+            if comp:
+                feats.append(self._h("dir:" + comp.lower()))
+        feats.append(self._h(f"size:{max(size, 1).bit_length() // 2}"))
+        age_days = max(0.0, (self.now - mtime) / 86400) if mtime else 0.0
+        feats.append(self._h(f"age:{int(math.log2(age_days + 1))}"))
+        return feats
+
+
+class SmartClassifier:
+    def __init__(self, model_path: str = None, n_features: int = N_FEATURES,
+                 min_confidence: float = 0.8, alpha: float = 1.0):
+        self.model_path = model_path
+        self.n_features = n_features
+        self.min_confidence = min_confidence
+        self.alpha = alpha
+        self.classes = []
+        self.log_prior = None
+        self.log_prob = None  # [clase][característica]
+        self._counts = None
+        self._sparse = []
+        self._loaded = False
+        self.calibration = None  # acierto medido por tramo de CALIBRATION_EDGES
+        self.predictions = {}  # caché: clave -> (categoría, confianza)
+
+    # ---- Entrenamiento ----
+    def fit_store(self, store, exclude: str = "Otros", hasher: FeatureHasher = None):
+        """Entrena con las filas del FileStore cuya categoría es conocida y
+        calibra la confianza con las apartadas"""
+        hasher = hasher or FeatureHasher(self.n_features)
+        counts = defaultdict(lambda: defaultdict(int))
+        docs = defaultdict(int)
+        holdout = []
+        for i in range(len(store)):
+            cat = store.category(i)
+            if cat == exclude:
+                continue
+            feats = hasher.features(store.dirs[store.dir_ids[i]], store.name(i),
+                                    store.sizes[i], store.mtimes[i])
+            if i % HOLDOUT_EVERY == 0 and len(holdout) < MAX_HOLDOUT:
+                holdout.append((feats, cat))
+                continue
+            docs[cat] += 1
+            row = counts[cat]
+            for f in feats:
+                row[f] += 1
+        self._set_counts(docs, counts)
+        self.calibration = self._calibrate(holdout)
+        # El modelo final también aprende de las filas apartadas
+        for feats, cat in holdout:
+            docs[cat] += 1
+            row = counts[cat]
+            for f in feats:
+                row[f] += 1
+        self._set_counts(docs, counts)
+        return self
+
+    def _calibrate(self, holdout: list) -> list:
+        """Acierto (suavizado) del modelo en las filas apartadas, por tramo de confianza"""
+        hits = [0] * (len(CALIBRATION_EDGES) + 1)
+        seen = [0] * (len(CALIBRATION_EDGES) + 1)
+        if self.classes:
+            preds = self.predict_batch([feats for feats, _ in holdout])
+            for (_, cat), (pred, conf) in zip(holdout, preds):
+                b = bisect_right(CALIBRATION_EDGES, conf)
+                seen[b] += 1
+                hits[b] += pred == cat
+        # Laplace: un tramo sin datos vale 0.5, nunca lo bastante para sugerir
+        return [(h + 1) / (n + 2) for h, n in zip(hits, seen)]
+
+    def _set_counts(self, docs: dict, counts: dict):
+        self.classes = sorted(docs)
+        self._counts = {c: dict(counts[c]) for c in self.classes}
+        total_docs = sum(docs.values()) or 1
+        prior = [math.log(docs[c] / total_docs) for c in self.classes]
+        # Probabilidades dispersas: solo las características vistas + suavizado
+        self._sparse = []
+        for c in self.classes:
+            row = self._counts[c]
+            denom = sum(row.values()) + self.alpha * self.n_features
+            self._sparse.append(({f: math.log((n + self.alpha) / denom) for f, n in row.items()},
+                                 math.log(self.alpha / denom)))
+        if np is not None:
+            self.log_prior = np.array(prior)
+            self.log_prob = np.empty((len(self.classes), self.n_features))
+            for k, (row, unseen) in enumerate(self._sparse):
+                self.log_prob[k].fill(unseen)
+                if row:
+                    idx = np.fromiter(row.keys(), dtype=np.int64, count=len(row))
+                    self.log_prob[k, idx] = np.fromiter(row.values(), dtype=float, count=len(row))
+        else:
+            self.log_prior = prior
+        self._loaded = True
+        self.predictions.clear()
+
+    # ---- Persistencia (carga diferida) ----
+    def save(self, path: str = None):
+        path = path or self.model_path
+        data = {"n_features": self.n_features, "alpha": self.alpha,
+                "classes": self.classes, "calibration": self.calibration,
+                "docs": {c: math.exp(p) for c, p in zip(self.classes, list(self.log_prior))},
+                "counts": {c: {str(f): n for f, n in self._counts[c].items()} for c in self.classes}}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def ensure_loaded(self) -> bool:
+        if self._loaded:
+            return True
+        if not self.model_path or not os.path.exists(self.model_path):
+            return False
+        with open(self.model_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.n_features = data["n_features"]
+        self.alpha = data["alpha"]
+        counts = {c: {int(k): n for k, n in row.items()} for c, row in data["counts"].items()}
+        self._set_counts(data["docs"], counts)
+        # Un modelo sin calibrar no sugiere nada
+        self.calibration = data.get("calibration")
+        return True
+
+    # ---- Inferencia ----
+    def predict_batch(self, feature_rows: list) -> list:
+        """feature_rows: lista de listas de índices. Devuelve (categoría, confianza)"""
+        if not feature_rows:
+            return []
+        if np is None:
+            return [self._predict_one(row) for row in feature_rows]
+
+        out = []
+        for start in range(0, len(feature_rows), BATCH_SIZE):
+            batch = feature_rows[start:start + BATCH_SIZE]
+            lengths = np.fromiter((len(r) for r in batch), dtype=np.int64, count=len(batch))
+            feats = np.fromiter((f for r in batch for f in r), dtype=np.int64, count=int(lengths.sum()))
+            rows = np.repeat(np.arange(len(batch)), lengths)
+            # scores[fila, clase] = prior + suma de log-probabilidades de sus características
+            scores = np.empty((len(batch), len(self.classes)))
+            for k in range(len(self.classes)):
+                scores[:, k] = np.bincount(rows, weights=self.log_prob[k, feats], minlength=len(batch))
+            scores += self.log_prior
+            scores -= scores.max(axis=1, keepdims=True)
+            probs = np.exp(scores)
+            probs /= probs.sum(axis=1, keepdims=True)
+            best = probs.argmax(axis=1)
+            conf = probs[np.arange(len(batch)), best]
+            out.extend((self.classes[b], float(c)) for b, c in zip(best.tolist(), conf.tolist()))
+        return out
+
+    def _predict_one(self, feats: list):
+        scores = []
+        for prior, (row, unseen) in zip(self.log_prior, self._sparse):
+            scores.append(prior + sum(row.get(f, unseen) for f in feats))
+        top = max(scores)
+        exp = [math.exp(s - top) for s in scores]
+        k = exp.index(1.0)
+        return self.classes[k], exp[k] / sum(exp)
+
+    def classify_store(self, store, indices, keys=None, hasher: FeatureHasher = None) -> list:
+        """Sugiere categoría para las filas `indices` del almacén: (categoría,
+        acierto esperado), o None si el acierto medido al calibrar no llega a
+        min_confidence. `keys` activa la caché."""
+        if not self.ensure_loaded() or not self.classes or not self.calibration:
+            return [None] * len(indices)
+        hasher = hasher or FeatureHasher(self.n_features)
+        result = [None] * len(indices)
+        todo, rows = [], []
+        for j, i in enumerate(indices):
+            cached = self.predictions.get(keys[j]) if keys else None
+            if cached is not None:
+                result[j] = cached
+                continue
+            todo.append(j)
+            rows.append(hasher.features(store.dirs[store.dir_ids[i]], store.name(i),
+                                        store.sizes[i], store.mtimes[i]))
+        for j, pred in zip(todo, self.predict_batch(rows)):
+            result[j] = pred
+            if keys:
+                self.predictions[keys[j]] = pred
+        out = []
+        for cat, conf in result:
+            accuracy = self.calibration[bisect_right(CALIBRATION_EDGES, conf)]
+            out.append((cat, accuracy) if accuracy >= self.min_confidence else None)
+        return out
+
+
+def suggest_projects(store) -> list:
+    """Agrupa los archivos por la raíz de proyecto más cercana (carpetas con
+    .git, package.json, pyproject.toml...). Devuelve (raíz, archivos, bytes)."""
+    roots = set()
+    for d in store.dirs:
+        if os.path.basename(d) == ".git":
+            roots.add(os.path.dirname(d))
+    for i in range(len(store)):
+        if store.name(i) in PROJECT_MARKERS:
+            roots.add(store.dirs[store.dir_ids[i]])
+
+    owner = {}
+    for dir_id, d in enumerate(store.dirs):
+        p = d
+        while True:
+            if p in roots:
+                owner[dir_id] = p
+                break
+            parent = os.path.dirname(p)
+            if parent == p:
+                break
+            p = parent
+
+    files = defaultdict(int)
+    sizes = defaultdict(int)
+    for i in range(len(store)):
+        root = owner.get(store.dir_ids[i])
+        if root is not None:
+            files[root] += 1
+            sizes[root] += store.sizes[i]
+    return sorted(((r, files[r], sizes[r]) for r in files), key=lambda x: x[2], reverse=True)
@@ -0,0 +1,471 @@
+import os
+import sys
+import json
+import stat
+import time
+import errno
+import shutil
+import threading
+from collections import defaultdict
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------ Limpieza por lotes con diario ------------------
+# Borrar miles de archivos elegidos en la lista de pesados o en los grupos de
+# duplicados: se agrupan por carpeta (cada grupo es una tarea del pool, así
+# dos hilos no compiten por la misma carpeta) y cada grupo se anota en un
+# diario JSONL antes de tocar nada (write-ahead, con fsync) y otra vez al
+# terminar. Si el proceso muere a medias, recover() mira en disco qué llegó
+# a hacerse y cierra el lote; undo() devuelve a su sitio lo que se movió a
+# la papelera. La papelera sigue el formato freedesktop (files/ + info/
+# .trashinfo) para que el explorador del escritorio también pueda restaurar.
+# LiveTotals aplica cada grupo terminado a los agregados que ya pinta la
+# interfaz (categorías, totales por carpeta, almacén), sin reescanear.
+# El diario no crece sin fin: al pasar de COMPACT_BYTES se reescribe (de
+# forma atómica) sin los lotes deshechos ni los cerrados más antiguos.
+
+MODES = ("trash", "unlink")
+KEEP_BATCHES = 50           # lotes cerrados que se conservan al compactar el diario
+COMPACT_BYTES = 1 << 20     # se compacta cuando el diario pasa de este tamaño
+
+
+def default_journal_path() -> str:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(base, "gestoria", "limpieza.jsonl")
+
+
+def _home_trash() -> str:
+    if sys.platform == "win32":
+        return None
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "Trash")
+
+
+def _mount_point(path: str) -> str:
+    path = os.path.realpath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def trash_dir_for(path: str, home_trash: str = None) -> str:
+    """Papelera del mismo volumen que path, para que mover sea un rename"""
+    if sys.platform == "win32":
+        drive = os.path.splitdrive(os.path.abspath(path))[0]
+        return os.path.join(drive + os.sep, ".gestoria-papelera")
+    home_trash = home_trash or _home_trash()
+    try:
+        os.makedirs(home_trash, exist_ok=True)
+        if os.stat(home_trash).st_dev == os.lstat(path).st_dev:
+            return home_trash
+    except OSError:
+        pass
+    return os.path.join(_mount_point(path), f".Trash-{os.getuid()}")
+
+
+class CleanupItem:
+    __slots__ = ("path", "size", "category", "index", "root", "parts", "trashed")
+
+    def __init__(self, path: str, size: int = 0, category: str = None, index: int = None,
+                 root: str = None):
+        self.path = path
+        self.size = size
+        self.category = category
+        self.index = index          # fila del FileStore, si se conoce (solo una pista)
+        self.root = root            # raíz del almacén al que se refiere index
+        self.parts = None           # carpeta: [(ruta, tamaño, categoría)] de sus archivos
+        self.trashed = None         # destino en la papelera, una vez movido
+
+    @classmethod
+    def from_record(cls, rec) -> "CleanupItem":
+        """De un FileRecord (lista de pesados, consultas)"""
+        store = rec.store
+        return cls(rec.path, rec.size, rec.category, rec.index, store.dirs[0] if store.dirs else None)
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "size": self.size, "category": self.category,
+                "index": self.index, "root": self.root, "parts": self.parts, "trashed": self.trashed}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "CleanupItem":
+        item = cls(d["path"], d.get("size", 0), d.get("category"), d.get("index"), d.get("root"))
+        item.parts = [tuple(p) for p in d["parts"]] if d.get("parts") else None
+        item.trashed = d.get("trashed")
+        return item
+
+
+def _under(path: str, root: str) -> bool:
+    return path == root or path.startswith(os.path.join(root, ""))
+
+
+def disk_size(path: str) -> int:
+    """Bytes de path; si es una carpeta (sin seguir enlaces), de todo lo que
+    contiene. El st_size de una carpeta es el de su entrada, no su contenido."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return 0
+    if not stat.S_ISDIR(st.st_mode):
+        return st.st_size
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _nested(path: str, selected) -> bool:
+    """path cuelga de otra ruta de selected (una carpeta elegida entera)"""
+    parent = os.path.dirname(path)
+    while parent != path:
+        if parent in selected:
+            return True
+        path, parent = parent, os.path.dirname(parent)
+    return False
+
+
+class LiveTotals:
+    """Agregados de la interfaz que se corrigen al borrar y al deshacer.
+
+    category_sizes: {categoría: bytes}; folder_totals: {nombre: bytes} de las
+    carpetas de `roots` ({nombre: ruta}); store (FileStore), size_stats
+    (SizeStats) y search_index (RootIndexes) opcionales. Una carpeta entera
+    se desglosa con el almacén.
+
+    category_sizes, store y size_stats describen un solo árbol (`root`, por
+    defecto la raíz del almacén): lo que queda fuera de él solo corrige
+    folder_totals. Como undo() puede llegar de otra sesión u otra vista, la
+    fila del almacén se busca por ruta; el índice guardado es solo una pista.
+
+    Si los agregados los lee otro hilo (tkinter), `post(fn, *args)` lleva cada
+    corrección a ese hilo en vez de aplicarla desde los hilos del borrado."""
+
+    def __init__(self, category_sizes: dict = None, folder_totals: dict = None, roots: dict = None,
+                 store=None, size_stats=None, root: str = None, search_index=None, post=None):
+        self.category_sizes = category_sizes if category_sizes is not None else defaultdict(int)
+        self.folder_totals = folder_totals if folder_totals is not None else {}
+        self.roots = roots or {}
+        self.store = store
+        self.size_stats = size_stats
+        self.search_index = search_index
+        self.post = post
+        if root is None and store is not None and store.dirs:
+            root = store.dirs[0]
+        self.root = root
+        self.freed = 0
+        self._rows = None           # ruta -> fila, se construye si falla la pista
+        self._lock = threading.Lock()
+
+    def covers(self, item: CleanupItem) -> bool:
+        return self.root is None or item.root == self.root or _under(item.path, self.root)
+
+    def _row(self, path: str, hint: int = None) -> int:
+        store = self.store
+        if hint is not None and 0 <= hint < len(store) and store.path(hint) == path:
+            return hint
+        if self._rows is None:
+            self._rows = {store.path(i): i for i in range(len(store))}
+        return self._rows.get(path)
+
+    def _breakdown(self, item: CleanupItem) -> list:
+        """[(ruta, tamaño, categoría)] de lo que contiene item"""
+        if item.parts is not None:
+            return item.parts
+        store = self.store
+        if item.index is not None or item.category is not None or store is None or not self.covers(item):
+            return [(item.path, item.size, item.category)]
+        prefix = os.path.join(item.path, "")
+        dirs = {d for d, p in enumerate(store.dirs) if p == item.path or p.startswith(prefix)}
+        return [(store.path(i), store.sizes[i], store.category(i)) for i in range(len(store))
+                if store.dir_ids[i] in dirs]
+
+    def describe(self, item: CleanupItem):
+        """Completa tamaño y desglose de item antes de anotarlo en el diario
+        (una carpeta elegida sin tamaño se mide con el almacén)"""
+        with self._lock:
+            parts = self._breakdown(item)
+            if len(parts) != 1 or parts[0][0] != item.path:
+                item.parts = parts
+            if not item.size:
+                item.size = sum(size for _, size, _ in parts)
+
+    def apply(self, item: CleanupItem, sign: int = -1):
+        """sign=-1 al borrar, +1 al restaurar"""
+        if self.post is not None:
+            self.post(self._apply, item, sign)
+        else:
+            self._apply(item, sign)
+
+    def _apply(self, item: CleanupItem, sign: int):
+        with self._lock:
+            for nombre, ruta in self.roots.items():
+                if nombre in self.folder_totals and _under(item.path, ruta):
+                    self.folder_totals[nombre] += sign * item.size
+            self.freed -= sign * item.size
+            if self.search_index is not None:
+                self.search_index.hide(item.path, sign < 0)
+            if not self.covers(item):
+                return          # de otro árbol: sus categorías no están aquí
+            for path, size, category in self._breakdown(item):
+                if category is not None and category in self.category_sizes:
+                    self.category_sizes[category] += sign * size
+                if self.size_stats is not None and category in self.size_stats.by_category:
+                    if sign < 0:
+                        self.size_stats.by_category[category].discard(size)
+                    else:
+                        self.size_stats.add(category, size)
+                if self.store is not None:
+                    row = self._row(path, item.index if path == item.path else None)
+                    if row is not None:
+                        # La fila se queda (los índices no cambian) pero ya no pesa
+                        # ni sale en top_n ni en las consultas
+                        self.store.sizes[row] = 0 if sign < 0 else size
+                        if sign < 0:
+                            self.store.deleted.add(row)
+                        else:
+                            self.store.deleted.discard(row)
+
+
+class CleanupReport:
+    def __init__(self, batch: str, mode: str):
+        self.batch = batch
+        self.mode = mode
+        self.done = []
+        self.failed = []            # (ruta, mensaje)
+        self.freed_bytes = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {"batch": self.batch, "mode": self.mode, "done": len(self.done),
+                "failed": [{"path": p, "error": e} for p, e in self.failed],
+                "freed_bytes": self.freed_bytes, "seconds": self.seconds}
+
+
+class CleanupExecutor:
+    def __init__(self, journal_path: str = None, mode: str = "trash", max_workers: int = 4,
+                 totals: LiveTotals = None, home_trash: str = None):
+        if mode not in MODES:
+            raise ValueError(f"Modo desconocido: {mode!r} (use {' o '.join(MODES)})")
+        self.journal_path = journal_path or default_journal_path()
+        self.mode = mode
+        self.max_workers = max_workers
+        self.totals = totals
+        self.home_trash = home_trash
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+
+    # ---- Diario ----
+    def _log(self, record: dict, sync: bool = True):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.journal_path, "a", encoding="utf-8", errors="surrogateescape") as f:
+                f.write(line)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def _read_journal(self) -> list:
+        try:
+            with open(self.journal_path, encoding="utf-8", errors="surrogateescape") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass        # última línea cortada por un corte de luz
+        return records
+
+    def _batches(self, records: list = None) -> dict:
+        """lote -> {"mode", "intents": {ruta: item}, "done": set, "commit", "undone"}"""
+        batches = {}
+        for r in self._read_journal() if records is None else records:
+            b = batches.setdefault(r["batch"], {"mode": r.get("mode"), "intents": {}, "done": set(),
+                                                "commit": False, "undone": False})
+            op = r["op"]
+            if op == "intent":
+                for d in r["items"]:
+                    b["intents"][d["path"]] = CleanupItem.from_dict(d)
+            elif op == "done":
+                b["done"].update(r["paths"])
+            elif op == "commit":
+                b["commit"] = True
+            elif op == "undo":
+                b["undone"] = True
+        return batches
+
+    def compact(self, keep: int = KEEP_BATCHES) -> int:
+        """Reescribe el diario solo con los lotes a medias y los `keep` cerrados
+        más recientes sin deshacer. Devuelve cuántos lotes se quitaron. Lo que
+        sigue en la papelera se puede restaurar desde el escritorio."""
+        with self._lock:
+            records = self._read_journal()
+            batches = self._batches(records)
+            closed = [name for name, b in batches.items() if b["commit"] and not b["undone"]]
+            wanted = {name for name, b in batches.items() if not b["commit"]}
+            wanted.update(closed[-keep:] if keep > 0 else ())
+            if len(wanted) == len(batches):
+                return 0
+            tmp = f"{self.journal_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8", errors="surrogateescape") as f:
+                for r in records:
+                    if r["batch"] in wanted:
+                        f.write(json.dumps(r, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.journal_path)
+        return len(batches) - len(wanted)
+
+    def _maybe_compact(self):
+        try:
+            if os.path.getsize(self.journal_path) > COMPACT_BYTES:
+                self.compact()
+        except OSError:
+            pass
+
+    # ---- Ejecución ----
+    def _trash_target(self, item: CleanupItem, batch: str, k: int) -> str:
+        trash = trash_dir_for(item.path, self.home_trash)
+        return os.path.join(trash, "files", f"{batch}-{k}-{os.path.basename(item.path)}")
+
+    def _remove_one(self, item: CleanupItem):
+        if self.mode == "unlink":
+            if os.path.isdir(item.path) and not os.path.islink(item.path):
+                shutil.rmtree(item.path)
+            else:
+                os.unlink(item.path)
+            return
+        dst = item.trashed
+        info_dir = os.path.join(os.path.dirname(os.path.dirname(dst)), "info")
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        os.makedirs(info_dir, exist_ok=True)
+        info = os.path.join(info_dir, os.path.basename(dst) + ".trashinfo")
+        with open(info, "w", encoding="utf-8") as f:
+            f.write(f"[Trash Info]\nPath={quote(os.fsencode(item.path))}\n"
+                    f"DeletionDate={time.strftime('%Y-%m-%dT%H:%M:%S')}\n")
+        try:
+            os.rename(item.path, dst)   # mismo volumen: nunca copia
+        except OSError:
+            os.remove(info)
+            raise
+
+    def _run_group(self, batch: str, items: list, report: CleanupReport):
+        self._log({"op": "intent", "batch": batch, "mode": self.mode,
+                   "items": [it.to_dict() for it in items]})
+        done = []
+        for item in items:
+            try:
+                self._remove_one(item)
+            except OSError as e:
+                with self._lock:
+                    report.failed.append((item.path, e.strerror or str(e)))
+                continue
+            done.append(item)
+        self._log({"op": "done", "batch": batch, "paths": [it.path for it in done]})
+        for item in done:
+            if self.totals is not None:
+                self.totals.apply(item, -1)
+        with self._lock:
+            report.done.extend(done)
+            report.freed_bytes += sum(it.size for it in done)
+
+    def execute(self, items) -> CleanupReport:
+        """Borra (o mueve a la papelera) items: CleanupItem o FileRecord"""
+        t0 = time.perf_counter()
+        batch = time.strftime("%Y%m%d%H%M%S") + f"-{os.getpid()}-{int(t0 * 1000) % 100000}"
+        report = CleanupReport(batch, self.mode)
+        chosen = {}
+        for it in items:
+            item = it if isinstance(it, CleanupItem) else CleanupItem.from_record(it)
+            chosen.setdefault(item.path, item)
+        # Lo que está dentro de una carpeta elegida ya se va con ella: tratarlo
+        # aparte fallaría (o contaría dos veces sus bytes)
+        groups = defaultdict(list)
+        kept = [item for path, item in chosen.items() if not _nested(path, chosen)]
+        for k, item in enumerate(kept):
+            if self.totals is not None:
+                self.totals.describe(item)
+            if self.mode == "trash":
+                item.trashed = self._trash_target(item, batch, k)
+            groups[os.path.dirname(item.path)].append(item)
+        self._log({"op": "begin", "batch": batch, "mode": self.mode, "time": time.time()})
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for f in [pool.submit(self._run_group, batch, g, report) for g in groups.values()]:
+                f.result()
+        self._log({"op": "commit", "batch": batch})
+        self._maybe_compact()
+        report.seconds = time.perf_counter() - t0
+        return report
+
+    def recover(self) -> list:
+        """Cierra los lotes que se quedaron a medias: lo que ya no está en su
+        sitio cuenta como hecho. Devuelve los lotes reparados."""
+        repaired = []
+        for batch, b in self._batches().items():
+            if b["commit"]:
+                continue
+            pending = [it for path, it in b["intents"].items() if path not in b["done"]]
+            done = [it for it in pending if not os.path.lexists(it.path)
+                    and (b["mode"] != "trash" or os.path.lexists(it.trashed))]
+            self._log({"op": "done", "batch": batch, "paths": [it.path for it in done], "recovered": True})
+            self._log({"op": "commit", "batch": batch})
+            repaired.append(batch)
+        return repaired
+
+    def history(self) -> list:
+        """Lotes del diario, del más antiguo al más reciente"""
+        return [{"batch": batch, "mode": b["mode"], "files": len(b["done"]),
+                 "bytes": sum(b["intents"][p].size for p in b["done"] if p in b["intents"]),
+                 "committed": b["commit"], "undone": b["undone"]}
+                for batch, b in self._batches().items()]
+
+    def undo(self, batch: str = None) -> CleanupReport:
+        """Devuelve a su sitio lo que un lote movió a la papelera (por defecto
+        el último que se pueda deshacer)"""
+        batches = self._batches()
+        if batch is None:
+            batch = next((name for name, b in reversed(list(batches.items()))
+                          if b["mode"] == "trash" and b["commit"] and not b["undone"]), None)
+        report = CleanupReport(batch, "undo")
+        b = batches.get(batch)
+        if b is None or b["undone"]:
+            return report
+        if b["mode"] != "trash":
+            report.failed = [(p, "borrado definitivo: no se puede deshacer") for p in b["done"]]
+            return report
+        t0 = time.perf_counter()
+        for path in b["done"]:
+            item = b["intents"][path]
+            try:
+                if os.path.lexists(item.path):
+                    raise OSError(errno.EEXIST, "ya existe otro archivo en la ruta original")
+                os.makedirs(os.path.dirname(item.path), exist_ok=True)
+                os.rename(item.trashed, item.path)
+            except OSError as e:
+                report.failed.append((path, e.strerror or str(e)))
+                continue
+            info = os.path.join(os.path.dirname(os.path.dirname(item.trashed)), "info",
+                                os.path.basename(item.trashed) + ".trashinfo")
+            try:
+                os.remove(info)
+            except OSError:
+                pass
+            if self.totals is not None:
+                self.totals.apply(item, +1)
+            report.done.append(item)
+            report.freed_bytes -= item.size
+        self._log({"op": "undo", "batch": batch, "paths": [it.path for it in report.done]})
+        self._maybe_compact()
+        report.seconds = time.perf_counter() - t0
+        return report
@@ -0,0 +1,122 @@
+import os
+import time
+import errno as errno_mod
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# ------------------ Métricas de escaneo ------------------
+# Tiempos por fase (reloj y CPU), contadores de llamadas y errores por errno.
+# Se exporta como diccionario (report) o como texto Prometheus para el
+# "textfile collector" de node_exporter.
+
+
+class ScanMetrics:
+    def __init__(self):
+        self.phase_wall = defaultdict(float)
+        self.phase_cpu = defaultdict(float)
+        self.files = 0
+        self.dirs = 0
+        self.bytes = 0
+        self.stat_calls = 0
+        self.errors_by_errno = Counter()
+        self.root_durations = {}
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    @contextmanager
+    def phase(self, name: str):
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.phase_wall[name] += time.perf_counter() - w0
+            self.phase_cpu[name] += time.process_time() - c0
+
+    @contextmanager
+    def root(self, path: str):
+        """Mide cuánto tarda cada carpeta raíz analizada"""
+        w0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.root_durations[path] = self.root_durations.get(path, 0.0) + time.perf_counter() - w0
+
+    def merge(self, other: "ScanMetrics"):
+        """Suma fases, contadores y errores de otro ScanMetrics (p. ej. de un
+        proceso trabajador). Las duraciones por raíz no se suman."""
+        for name, w in other.phase_wall.items():
+            self.phase_wall[name] += w
+        for name, c in other.phase_cpu.items():
+            self.phase_cpu[name] += c
+        self.files += other.files
+        self.dirs += other.dirs
+        self.bytes += other.bytes
+        self.stat_calls += other.stat_calls
+        self.errors_by_errno.update(other.errors_by_errno)
+        return self
+
+    def record_error(self, exc: OSError, where: str = "stat"):
+        code = errno_mod.errorcode.get(exc.errno, str(exc.errno)) if exc.errno else "UNKNOWN"
+        self.errors_by_errno[(where, code)] += 1
+
+    @property
+    def errors(self) -> int:
+        return sum(self.errors_by_errno.values())
+
+    def report(self) -> dict:
+        wall = time.perf_counter() - self._wall0
+        cpu = time.process_time() - self._cpu0
+        return {
+            "wall_seconds": wall,
+            "cpu_seconds": cpu,
+            "files": self.files,
+            "dirs": self.dirs,
+            "bytes": self.bytes,
+            "stat_calls": self.stat_calls,
+            "files_per_second": self.files / wall if wall > 0 else 0.0,
+            "dirs_per_second": self.dirs / wall if wall > 0 else 0.0,
+            "phases": {
+                name: {"wall_seconds": self.phase_wall[name], "cpu_seconds": self.phase_cpu[name]}
+                for name in self.phase_wall
+            },
+            "errors": {f"{where}:{code}": n for (where, code), n in self.errors_by_errno.items()},
+            "roots": dict(self.root_durations),
+        }
+
+    def to_prometheus(self, prefix: str = "gestoria_scan") -> str:
+        rep = self.report()
+        lines = []
+
+        def metric(name, mtype, help_, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_}")
+            lines.append(f"# TYPE {prefix}_{name} {mtype}")
+            for labels, value in samples:
+                lbl = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{{{lbl}}} {value}" if lbl else f"{prefix}_{name} {value}")
+
+        metric("wall_seconds", "gauge", "Duración total del escaneo", [({}, rep["wall_seconds"])])
+        metric("cpu_seconds", "gauge", "Tiempo de CPU del escaneo", [({}, rep["cpu_seconds"])])
+        metric("files_total", "counter", "Archivos recorridos", [({}, rep["files"])])
+        metric("dirs_total", "counter", "Carpetas recorridas", [({}, rep["dirs"])])
+        metric("bytes_total", "counter", "Bytes contabilizados", [({}, rep["bytes"])])
+        metric("stat_calls_total", "counter", "Llamadas a stat", [({}, rep["stat_calls"])])
+        metric("phase_wall_seconds", "gauge", "Tiempo de reloj por fase",
+               [({"phase": n}, p["wall_seconds"]) for n, p in rep["phases"].items()])
+        metric("phase_cpu_seconds", "gauge", "Tiempo de CPU por fase",
+               [({"phase": n}, p["cpu_seconds"]) for n, p in rep["phases"].items()])
+        metric("errors_total", "counter", "Errores por operación y errno",
+               [({"op": w, "errno": c}, n) for (w, c), n in self.errors_by_errno.items()])
+        metric("root_seconds", "gauge", "Duración por carpeta raíz",
+               [({"root": r}, d) for r, d in rep["roots"].items()])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = "gestoria_scan"):
+        # Escritura atómica: node_exporter nunca ve un archivo a medias
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(tmp, path)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,213 @@
+import os
+import sys
+import hashlib
+import shutil
+import threading
+import subprocess
+import importlib.util
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from gestor_core import get_category
+
+# ------------------ Miniaturas de imágenes y vídeos ------------------
+# Vista previa de los archivos más pesados antes de borrarlos. Las
+# miniaturas se generan en un pool de hilos acotado y se guardan como PNG
+# pequeños en una caché en disco con tope de tamaño (se expulsa lo usado
+# hace más tiempo). La clave es (ruta, mtime, tamaño): si el archivo cambia,
+# la miniatura vieja deja de usarse y acabará expulsada.
+# Decodificadores opcionales: Pillow para imágenes y ffmpeg (si está en el
+# PATH) para el fotograma de los vídeos, y también para imágenes si no hay
+# Pillow. Sin ninguno de los dos simplemente no hay miniaturas. Pillow se
+# importa con la primera miniatura: la interfaz carga este módulo al abrir
+# y basta saber si está instalado.
+
+THUMB_SIZE = (96, 96)
+CACHE_BYTES = 64 * 1024 * 1024
+VIDEO_SEEK_SECONDS = 5
+FFMPEG = shutil.which("ffmpeg")
+HAVE_PIL = importlib.util.find_spec("PIL") is not None
+_Image = False      # PIL.Image sin importar aún; None si falla
+
+
+def _pil_image():
+    global _Image
+    if _Image is False:
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+        _Image = Image
+    return _Image
+
+
+def default_cache_dir() -> str:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "gestoria", "miniaturas")
+
+
+def previews_available() -> bool:
+    return HAVE_PIL or FFMPEG is not None
+
+
+def can_preview(path: str) -> bool:
+    cat = get_category(path)
+    if cat == "Imágenes":
+        return HAVE_PIL or FFMPEG is not None
+    return cat == "Videos" and FFMPEG is not None
+
+
+def _render_pil(Image, src: str, dst: str, size: tuple) -> bool:
+    with Image.open(src) as im:
+        im.draft("RGB", size)   # JPEG: decodifica ya reducido, mucho más rápido
+        im.thumbnail(size)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "A" in im.getbands() else "RGB")
+        im.save(dst, "PNG")
+    return True
+
+
+def _render_ffmpeg(src: str, dst: str, size: tuple, seek: float = 0) -> bool:
+    w, h = size
+    cmd = [FFMPEG, "-v", "error", "-y"]
+    if seek:
+        cmd += ["-ss", str(seek)]
+    cmd += ["-i", src, "-frames:v", "1",
+            "-vf", f"scale={w}:{h}:force_original_aspect_ratio=decrease", "-c:v", "png", "-f", "image2", dst]
+    try:
+        subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, timeout=20, check=False)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return os.path.exists(dst) and os.path.getsize(dst) > 0
+
+
+def render_thumbnail(src: str, dst: str, size: tuple = THUMB_SIZE) -> bool:
+    """Escribe en dst un PNG de como mucho `size`. False si no se pudo."""
+    cat = get_category(src)
+    Image = _pil_image() if cat == "Imágenes" and HAVE_PIL else None
+    if Image is not None:
+        try:
+            return _render_pil(Image, src, dst, size)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            pass
+    if FFMPEG is None or cat not in ("Imágenes", "Videos"):
+        return False
+    if cat == "Videos":
+        # Un poco después del inicio (evita fundidos a negro); si el vídeo es
+        # más corto, el primer fotograma
+        if _render_ffmpeg(src, dst, size, VIDEO_SEEK_SECONDS):
+            return True
+    return _render_ffmpeg(src, dst, size)
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir: str = None, max_bytes: int = CACHE_BYTES,
+                 size: tuple = THUMB_SIZE, max_workers: int = 4):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.size = size
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gestoria-thumb")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # clave -> bytes, de menos a más reciente
+        self._total = 0
+        self._pending = {}              # clave -> callbacks esperando
+        self._failed = set()
+        self.hits = 0
+        self.renders = 0
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with os.scandir(self.cache_dir) as it:
+                found = [(e.stat().st_mtime, e.name[:-4], e.stat().st_size)
+                         for e in it if e.name.endswith(".png")]
+        except OSError:
+            found = []
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+
+    @staticmethod
+    def key(path: str, mtime: int, size: int) -> str:
+        raw = f"{path}\0{mtime}\0{size}".encode("utf-8", "surrogateescape")
+        return hashlib.sha1(raw).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".png")
+
+    def lookup(self, path: str, mtime: int, size: int) -> str:
+        """Ruta del PNG si ya está en caché (y la marca como recién usada)"""
+        key = self.key(path, mtime, size)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(self._file(key))   # el mtime del PNG hace de reloj LRU entre sesiones
+        except OSError:
+            pass
+        return self._file(key)
+
+    def request(self, path: str, mtime: int, size: int, callback):
+        """Llama a callback(ruta_png o None) desde un hilo del pool (o en el
+        acto si ya está en caché). Nunca bloquea al llamante."""
+        cached = self.lookup(path, mtime, size)
+        if cached is not None:
+            callback(cached)
+            return
+        key = self.key(path, mtime, size)
+        with self._lock:
+            if key in self._failed:
+                callback(None)
+                return
+            waiting = self._pending.get(key)
+            if waiting is not None:
+                waiting.append(callback)
+                return
+            self._pending[key] = [callback]
+        self.pool.submit(self._render, path, key)
+
+    def _render(self, path: str, key: str):
+        dst = self._file(key)
+        tmp = f"{dst}.{threading.get_ident()}.tmp"
+        ok = False
+        try:
+            ok = render_thumbnail(path, tmp, self.size)
+            if ok:
+                os.replace(tmp, dst)
+        except Exception:
+            # Un archivo corrupto nunca debe dejar callbacks esperando
+            ok = False
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        with self._lock:
+            self.renders += 1
+            if ok:
+                size = os.path.getsize(dst)
+                self._entries[key] = size
+                self._total += size
+                self._evict()
+            else:
+                self._failed.add(key)
+            callbacks = self._pending.pop(key, [])
+        for cb in callbacks:
+            cb(dst if ok else None)
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,190 @@
+import os
+import math
+import time
+import random
+from collections import defaultdict
+
+from gestor_core import get_category
+
+# ------------------ Estimación rápida por muestreo ------------------
+# Para volúmenes de varios TB: en vez de leer todo el árbol se leen las
+# carpetas de los primeros niveles (estratos exactos) y, por debajo, se
+# lanzan sondas que bajan eligiendo una subcarpeta al azar en cada nivel.
+# Cada sonda pondera lo que encuentra por el producto de los grados de
+# ramificación del camino (estimador de Knuth), que es insesgado para el
+# total de cada profundidad; la dispersión entre sondas da el intervalo de
+# confianza. Las carpetas ya leídas se guardan, así que las sondas solo
+# pagan E/S nueva en los niveles profundos.
+
+Z_95 = 1.96
+
+
+class SampleEstimate:
+    """Totales extrapolados con su semiamplitud de intervalo (± error)"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.total = 0.0
+        self.total_error = 0.0
+        self.files = 0.0
+        self.files_error = 0.0
+        self.categories = {}    # categoría -> (estimación, ± error)
+        self.by_depth = {}      # profundidad -> (bytes estimados, ± error)
+        self.probes = 0
+        self.dirs_read = 0
+        self.seconds = 0.0
+
+    def interval(self) -> tuple:
+        return max(self.total - self.total_error, 0.0), self.total + self.total_error
+
+    def relative_error(self) -> float:
+        return self.total_error / self.total if self.total else 0.0
+
+    def to_dict(self) -> dict:
+        low, high = self.interval()
+        return {
+            "root": self.root,
+            "total_size": round(self.total),
+            "total_error": round(self.total_error),
+            "total_interval": [round(low), round(high)],
+            "files": round(self.files),
+            "files_error": round(self.files_error),
+            "categories": {c: {"size": round(v), "error": round(e)}
+                           for c, (v, e) in sorted(self.categories.items(), key=lambda x: -x[1][0])},
+            "by_depth": {d: {"size": round(v), "error": round(e)} for d, (v, e) in sorted(self.by_depth.items())},
+            "probes": self.probes,
+            "dirs_read": self.dirs_read,
+            "seconds": self.seconds,
+        }
+
+
+def _read_dir(path: str, policy=None) -> tuple:
+    """(subcarpetas, nº archivos, bytes, {categoría: bytes}) con el mismo
+    criterio que os.walk: los enlaces a carpetas no cuentan ni se siguen"""
+    cats = defaultdict(int)
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return [], 0, 0, cats
+    dirnames, files = [], {}
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if not is_dir:
+            files[entry.name] = entry
+        elif not entry.is_symlink():
+            dirnames.append(entry.name)
+    names = list(files)
+    if policy is not None:
+        names = policy.filter(path, dirnames, names)
+    total = 0
+    for name in names:
+        try:
+            size = files[name].stat().st_size
+        except OSError:
+            size = 0
+        total += size
+        cats[get_category(name)] += size
+    return [os.path.join(path, d) for d in dirnames], len(names), total, cats
+
+
+def _mean_error(values: list, k: int, z: float) -> tuple:
+    """Media de k sondas (las que faltan en values valen 0) y semiamplitud"""
+    mean = sum(values) / k
+    if k < 2:
+        return mean, mean
+    var = (sum(v * v for v in values) - k * mean * mean) / (k - 1)
+    return mean, z * math.sqrt(max(var, 0.0) / k)
+
+
+def estimate_directory(base_path: str, probes: int = 400, max_seconds: float = 2.0,
+                       exact_depth: int = 1, seed=None, z: float = Z_95,
+                       policy=None) -> SampleEstimate:
+    """Estima tamaño, nº de archivos y categorías de base_path.
+
+    Hasta `exact_depth` se lee todo (sin error); por debajo se lanzan hasta
+    `probes` sondas o las que quepan en `max_seconds`."""
+    t0 = time.perf_counter()
+    deadline = t0 + max_seconds if max_seconds else None
+    rng = random.Random(seed)
+    est = SampleEstimate(base_path)
+    if policy is not None:
+        policy.start(base_path)
+
+    cache = {}
+
+    def read(path):
+        info = cache.get(path)
+        if info is None:
+            info = cache[path] = _read_dir(path, policy)
+        return info
+
+    # Estratos exactos: todas las carpetas hasta exact_depth
+    exact_bytes = defaultdict(int)
+    exact_files = 0
+    exact_cats = defaultdict(int)
+    frontier = [base_path]
+    for depth in range(exact_depth + 1):
+        next_frontier = []
+        for path in frontier:
+            subdirs, files, total, cats = read(path)
+            exact_bytes[depth] += total
+            exact_files += files
+            for c, v in cats.items():
+                exact_cats[c] += v
+            next_frontier.extend(subdirs)
+        if depth < exact_depth:
+            frontier = next_frontier
+        else:
+            start_points = next_frontier
+
+    # Sondas aleatorias por debajo: cada una aporta un vector de estimaciones
+    probe_totals, probe_files = [], []
+    probe_depth = defaultdict(lambda: defaultdict(float))   # prof. -> sonda -> bytes
+    probe_cats = defaultdict(lambda: defaultdict(float))    # cat. -> sonda -> bytes
+    k = 0
+    while start_points and k < probes:
+        if deadline is not None and k >= 2 and time.perf_counter() >= deadline:
+            break
+        path = rng.choice(start_points)
+        weight = len(start_points)
+        depth = exact_depth + 1
+        p_total = p_files = 0.0
+        while True:
+            subdirs, files, total, cats = read(path)
+            p_total += weight * total
+            p_files += weight * files
+            probe_depth[depth][k] += weight * total
+            for c, v in cats.items():
+                probe_cats[c][k] += weight * v
+            if not subdirs:
+                break
+            weight *= len(subdirs)
+            path = rng.choice(subdirs)
+            depth += 1
+        probe_totals.append(p_total)
+        probe_files.append(p_files)
+        k += 1
+
+    deep_total, deep_total_err = _mean_error(probe_totals, k, z) if k else (0.0, 0.0)
+    deep_files, deep_files_err = _mean_error(probe_files, k, z) if k else (0.0, 0.0)
+    est.total = sum(exact_bytes.values()) + deep_total
+    est.total_error = deep_total_err
+    est.files = exact_files + deep_files
+    est.files_error = deep_files_err
+    est.by_depth = {d: (float(v), 0.0) for d, v in exact_bytes.items()}
+    for d, per_probe in probe_depth.items():
+        est.by_depth[d] = _mean_error(list(per_probe.values()), k, z)
+    for c in set(exact_cats) | set(probe_cats):
+        if c in probe_cats:
+            mean, err = _mean_error(list(probe_cats[c].values()), k, z)
+        else:
+            mean, err = 0.0, 0.0
+        est.categories[c] = (exact_cats.get(c, 0) + mean, err)
+    est.probes = k
+    est.dirs_read = len(cache)
+    est.seconds = time.perf_counter() - t0
+    return est
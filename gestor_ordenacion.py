@@ -0,0 +1,218 @@
+import os
+import sys
+import csv
+import json
+import heapq
+import shutil
+import struct
+import tempfile
+import itertools
+
+from gestor_core import fmt_size
+
+# ------------------ Listado completo por tamaño (ordenación externa) ------------------
+# Con decenas de millones de archivos no cabe una lista de Python con todos.
+# ExternalSizeSort recibe los archivos uno a uno (es el `file_sink` de
+# iter_scan), los acumula hasta un presupuesto de memoria, ordena ese tramo
+# y lo vuelca a un temporal como registros binarios compactos. Al terminar
+# mezcla todos los tramos (k-way, heapq.merge) en un único archivo ordenado
+# de mayor a menor y apunta la posición de cada INDEX_STRIDE registros: una
+# página cualquiera se lee con un seek, y el listado completo se recorre o se
+# exporta en streaming sin volver a cargarlo en memoria.
+
+RECORD = struct.Struct("<QqHH")   # tamaño, mtime, código de categoría, bytes de la ruta
+ENTRY_OVERHEAD = 120              # bytes aprox. de una tupla en memoria, sin contar la ruta
+INDEX_STRIDE = 1024               # una posición guardada cada tantos registros del resultado
+MAX_FANIN = 64                    # tramos abiertos a la vez en una pasada de mezcla
+READ_BUFFER = 64 * 1024
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+
+class SortedFile:
+    __slots__ = ("path", "size", "mtime", "category")
+
+    def __init__(self, path: str, size: int, mtime: int, category: str):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.category = category
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "size": self.size, "category": self.category, "mtime": self.mtime}
+
+    def __repr__(self):
+        return f"SortedFile({self.path!r}, {self.size}, {self.category!r})"
+
+
+class ExternalSizeSort:
+    def __init__(self, memory_budget: int = DEFAULT_BUDGET, tmp_dir: str = None):
+        self.memory_budget = memory_budget
+        self.tmp_dir = tempfile.mkdtemp(prefix="gestoria_sort_", dir=tmp_dir)
+        self.categories = []
+        self._cat_index = {}
+        self.count = 0
+        self.total_bytes = 0
+        self.spills = 0
+        self._buffer = []        # (-tamaño, ruta en bytes, mtime, código)
+        self._buffered = 0
+        self._runs = []          # tramos volcados, cada uno ya ordenado
+        self._seq = 0
+        self._sorted = None      # resultado en memoria si nunca hubo que volcar
+        self._result = None      # archivo con el resultado final
+        self._offsets = None
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, dirpath: str, name: str, size: int, mtime: int, category: str):
+        if self._sorted is not None or self._result is not None:
+            raise RuntimeError("El listado ya está terminado: no admite más archivos")
+        code = self._cat_index.get(category)
+        if code is None:
+            code = self._cat_index[category] = len(self.categories)
+            self.categories.append(category)
+        path = os.fsencode(os.path.join(dirpath, name))
+        self._buffer.append((-size, path, mtime, code))
+        self._buffered += len(path) + ENTRY_OVERHEAD
+        self.count += 1
+        self.total_bytes += size
+        if self._buffered >= self.memory_budget:
+            self._spill()
+
+    def _new_file(self) -> str:
+        self._seq += 1
+        return os.path.join(self.tmp_dir, f"{self._seq}.run")
+
+    def _spill(self):
+        self._buffer.sort()
+        path = self._new_file()
+        self._write(self._buffer, path)
+        self._runs.append(path)
+        self._buffer = []
+        self._buffered = 0
+        self.spills += 1
+
+    @staticmethod
+    def _write(entries, path: str, index: bool = False) -> list:
+        offsets = []
+        pack, header = RECORD.pack, RECORD.size
+        pos = 0
+        with open(path, "wb", buffering=READ_BUFFER) as f:
+            write = f.write
+            for i, (neg_size, raw, mtime, code) in enumerate(entries):
+                if index and i % INDEX_STRIDE == 0:
+                    offsets.append(pos)
+                write(pack(-neg_size, mtime, code, len(raw)))
+                write(raw)
+                pos += header + len(raw)
+        return offsets
+
+    @staticmethod
+    def _read(path: str, buffering: int = READ_BUFFER, offset: int = 0):
+        unpack, header = RECORD.unpack, RECORD.size
+        with open(path, "rb", buffering=buffering) as f:
+            f.seek(offset)
+            read = f.read
+            while True:
+                raw = read(header)
+                if len(raw) < header:
+                    return
+                size, mtime, code, n = unpack(raw)
+                yield -size, read(n), mtime, code
+
+    def _merge(self, runs: list, dst: str, index: bool = False) -> list:
+        # El presupuesto se reparte entre los búferes de lectura de los tramos
+        buffering = max(READ_BUFFER, self.memory_budget // (2 * len(runs)))
+        offsets = self._write(heapq.merge(*(self._read(r, buffering) for r in runs)), dst, index)
+        for r in runs:
+            os.remove(r)
+        return offsets
+
+    def finish(self):
+        """Cierra la entrada y deja el listado listo para leerse (idempotente)"""
+        if self._sorted is not None or self._result is not None:
+            return self
+        if not self._runs:
+            self._buffer.sort()
+            self._sorted, self._buffer = self._buffer, []
+            return self
+        if self._buffer:
+            self._spill()
+        # Varias pasadas si hay más tramos de los que conviene abrir a la vez
+        while len(self._runs) > MAX_FANIN:
+            group, self._runs = self._runs[:MAX_FANIN], self._runs[MAX_FANIN:]
+            merged = self._new_file()
+            self._merge(group, merged)
+            self._runs.append(merged)
+        self._result = self._new_file()
+        self._offsets = self._merge(self._runs, self._result, index=True)
+        self._runs = []
+        return self
+
+    def _entries(self, start: int = 0):
+        self.finish()
+        if self._sorted is not None:
+            return itertools.islice(self._sorted, start, None)
+        block = start // INDEX_STRIDE
+        if block >= len(self._offsets):
+            return iter(())
+        entries = self._read(self._result, offset=self._offsets[block])
+        return itertools.islice(entries, start - block * INDEX_STRIDE, None)
+
+    def iter_files(self, start: int = 0):
+        """Todos los archivos de mayor a menor (a igual tamaño, por ruta)"""
+        cats = self.categories
+        for neg_size, raw, mtime, code in self._entries(start):
+            yield SortedFile(os.fsdecode(raw), -neg_size, mtime, cats[code])
+
+    __iter__ = iter_files
+
+    def page(self, page: int, page_size: int = 50) -> list:
+        return list(itertools.islice(self.iter_files(max(page, 0) * page_size), page_size))
+
+    def pages(self, page_size: int = 50) -> int:
+        return (self.count + page_size - 1) // page_size
+
+    def export(self, output: str, fmt: str = None) -> int:
+        """Vuelca el listado completo a output ('-' = stdout) en csv, jsonl o
+        tsv (por defecto según la extensión). Devuelve las filas escritas."""
+        if fmt is None:
+            ext = os.path.splitext(output)[1].lower().lstrip(".")
+            fmt = ext if ext in ("csv", "jsonl") else "tsv"
+        if output in (None, "-"):
+            return self._export_to(sys.stdout, fmt)
+        # Escritura atómica: o el listado completo o nada
+        tmp = f"{output}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8", newline="", errors="surrogateescape") as f:
+                n = self._export_to(f, fmt)
+            os.replace(tmp, output)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return n
+
+    def _export_to(self, out, fmt: str) -> int:
+        n = 0
+        if fmt == "jsonl":
+            for rec in self.iter_files():
+                out.write(json.dumps(rec.to_dict(), ensure_ascii=False) + "\n")
+                n += 1
+        else:
+            writer = csv.writer(out, delimiter="," if fmt == "csv" else "\t", lineterminator="\n")
+            writer.writerow(["size", "size_human", "category", "mtime", "path"])
+            for rec in self.iter_files():
+                writer.writerow([rec.size, fmt_size(rec.size), rec.category, rec.mtime, rec.path])
+                n += 1
+        return n
+
+    def close(self):
+        self._buffer = []
+        self._sorted = None
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
@@ -0,0 +1,255 @@
+import os
+import time
+import stat
+import zlib
+import errno
+import threading
+
+# ------------------ Orígenes de datos (backends de sistema de archivos) ------------------
+# iter_scan solo necesita dos operaciones por carpeta: listarla (subcarpetas y
+# archivos) y hacer stat de sus archivos en lote. Aislarlas permite recorrer
+# algo que no es el disco local (el índice de una imagen .tar/.zip, un árbol
+# en memoria) y medir cómo se comporta el escaneo en un NFS lento o con
+# errores de permisos sin tener uno: SimulatedBackend envuelve a cualquier
+# otro y añade latencia y fallos configurables y reproducibles (semilla).
+# La interfaz:
+#   listdir(ruta)             -> (subcarpetas, archivos); OSError si no se puede
+#   stat_many(ruta, nombres)  -> un objeto tipo os.stat_result u OSError por nombre
+#   walk(raíz, onerror)       -> como os.walk(topdown=True, followlinks=False)
+# `local` indica si las rutas existen en el disco (las fases que leen
+# contenido, como el sniffer o el inspector de comprimidos, lo necesitan).
+# gestor_core importa este módulo: tarfile/zipfile/random se importan solo
+# al usarse para no alargar el arranque de la CLI.
+
+
+class EntryStat:
+    """Lo que el escaneo usa de un os.stat_result"""
+    __slots__ = ("st_size", "st_mtime", "st_atime", "st_mtime_ns", "st_dev", "st_ino", "st_mode")
+
+    def __init__(self, size: int, mtime: float = 0.0, atime: float = None, mode: int = stat.S_IFREG | 0o644):
+        self.st_size = size
+        self.st_mtime = mtime
+        self.st_atime = mtime if atime is None else atime
+        self.st_mtime_ns = int(mtime * 1e9)
+        self.st_dev = 0
+        self.st_ino = 0
+        self.st_mode = mode
+
+
+class FSBackend:
+    local = False
+
+    def listdir(self, path: str) -> tuple:
+        raise NotImplementedError
+
+    def stat_many(self, dirpath: str, names: list) -> list:
+        raise NotImplementedError
+
+    def walk(self, top: str, onerror=None):
+        """Recorrido en preorden con el mismo orden que os.walk; como allí,
+        podar dirnames en sitio evita bajar a esas carpetas"""
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            try:
+                dirnames, filenames = self.listdir(path)
+            except OSError as e:
+                if onerror is not None:
+                    onerror(e)
+                continue
+            yield path, dirnames, filenames
+            stack.extend(os.path.join(path, d) for d in reversed(dirnames))
+
+
+class LocalBackend(FSBackend):
+    local = True
+
+    def listdir(self, path: str) -> tuple:
+        # Criterio de os.walk: los enlaces a carpetas no son archivos, y
+        # tampoco se sigue por ellos
+        dirnames, filenames = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    filenames.append(entry.name)
+                elif not entry.is_symlink():
+                    dirnames.append(entry.name)
+        return dirnames, filenames
+
+    def stat_many(self, dirpath: str, names: list) -> list:
+        out = []
+        for name in names:
+            try:
+                out.append(os.stat(os.path.join(dirpath, name)))
+            except OSError as e:
+                out.append(e)
+        return out
+
+    def walk(self, top: str, onerror=None):
+        return os.walk(top, onerror=onerror, followlinks=False)
+
+
+LOCAL = LocalBackend()
+
+
+class MemoryBackend(FSBackend):
+    """Árbol de solo metadatos en memoria; las rutas cuelgan de `root`"""
+
+    def __init__(self, root: str = os.sep):
+        self.root = root
+        self._dirs = {root: ([], {})}   # carpeta -> (subcarpetas, {nombre: EntryStat})
+
+    def _node(self, parts: list) -> tuple:
+        path, node = self.root, self._dirs[self.root]
+        for part in parts:
+            child = os.path.join(path, part)
+            if child not in self._dirs:
+                self._dirs[child] = ([], {})
+                node[0].append(part)
+            path, node = child, self._dirs[child]
+        return node
+
+    @staticmethod
+    def _parts(rel: str) -> list:
+        return [p for p in rel.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+
+    def add_dir(self, rel: str):
+        self._node(self._parts(rel))
+
+    def add_file(self, rel: str, size: int, mtime: float = 0.0):
+        parts = self._parts(rel)
+        if parts:
+            self._node(parts[:-1])[1][parts[-1]] = EntryStat(size, mtime)
+
+    def __len__(self):
+        return sum(len(files) for _, files in self._dirs.values())
+
+    def listdir(self, path: str) -> tuple:
+        node = self._dirs.get(path)
+        if node is None:
+            raise FileNotFoundError(errno.ENOENT, "No existe en el origen", path)
+        return list(node[0]), list(node[1])
+
+    def stat_many(self, dirpath: str, names: list) -> list:
+        files = self._dirs.get(dirpath, ((), {}))[1]
+        return [files[n] if n in files else FileNotFoundError(errno.ENOENT, "No existe en el origen",
+                                                              os.path.join(dirpath, n))
+                for n in names]
+
+    @classmethod
+    def snapshot(cls, root: str, backend: FSBackend = LOCAL) -> "MemoryBackend":
+        """Copia los metadatos de un árbol real (p. ej. para benchmarks sin disco)"""
+        mem = cls(root)
+        for dirpath, dirnames, filenames in backend.walk(root):
+            rel = os.path.relpath(dirpath, root)
+            mem.add_dir(rel)
+            for name, st in zip(filenames, backend.stat_many(dirpath, filenames)):
+                if not isinstance(st, OSError):
+                    mem.add_file(os.path.join(rel, name), st.st_size, st.st_mtime)
+        return mem
+
+
+class ImageBackend(MemoryBackend):
+    """Índice de una imagen .tar (también comprimida) o .zip como árbol de
+    solo lectura: se lee la lista de miembros, nunca se extrae nada"""
+
+    def __init__(self, image_path: str, root: str = None):
+        import tarfile
+        import zipfile
+        super().__init__(root or image_path)
+        self.image_path = image_path
+        if zipfile.is_zipfile(image_path):
+            with zipfile.ZipFile(image_path) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        self.add_dir(info.filename)
+                    else:
+                        mtime = time.mktime(info.date_time + (0, 0, -1))
+                        self.add_file(info.filename, info.file_size, mtime)
+            return
+        try:
+            with tarfile.open(image_path) as tf:
+                for member in tf:
+                    if member.isdir():
+                        self.add_dir(member.name)
+                    elif member.isreg():
+                        self.add_file(member.name, member.size, member.mtime)
+        except tarfile.TarError as e:
+            raise OSError(errno.EINVAL, f"No es una imagen .tar ni .zip: {e}", image_path) from e
+
+
+class SimulatedBackend(FSBackend):
+    """Envuelve otro origen añadiendo latencia y errores, como un NFS lento.
+
+    Cada listdir cuesta `latency` (+ hasta `jitter`) segundos; cada stat_many
+    es un único viaje de ida y vuelta más `per_item` por nombre (como un
+    READDIRPLUS). Un `error_rate` de las rutas, y todas las que empiezan por
+    algún prefijo de `deny`, fallan con PermissionError. Qué rutas fallan
+    depende solo de la ruta y de `seed`, no del orden de las llamadas."""
+
+    def __init__(self, inner: FSBackend = LOCAL, latency: float = 0.002, per_item: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, deny=(), seed: int = 0,
+                 sleep=time.sleep):
+        import random
+        self.inner = inner
+        self.local = inner.local
+        self.latency = latency
+        self.per_item = per_item
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.deny = tuple(deny)
+        self.seed = seed
+        self.sleep = sleep
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.items = 0
+        self.errors = 0
+        self.slept = 0.0
+
+    def _fails(self, path: str) -> bool:
+        if self.deny and path.startswith(self.deny):
+            return True
+        if not self.error_rate:
+            return False
+        h = zlib.crc32(f"{self.seed}:{path}".encode("utf-8", "surrogateescape"))
+        return h / 0xFFFFFFFF < self.error_rate
+
+    def _delay(self, items: int):
+        with self._lock:
+            delay = self.latency + self.per_item * items
+            if self.jitter:
+                delay += self.jitter * self._rng.random()
+            self.calls += 1
+            self.items += items
+            self.slept += delay
+        if delay > 0:
+            self.sleep(delay)
+
+    def _denied(self, path: str) -> PermissionError:
+        with self._lock:
+            self.errors += 1
+        return PermissionError(errno.EACCES, "Permiso denegado (simulado)", path)
+
+    def listdir(self, path: str) -> tuple:
+        self._delay(0)
+        if self._fails(path):
+            raise self._denied(path)
+        return self.inner.listdir(path)
+
+    def stat_many(self, dirpath: str, names: list) -> list:
+        self._delay(len(names))
+        out = self.inner.stat_many(dirpath, names)
+        for i, name in enumerate(names):
+            path = os.path.join(dirpath, name)
+            if self._fails(path):
+                out[i] = self._denied(path)
+        return out
+
+    def report(self) -> dict:
+        return {"calls": self.calls, "items": self.items, "errors": self.errors,
+                "simulated_seconds": self.slept}
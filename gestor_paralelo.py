@@ -0,0 +1,189 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from gestor_core import scan_directory
+from gestor_registros import FileStore
+from gestor_metricas import ScanMetrics
+from gestor_histograma import SizeStats
+
+# ------------------ Escaneo en varios procesos ------------------
+# Con stat ya barato, clasificar y construir los registros en Python queda
+# limitado por el GIL. Aquí el árbol se parte en subárboles que recorren
+# procesos distintos con el mismo scan_directory; cada uno devuelve sus
+# columnas como bytes (FileStore.to_blob, LogHistogram.to_bytes) y el padre
+# las concatena en el orden en que os.walk las habría visitado, de modo que
+# totales, categorías y archivos más pesados salen idénticos al escaneo
+# secuencial (también el desempate entre archivos del mismo tamaño).
+# El padre solo decide dónde partir: las carpetas podadas las cuentan los
+# procesos (policy.pruned), así el informe coincide con el secuencial. Los
+# presupuestos se reparten: todas las particiones acaban a la misma hora y
+# max_entries se divide entre ellas.
+
+TASKS_PER_WORKER = 4   # particiones por proceso, para repartir árboles desiguales
+MAX_SPLIT_DEPTH = 3    # niveles que el padre lista como mucho para partir
+
+
+class _FilesOnly:
+    """Política de una carpeta ya partida: cuenta sus archivos pero no baja,
+    porque cada subcarpeta es otra partición."""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def start(self, root: str):
+        if self.inner is not None:
+            self.inner.start(root)
+
+    def exhausted(self) -> bool:
+        return self.inner is not None and self.inner.exhausted()
+
+    def filter(self, dirpath: str, dirnames: list, filenames: list) -> list:
+        # La política ve las subcarpetas para contar las que poda; después no se baja
+        if self.inner is not None:
+            filenames = self.inner.filter(dirpath, dirnames, filenames)
+        dirnames[:] = []
+        return filenames
+
+
+def _subdirs(path: str, policy) -> list:
+    """Subcarpetas a las que os.walk bajaría (mismo orden), o None si no se puede listar.
+    Las podadas no se cuentan aquí: las cuenta la partición que lista la carpeta"""
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return None
+    out = []
+    for entry in entries:
+        try:
+            if not entry.is_dir() or entry.is_symlink():
+                continue
+        except OSError:
+            continue
+        if policy is not None and policy.skip_reason(entry.path, entry.name):
+            continue
+        out.append(entry.path)
+    return out
+
+
+def plan_partitions(base_path: str, workers: int, policy=None) -> list:
+    """Lista de (carpeta, solo_archivos) en el orden de os.walk.
+
+    Se baja nivel a nivel hasta tener unas TASKS_PER_WORKER particiones por
+    proceso: cada carpeta partida aporta sus propios archivos como una
+    partición y cada subcarpeta pasa a ser un subárbol independiente."""
+    tasks = [(base_path, False)]
+    leaves = set()      # ya listadas sin nada que partir: no se vuelven a listar
+    for _ in range(MAX_SPLIT_DEPTH):
+        if len(tasks) >= workers * TASKS_PER_WORKER:
+            break
+        expanded, split = [], False
+        for path, files_only in tasks:
+            subdirs = None if files_only or path in leaves else _subdirs(path, policy)
+            if not subdirs:
+                if subdirs is not None:
+                    leaves.add(path)
+                expanded.append((path, files_only))
+                continue
+            expanded.append((path, True))
+            expanded.extend((d, False) for d in subdirs)
+            split = True
+        tasks = expanded
+        if not split:
+            break
+    return tasks
+
+
+def _scan_partition(job) -> dict:
+    path, files_only, policy, deadline = job
+    if deadline is not None:
+        # Lo que quede hasta la hora común (time.time vale entre procesos)
+        policy.max_seconds = max(deadline - time.time(), 1e-6)
+    store = FileStore()
+    metrics = ScanMetrics()
+    size_stats = SizeStats()
+    _, _, cats, errors = scan_directory(path, top_n_files=0, store=store, metrics=metrics,
+                                        size_stats=size_stats,
+                                        policy=_FilesOnly(policy) if files_only else policy)
+    # Nada de listas de tuplas: solo buffers y diccionarios pequeños
+    return {
+        "store": store.to_blob(),
+        "categories": dict(cats),
+        "errors": errors,
+        "size_stats": size_stats.to_bytes(),
+        "metrics": metrics,
+        "traversal": policy.report() if policy is not None else None,
+    }
+
+
+def _partition_policy(policy, i: int, n: int):
+    """Copia de la política para la partición i de n, con su parte de max_entries"""
+    if policy is None:
+        return None
+    twin = policy.clone()
+    if policy.max_entries is not None:
+        share, extra = divmod(policy.max_entries, n)
+        twin.max_entries = share + (i < extra)
+    return twin
+
+
+def parallel_scan_directory(base_path: str, top_n_files: int = 20, store: FileStore = None,
+                            metrics: ScanMetrics = None, size_stats=None, archive_inspector=None,
+                            policy=None, workers: int = None):
+    """Igual que scan_directory pero repartiendo el recorrido entre `workers`
+    procesos. Devuelve la misma tupla (total, top_files, categorías, errores).
+
+    Los presupuestos de `policy` valen para todo el escaneo: max_seconds es
+    una hora límite común y max_entries se reparte a partes iguales entre
+    las particiones. No admite sniffer ni classifier: su caché y su modelo viven en
+    el proceso principal."""
+    workers = workers or os.cpu_count() or 1
+    if store is None:
+        store = FileStore()
+    if metrics is None:
+        metrics = ScanMetrics()
+    category_sizes = defaultdict(int)
+    errors = 0
+    first_index = len(store)
+
+    deadline = None
+    if policy is not None:
+        policy.start(base_path)
+        if policy.max_seconds:
+            deadline = time.time() + policy.max_seconds
+
+    with metrics.root(base_path):
+        with metrics.phase("partition"):
+            tasks = plan_partitions(base_path, workers, policy)
+        jobs = [(path, files_only, _partition_policy(policy, i, len(tasks)), deadline)
+                for i, (path, files_only) in enumerate(tasks)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            # map conserva el orden de las particiones: el del recorrido secuencial
+            for part in pool.map(_scan_partition, jobs):
+                with metrics.phase("merge"):
+                    store.extend_blob(part["store"])
+                    for cat, size in part["categories"].items():
+                        category_sizes[cat] += size
+                    errors += part["errors"]
+                    if size_stats is not None:
+                        size_stats.merge(SizeStats.from_bytes(part["size_stats"]))
+                    metrics.merge(part["metrics"])
+                    if part["traversal"] is not None:
+                        policy.pruned.update(part["traversal"]["pruned"])
+                        for root, reason in part["traversal"]["truncated"].items():
+                            policy.truncated[root] = reason
+                            policy.truncated.setdefault(base_path, reason)
+
+        if archive_inspector is not None and "Comprimidos" in store.categories:
+            with metrics.phase("archives"):
+                code = store.category_code("Comprimidos")
+                archive_inspector.inspect_many(
+                    [store.path(i) for i in range(first_index, len(store)) if store.cat_codes[i] == code])
+
+        with metrics.phase("sort"):
+            top_files = store.top_n(top_n_files)
+        total_size = sum(category_sizes.values())
+
+    return total_size, top_files, category_sizes, errors
@@ -0,0 +1,153 @@
+import os
+import re
+import copy
+import time
+import fnmatch
+from collections import Counter
+
+# ------------------ Políticas de recorrido ------------------
+# Qué carpetas no merece la pena recorrer: otros dispositivos (montajes de
+# red, /proc...), sistemas de archivos lentos conocidos, patrones excluidos
+# y presupuestos de tiempo/entradas por raíz. Los puntos de montaje se leen
+# una vez de /proc/self/mountinfo, así que podar no cuesta ningún stat extra
+# (en sistemas sin mountinfo se recurre a lstat de cada subcarpeta).
+
+SLOW_FSTYPES = {
+    "proc", "sysfs", "devtmpfs", "devpts", "cgroup", "cgroup2", "tracefs", "debugfs",
+    "securityfs", "pstore", "bpf", "configfs", "fusectl", "mqueue", "hugetlbfs", "autofs",
+    "nfs", "nfs4", "cifs", "smbfs", "smb3", "sshfs", "fuse.sshfs", "fuse.rclone", "9p",
+}
+
+
+def read_mounts(path: str = "/proc/self/mountinfo") -> dict:
+    """{punto de montaje: tipo de sistema de archivos}"""
+    mounts = {}
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                left, _, right = line.partition(" - ")
+                fields = left.split()
+                if len(fields) < 5 or not right:
+                    continue
+                # Los espacios de la ruta vienen como \040
+                mount_point = fields[4].replace("\\040", " ").replace("\\011", "\t")
+                mounts[mount_point] = right.split()[0]
+    except OSError:
+        pass
+    return mounts
+
+
+def compile_patterns(patterns) -> "re.Pattern":
+    """Globs y 're:regex' combinados en un único patrón"""
+    parts = []
+    for p in patterns or ():
+        parts.append(p[3:] if p.startswith("re:") else fnmatch.translate(p))
+    return re.compile("|".join(f"(?:{p})" for p in parts)) if parts else None
+
+
+class TraversalPolicy:
+    def __init__(self, one_device: bool = False, exclude=None, skip_fstypes=SLOW_FSTYPES,
+                 max_seconds: float = None, max_entries: int = None, mounts: dict = None):
+        self.one_device = one_device
+        self.exclude = compile_patterns(exclude)
+        self.skip_fstypes = set(skip_fstypes or ())
+        self.max_seconds = max_seconds
+        self.max_entries = max_entries
+        self.mounts = read_mounts() if mounts is None else mounts
+        self.pruned = Counter()     # motivo -> carpetas/archivos descartados
+        self.truncated = {}         # raíz -> motivo por el que se cortó
+        self._root = None           # tal cual se pasó (clave de truncated)
+        self._root_abs = None
+        self._root_real = None
+        self._root_dev = None
+        self._deadline = None
+        self._entries = 0
+
+    def start(self, root: str):
+        self._root = root
+        # mountinfo usa rutas reales: si la raíz pasa por un enlace se traduce
+        # (abspath también quita la barra final de "/datos/")
+        self._root_abs = os.path.abspath(root)
+        self._root_real = os.path.realpath(root)
+        self._entries = 0
+        self._deadline = time.monotonic() + self.max_seconds if self.max_seconds else None
+        try:
+            self._root_dev = os.stat(root).st_dev
+        except OSError:
+            self._root_dev = None
+
+    def exhausted(self) -> bool:
+        reason = None
+        if self.max_entries is not None and self._entries >= self.max_entries:
+            reason = "max_entries"
+        elif self._deadline is not None and time.monotonic() >= self._deadline:
+            reason = "max_seconds"
+        if reason:
+            self.truncated[self._root] = reason
+        return reason is not None
+
+    def _excluded(self, name: str, path: str) -> bool:
+        ex = self.exclude
+        return ex is not None and (ex.match(name) is not None
+                                   or ex.match(path.replace(os.sep, "/")) is not None)
+
+    def _real_path(self, path: str) -> str:
+        """La ruta bajo la raíz real; las que no cuelgan de la raíz, tal cual"""
+        try:
+            rel = os.path.relpath(path, self._root_abs)
+        except ValueError:      # otra unidad en Windows
+            return path
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return path
+        return os.path.normpath(os.path.join(self._root_real, rel))
+
+    def skip_reason(self, path: str, name: str) -> str:
+        """Motivo para no bajar a la carpeta, o None si hay que recorrerla"""
+        if self._excluded(name, path):
+            return "exclude"
+        if self.mounts:
+            fstype = self.mounts.get(self._real_path(path))
+            if fstype is not None:
+                if fstype in self.skip_fstypes:
+                    return f"fstype:{fstype}"
+                if self.one_device:
+                    return "other_device"
+        elif self.one_device and self._root_dev is not None:
+            try:
+                if os.lstat(path).st_dev != self._root_dev:
+                    return "other_device"
+            except OSError:
+                pass
+        return None
+
+    def filter(self, dirpath: str, dirnames: list, filenames: list) -> list:
+        """Poda dirnames en sitio (os.walk no bajará a ellas) y devuelve los
+        archivos que sí hay que contar"""
+        keep = []
+        for d in dirnames:
+            reason = self.skip_reason(os.path.join(dirpath, d), d)
+            if reason:
+                self.pruned[reason] += 1
+            else:
+                keep.append(d)
+        dirnames[:] = keep
+        if self.exclude is not None:
+            files = []
+            for n in filenames:
+                if self._excluded(n, os.path.join(dirpath, n)):
+                    self.pruned["exclude"] += 1
+                else:
+                    files.append(n)
+            filenames = files
+        self._entries += len(keep) + len(filenames)
+        return filenames
+
+    def clone(self) -> "TraversalPolicy":
+        """Misma configuración con los contadores a cero (p. ej. para otro proceso)"""
+        twin = copy.copy(self)
+        twin.pruned = Counter()
+        twin.truncated = {}
+        return twin
+
+    def report(self) -> dict:
+        return {"pruned": dict(self.pruned), "truncated": dict(self.truncated)}
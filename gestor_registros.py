@@ -0,0 +1,305 @@
+import os
+import heapq
+from bisect import bisect_right
+from itertools import accumulate
+from array import array
+
+# NumPy es opcional y pesado: los módulos que lo usan para cálculos sobre el
+# almacén lo piden con numpy_or_none() en el primer cálculo, no al importarse.
+_np = False     # sin importar aún; None si no está instalado
+
+
+def numpy_or_none():
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
+
+# ------------------ Almacén compacto de archivos ------------------
+# En lugar de una tupla (ruta, tamaño, categoría) por archivo guardamos:
+#   - una tabla de directorios (cada carpeta una sola vez),
+#   - los nombres de archivo en UTF-8 dentro de un único bytearray con offsets,
+#   - tamaños, fechas de modificación/acceso y códigos de categoría en arrays planos.
+# Así un árbol de millones de archivos ocupa decenas de bytes por archivo
+# en vez de cientos.
+
+
+class FileRecord:
+    """Vista ligera de una fila del almacén (no copia los datos)"""
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def path(self) -> str:
+        return self.store.path(self.index)
+
+    @property
+    def name(self) -> str:
+        return self.store.name(self.index)
+
+    @property
+    def size(self) -> int:
+        return self.store.sizes[self.index]
+
+    @property
+    def mtime(self) -> int:
+        return self.store.mtimes[self.index]
+
+    @property
+    def atime(self) -> int:
+        return self.store.atimes[self.index]
+
+    @property
+    def category(self) -> str:
+        return self.store.category(self.index)
+
+    def __iter__(self):
+        # Permite seguir desempaquetando como antes: path, size, cat = record
+        yield self.path
+        yield self.size
+        yield self.category
+
+    def __repr__(self):
+        return f"FileRecord({self.path!r}, {self.size}, {self.category!r})"
+
+
+class DirSummary:
+    """Agregado de una carpeta (solo sus archivos directos) recién leída"""
+
+    __slots__ = ("path", "dir_id", "files", "bytes", "categories", "errors")
+
+    def __init__(self, path: str, dir_id: int):
+        self.path = path
+        self.dir_id = dir_id
+        self.files = 0
+        self.bytes = 0
+        self.categories = {}
+        self.errors = 0
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "files": self.files, "bytes": self.bytes,
+                "categories": dict(self.categories), "errors": self.errors}
+
+    def __repr__(self):
+        return f"DirSummary({self.path!r}, files={self.files}, bytes={self.bytes})"
+
+
+class FileStore:
+    __slots__ = (
+        "dirs", "_dir_index", "dir_ids", "_names", "name_offsets",
+        "sizes", "mtimes", "atimes", "cat_codes", "categories", "_cat_index", "_folded",
+        "deleted",
+    )
+
+    def __init__(self):
+        self.dirs = []
+        self._dir_index = {}
+        self.dir_ids = array("l")
+        self._names = bytearray()
+        self.name_offsets = array("q", [0])
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.atimes = array("q")
+        self.cat_codes = array("b")
+        self.categories = []
+        self._cat_index = {}
+        self._folded = None     # (filas, nombres con casefold, offsets) para find_in_names
+        # Filas borradas desde la interfaz: se quedan (los índices no cambian)
+        # pero top_n y las consultas las saltan
+        self.deleted = set()
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __getitem__(self, index: int) -> FileRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return FileRecord(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield FileRecord(self, i)
+
+    # ---- Alta de datos ----
+    def add_dir(self, dirpath: str) -> int:
+        dir_id = self._dir_index.get(dirpath)
+        if dir_id is None:
+            dir_id = len(self.dirs)
+            self.dirs.append(dirpath)
+            self._dir_index[dirpath] = dir_id
+        return dir_id
+
+    def category_code(self, category: str) -> int:
+        code = self._cat_index.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(category)
+            self._cat_index[category] = code
+        return code
+
+    def append(self, dir_id: int, name: str, size: int, mtime: int, category: str, atime: int = 0):
+        self._names += name.encode("utf-8", "surrogateescape")
+        self.name_offsets.append(len(self._names))
+        self.dir_ids.append(dir_id)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.atimes.append(atime)
+        self.cat_codes.append(self.category_code(category))
+
+    def set_category(self, index: int, category: str):
+        self.cat_codes[index] = self.category_code(category)
+
+    # ---- Intercambio entre procesos ----
+    def to_blob(self) -> dict:
+        """Columnas como bytes: se envían a otro proceso sin una tupla por archivo"""
+        return {
+            "dirs": "\0".join(self.dirs).encode("utf-8", "surrogateescape"),
+            "categories": list(self.categories),
+            "names": bytes(self._names),
+            "name_offsets": self.name_offsets.tobytes(),
+            "dir_ids": self.dir_ids.tobytes(),
+            "sizes": self.sizes.tobytes(),
+            "mtimes": self.mtimes.tobytes(),
+            "atimes": self.atimes.tobytes(),
+            "cat_codes": self.cat_codes.tobytes(),
+            "deleted": sorted(self.deleted),
+        }
+
+    def extend_blob(self, blob: dict):
+        """Añade al final las filas de otro almacén serializado con to_blob()"""
+        dirs = blob["dirs"].decode("utf-8", "surrogateescape").split("\0") if blob["dirs"] else []
+        dir_map = [self.add_dir(d) for d in dirs]
+        cat_map = [self.category_code(c) for c in blob["categories"]]
+
+        def column(key, typecode):
+            col = array(typecode)
+            col.frombytes(blob[key])
+            return col
+
+        base, first_row = len(self._names), len(self)
+        self._names += blob["names"]
+        self.name_offsets.extend(o + base for o in column("name_offsets", "q")[1:])
+        self.dir_ids.extend(dir_map[i] for i in column("dir_ids", "l"))
+        self.sizes.frombytes(blob["sizes"])
+        self.mtimes.frombytes(blob["mtimes"])
+        self.atimes.frombytes(blob["atimes"])
+        self.cat_codes.extend(cat_map[c] for c in column("cat_codes", "b"))
+        self.deleted.update(first_row + i for i in blob.get("deleted", ()))
+
+    # ---- Lectura ----
+    def name(self, index: int) -> str:
+        start, end = self.name_offsets[index], self.name_offsets[index + 1]
+        return self._names[start:end].decode("utf-8", "surrogateescape")
+
+    def path(self, index: int) -> str:
+        return os.path.join(self.dirs[self.dir_ids[index]], self.name(index))
+
+    def category(self, index: int) -> str:
+        return self.categories[self.cat_codes[index]]
+
+    def _folded_names(self) -> tuple:
+        """(buffer, offsets) de los nombres en minúsculas Unicode (casefold).
+        Se calcula una vez y se rehace solo si se han añadido filas."""
+        cached = self._folded
+        if cached is not None and cached[0] == len(self):
+            return cached[1], cached[2]
+        raw = bytes(self._names)
+        if raw.isascii():
+            # Lo habitual: en ASCII lower() ya es casefold y no cambia longitudes
+            buf, offsets = raw.lower(), self.name_offsets
+        else:
+            # casefold puede alargar un nombre ("ß" -> "ss"): se pliega todo de
+            # una vez con NUL (que no puede ir en un nombre) como separador
+            offs = self.name_offsets
+            np = numpy_or_none()
+            if np is not None:
+                joined = np.insert(np.frombuffer(raw, dtype=np.uint8),
+                                   np.frombuffer(offs, dtype=np.int64)[1:len(self)], 0).tobytes()
+            else:
+                joined = b"\0".join([raw[offs[i]:offs[i + 1]] for i in range(len(self))])
+            folded = joined.decode("utf-8", "surrogateescape").casefold().encode("utf-8", "surrogateescape")
+            if np is not None:
+                data = np.frombuffer(folded, dtype=np.uint8)
+                seps = np.flatnonzero(data == 0)
+                buf = data[data != 0].tobytes()
+                # Cada separador desplaza en uno lo que viene detrás
+                offsets = array("q", [0])
+                offsets.frombytes((seps - np.arange(len(seps))).astype(np.int64).tobytes())
+                offsets.append(len(buf))
+            else:
+                parts = folded.split(b"\0")
+                buf = b"".join(parts)
+                offsets = array("q", [0])
+                offsets.extend(accumulate(map(len, parts)))
+        self._folded = (len(self), buf, offsets)
+        return buf, offsets
+
+    def find_in_names(self, text: str, suffix: bool = False, ignore_case: bool = True,
+                      whole: bool = False) -> list:
+        """Índices (ordenados) cuyo nombre contiene `text` (o termina en él, o
+        es exactamente él con whole=True). Busca directamente en el buffer de
+        nombres, sin decodificar cada uno; sin distinguir mayúsculas usa el
+        buffer plegado (ñ = Ñ)."""
+        if not text:
+            return [] if whole else list(range(len(self)))
+        if ignore_case:
+            needle = text.casefold().encode("utf-8", "surrogateescape")
+            buf, offsets = self._folded_names()
+        else:
+            needle = text.encode("utf-8", "surrogateescape")
+            buf, offsets = self._names, self.name_offsets
+        if suffix or whole:
+            # Con muchos aciertos (ext=jpg) compensa comparar todas las filas a la
+            # vez; con pocos, saltar de uno en uno con find (count es barato)
+            np = numpy_or_none()
+            if np is not None and len(self) and buf.count(needle) > len(self) // 64:
+                return self._match_ends(np, buf, offsets, needle, whole)
+        out = []
+        pos = buf.find(needle)
+        while pos != -1:
+            i = bisect_right(offsets, pos) - 1
+            start, end = offsets[i], offsets[i + 1]
+            stop = pos + len(needle)
+            if stop <= end and (not (suffix or whole) or stop == end) and (not whole or pos == start):
+                out.append(i)
+                pos = buf.find(needle, end)   # un acierto por nombre basta
+            else:
+                pos = buf.find(needle, pos + 1)
+        return out
+
+    def _match_ends(self, np, buf, offsets, needle: bytes, whole: bool) -> list:
+        """Sufijo (o nombre completo) comparando los últimos bytes de todas las
+        filas a la vez: una pasada vectorizada por byte de `needle`"""
+        data = np.frombuffer(buf, dtype=np.uint8)
+        bounds = np.frombuffer(offsets, dtype=np.int64)[:len(self) + 1]
+        lengths = np.diff(bounds)
+        ends = bounds[1:]
+        k = len(needle)
+        ok = lengths == k if whole else lengths >= k
+        for j, byte in enumerate(needle):
+            ok &= data[np.maximum(ends - k + j, 0)] == byte
+        return np.flatnonzero(ok).tolist()
+
+    def top_n(self, n: int):
+        """Los n archivos más pesados sin ordenar todo el almacén"""
+        sizes = self.sizes
+        rows = range(len(sizes))
+        if self.deleted:
+            rows = (i for i in rows if i not in self.deleted)
+        idx = heapq.nlargest(n, rows, key=sizes.__getitem__)
+        return [FileRecord(self, i) for i in idx]
+
+    def nbytes(self) -> int:
+        """Memoria aproximada ocupada por las columnas (sin la tabla de carpetas)"""
+        cols = (self.dir_ids, self.name_offsets, self.sizes, self.mtimes, self.atimes, self.cat_codes)
+        return len(self._names) + sum(c.itemsize * len(c) for c in cols)
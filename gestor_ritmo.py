@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import threading
+
+# ------------------ Escaneo con ritmo limitado ------------------
+# En servidores con carga real un os.walk + stat sin freno compite con el
+# trabajo de verdad. AdaptiveThrottle es un cubo de fichas (token bucket)
+# que limita las operaciones de E/S por segundo (stat y lecturas de
+# carpeta) y ajusta el ritmo según la latencia que observa: si las llamadas
+# se vuelven lentas el disco está ocupado y se frena a la mitad; si van
+# rápidas se acelera poco a poco (AIMD, como el control de congestión TCP).
+
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+# Número de la llamada ioprio_set según arquitectura (Linux)
+_IOPRIO_SET = {"x86_64": 251, "i386": 289, "i686": 289, "aarch64": 30, "armv7l": 314,
+               "ppc64le": 273, "s390x": 282, "riscv64": 30}
+
+
+class AdaptiveThrottle:
+    def __init__(self, rate: float = 1000.0, min_rate: float = 20.0, max_rate: float = None,
+                 target_latency: float = 0.005, burst: float = None, window: int = 64,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.max_rate = float(rate) if max_rate is None else max_rate
+        self.target_latency = target_latency
+        self.burst = burst if burst is not None else max(self.rate / 10, 1.0)
+        self.window = window
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.latency = None        # media móvil exponencial por llamada
+        self.calls = 0
+        self.waited = 0.0
+        self.slowdowns = 0
+        self._last = clock()
+        self._since_adjust = 0
+        self._lock = threading.Lock()
+
+    def wait(self, cost: float = 1.0):
+        """Bloquea hasta que haya `cost` fichas disponibles"""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.tokens -= cost
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if delay > 0:
+            self.waited += delay
+            self.sleep(delay)
+
+    def observe(self, seconds: float, calls: int = 1):
+        """seconds es la latencia por llamada (en un lote, la media)"""
+        with self._lock:
+            self.calls += calls
+            self.latency = seconds if self.latency is None else 0.9 * self.latency + 0.1 * seconds
+            self._since_adjust += calls
+            if self._since_adjust < self.window:
+                return
+            self._since_adjust = 0
+            if self.latency > self.target_latency:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.slowdowns += 1
+            else:
+                self.rate = min(self.max_rate, self.rate + max(self.max_rate / 50, 1.0))
+
+    def wrap(self, fn, cost=None):
+        """fn con espera previa y medición de latencia (p. ej. os.stat). Para
+        llamadas por lotes, cost(*args) dice cuántas operaciones cuentan."""
+        clock = self.clock
+
+        def throttled(*args, **kwargs):
+            n = 1 if cost is None else cost(*args, **kwargs)
+            if not n:
+                return fn(*args, **kwargs)
+            self.wait(n)
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.observe((clock() - t0) / n, n)
+
+        return throttled
+
+    def report(self) -> dict:
+        return {
+            "rate": self.rate,
+            "max_rate": self.max_rate,
+            "latency_seconds": self.latency or 0.0,
+            "calls": self.calls,
+            "waited_seconds": self.waited,
+            "slowdowns": self.slowdowns,
+        }
+
+
+def set_background_priority() -> dict:
+    """Baja al mínimo la prioridad de CPU y de E/S del proceso (o del hilo,
+    en Linux) que la llama. Hace lo que el sistema permita y devuelve qué
+    se consiguió."""
+    done = {}
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000  # CPU y E/S en segundo plano
+            kernel32 = ctypes.windll.kernel32
+            done["background_mode"] = bool(kernel32.SetPriorityClass(kernel32.GetCurrentProcess(),
+                                                                     PROCESS_MODE_BACKGROUND_BEGIN))
+        except (OSError, AttributeError):
+            done["background_mode"] = False
+        return done
+
+    if hasattr(os, "sched_setscheduler") and hasattr(os, "SCHED_IDLE"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+            done["cpu"] = "SCHED_IDLE"
+        except OSError:
+            pass
+    if "cpu" not in done and hasattr(os, "nice"):
+        try:
+            os.nice(19 - os.nice(0))
+            done["cpu"] = "nice 19"
+        except OSError:
+            pass
+
+    nr = _IOPRIO_SET.get(os.uname().machine) if sys.platform.startswith("linux") else None
+    if nr is not None:
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.syscall(nr, IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0:
+                done["io"] = "idle"
+        except (OSError, AttributeError):
+            pass
+    return done
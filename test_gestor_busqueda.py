@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from gestor_busqueda import RootIndexes, SearchIndex, edit_distance
+from gestor_registros import FileStore
+
+
+def _index() -> SearchIndex:
+    store = FileStore()
+    docs = store.add_dir("/home/u/Documentos")
+    fotos = store.add_dir("/home/u/Fotos")
+    for name in ("informe.pdf", "informe final 2023.pdf", "notas.md", "presupuesto.xlsx"):
+        store.append(docs, name, 1, 0, "Documentos")
+    for name in ("vacaciones playa 2022.jpg", "cumpleaños.jpg"):
+        store.append(fotos, name, 1, 0, "Imágenes")
+    index = SearchIndex()
+    index.replace_root("/home/u", store)
+    return index
+
+
+class FuzzySearchTest(unittest.TestCase):
+    def setUp(self):
+        self.index = _index()
+
+    def names(self, query: str) -> list:
+        return [os.path.basename(self.index.path(e)) for e in self.index.search(query)]
+
+    def test_one_letter_typos(self):
+        self.assertEqual(self.names("~infrome"), ["informe.pdf", "informe final 2023.pdf"])
+        self.assertEqual(self.names("~vacasiones playa"), ["vacaciones playa 2022.jpg"])
+        self.assertEqual(self.names("~presupusto"), ["presupuesto.xlsx"])
+        self.assertEqual(self.names("~cumpleanos"), ["cumpleaños.jpg"])
+        self.assertIn("notas.md", self.names("~notsa"))
+
+    def test_word_order_and_unrelated(self):
+        self.assertEqual(self.names("~final infrome"), ["informe final 2023.pdf"])
+        self.assertEqual(self.names("~zzzz"), [])
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("infrome", "informe", 2), 1)
+        self.assertEqual(edit_distance("casa", "caso", 1), 1)
+        self.assertEqual(edit_distance("casa", "perro", 1), 2)
+
+    def test_save_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "indice.bin")
+            self.index.save(path)
+            loaded = SearchIndex.load(path)
+            self.assertEqual(loaded.search("~infrome"), self.index.search("~infrome"))
+            self.assertEqual(loaded.search("*.pdf"), self.index.search("*.pdf"))
+            with open(path, "wb") as f:
+                f.write(b"\x80\x04basura")
+            self.assertEqual(len(SearchIndex.load(path)), 0)
+
+
+class RootIndexesTest(unittest.TestCase):
+    def test_fuzzy_ranks_across_roots(self):
+        indexes = RootIndexes()
+        for root, names in (("/a", ["infome viejo.txt", "otro.txt"]), ("/b", ["informe.pdf"])):
+            store = FileStore()
+            d = store.add_dir(root)
+            for name in names:
+                store.append(d, name, 1, 0, "Documentos")
+            index = SearchIndex()
+            index.replace_root(root, store)
+            indexes.swap(root, index)
+
+        found = [index.path(e) for index, e in indexes.search("~informe")]
+        self.assertEqual(found, ["/b/informe.pdf", "/a/infome viejo.txt"])
+        self.assertEqual([index.path(e) for index, e in indexes.search("*.txt")],
+                         ["/a/infome viejo.txt", "/a/otro.txt"])
+        indexes.remove("/a")
+        self.assertEqual(len(indexes), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import gestor_registros
+from gestor_consultas import QueryError, query_store
+from gestor_registros import FileStore
+
+NAMES = ["ñandú.txt", "ÑANDÚ gris.TXT", "Straße.mkv", "strasse.MKV", "video.mkv",
+         "notas.txt", "mkv", "a.mkv.txt"]
+
+
+def _store(names=NAMES) -> FileStore:
+    store = FileStore()
+    d = store.add_dir("/datos")
+    for i, name in enumerate(names):
+        store.append(d, name, 100 + i, 0, "Otros")
+    return store
+
+
+def _names(result) -> list:
+    return sorted(r.name for r in result.records)
+
+
+class FindInNamesTest(unittest.TestCase):
+    def test_unicode_case_folding(self):
+        store = _store()
+        self.assertEqual(_names(query_store(store, "name~ÑANDÚ")), ["ÑANDÚ gris.TXT", "ñandú.txt"])
+        self.assertEqual(_names(query_store(store, "name~strasse")), ["Straße.mkv", "strasse.MKV"])
+        self.assertEqual(_names(query_store(store, "name=STRASSE.mkv")), ["Straße.mkv", "strasse.MKV"])
+
+    def test_suffix_and_whole_name(self):
+        store = _store()
+        expected = ["Straße.mkv", "strasse.MKV", "video.mkv"]
+        self.assertEqual(_names(query_store(store, "ext=mkv")), expected)
+        self.assertEqual(_names(query_store(store, "name=mkv")), ["mkv"])
+        self.assertEqual(store.find_in_names(".mkv", suffix=True, ignore_case=False), [2, 4])
+
+    def test_same_hits_without_numpy(self):
+        store = _store(NAMES * 50)
+        with_numpy = [store.find_in_names(t, suffix=s, whole=w)
+                      for t in (".mkv", "mkv", "ñandú.txt") for s in (False, True) for w in (False, True)]
+        saved = gestor_registros._np
+        gestor_registros._np = None
+        try:
+            fresh = _store(NAMES * 50)
+            without = [fresh.find_in_names(t, suffix=s, whole=w)
+                       for t in (".mkv", "mkv", "ñandú.txt") for s in (False, True) for w in (False, True)]
+        finally:
+            gestor_registros._np = saved
+        self.assertEqual(without, with_numpy)
+
+    def test_cache_follows_appends(self):
+        store = _store()
+        self.assertEqual(store.find_in_names("nuevo"), [])
+        store.append(0, "Nuevo.txt", 1, 0, "Otros")
+        self.assertEqual(store.find_in_names("nuevo"), [len(store) - 1])
+
+
+class PaginationTest(unittest.TestCase):
+    def test_negative_page_is_rejected(self):
+        with self.assertRaises(QueryError):
+            query_store(_store(), "size>0", page=-1)
+        with self.assertRaises(QueryError):
+            query_store(_store(), "size>0", page_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
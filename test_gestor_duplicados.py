@@ -0,0 +1,25 @@
+import os
+import tempfile
+import unittest
+
+from gestor_core import scan_directory
+from gestor_duplicados import find_duplicate_folders
+from gestor_registros import FileStore
+
+
+class DuplicateFoldersTest(unittest.TestCase):
+    def test_root_with_trailing_slash(self):
+        # La raíz contiene a su subcarpeta: nunca son copias una de otra
+        with tempfile.TemporaryDirectory() as tmp:
+            for folder in (tmp, os.path.join(tmp, "copia")):
+                os.makedirs(folder, exist_ok=True)
+                with open(os.path.join(folder, "f.bin"), "wb") as f:
+                    f.write(b"datos" * 1000)
+            for root in (tmp, tmp + os.sep):
+                store = FileStore()
+                scan_directory(root, store=store)
+                self.assertEqual(find_duplicate_folders(store, min_bytes=1)["identical"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
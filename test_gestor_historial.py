@@ -0,0 +1,70 @@
+import tempfile
+import threading
+import unittest
+from array import array
+
+from gestor_historial import RECORD, UsageHistory, _deltas, _undeltas, downsample
+
+HOUR = 3600
+DAY = 86400
+
+
+class DownsampleTest(unittest.TestCase):
+    def test_keeps_last_value_of_each_bucket(self):
+        now = 1000 * DAY
+        times = [now - 200 * DAY, now - 200 * DAY + 60,      # misma semana
+                 now - 10 * DAY, now - 10 * DAY + HOUR,      # mismo día
+                 now - HOUR, now - HOUR + 60, now]           # horas recientes
+        times, values = downsample(times, list(range(len(times))), now)
+        self.assertEqual(list(times), [now - 200 * DAY + 60, now - 10 * DAY + HOUR, now - HOUR + 60, now])
+        self.assertEqual(list(values), [1, 3, 5, 6])
+
+    def test_delta_round_trip(self):
+        col = array("q", [5, 5, 2, 10 ** 12, -3])
+        self.assertEqual(_undeltas(_deltas(col)), col)
+        self.assertEqual(_deltas(array("q")), array("q"))
+
+
+class UsageHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_query_sees_other_writers_and_compaction(self):
+        reader = UsageHistory(self.tmp.name)
+        writer = UsageHistory(self.tmp.name)
+        now = 1000 * DAY
+        writer.record_totals({"r": 10}, timestamp=now - 2 * HOUR)
+        self.assertEqual(reader.query("root:r"), [(now - 2 * HOUR, 10)])
+
+        # Otra instancia añade y compacta: la caché del lector se renueva
+        writer.record_totals({"r": 20}, timestamp=now - HOUR)
+        self.assertEqual(reader.query("root:r"), [(now - 2 * HOUR, 10), (now - HOUR, 20)])
+        reader.record_totals({"r": 30, "s": 1}, timestamp=now)
+        writer.compact(now)
+        self.assertEqual(reader.query("root:r"), [(now - 2 * HOUR, 10), (now - HOUR, 20), (now, 30)])
+        self.assertEqual(UsageHistory(self.tmp.name).query("root:s"), [(now, 1)])
+        self.assertEqual(writer.query("total"), [(now - 2 * HOUR, 10), (now - HOUR, 20), (now, 31)])
+
+    def test_compact_waits_for_the_lock(self):
+        now = 1000 * DAY
+        holder = UsageHistory(self.tmp.name)
+        holder.record_totals({"r": 1}, timestamp=now - HOUR)
+        other = UsageHistory(self.tmp.name)
+        done = threading.Event()
+        worker = threading.Thread(target=lambda: (other.compact(now), done.set()))
+        with holder._locked():
+            worker.start()
+            self.assertFalse(done.wait(0.2))
+            # Lo que se escribe con el cerrojo puesto no se pierde al compactar
+            with open(holder._head_path, "ab") as f:
+                f.write(RECORD.pack(now, holder._ids["root:r"], 2))
+        worker.join(5)
+        self.assertTrue(done.is_set())
+        self.assertEqual(other.query("root:r"), [(now - HOUR, 1), (now, 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
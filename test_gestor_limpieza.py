@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+
+from gestor_busqueda import RootIndexes, SearchIndex
+from gestor_consultas import query_store
+from gestor_core import scan_directory
+from gestor_registros import FileStore
+from gestor_limpieza import CleanupExecutor, CleanupItem, LiveTotals
+
+
+def _write(path: str, size: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def _scan(root: str):
+    store = FileStore()
+    _, _, cats, _ = scan_directory(root, store=store)
+    return store, cats
+
+
+class UndoAcrossStoresTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = self.tmp.name
+        self.a = os.path.join(base, "A")
+        self.b = os.path.join(base, "B")
+        _write(os.path.join(self.a, "big.mp4"), 5000)
+        _write(os.path.join(self.b, "small.txt"), 10)
+        _write(os.path.join(self.b, "sub", "other.mp4"), 20)
+        self.journal = os.path.join(base, "limpieza.jsonl")
+        self.trash = os.path.join(base, "Trash")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def executor(self, totals):
+        return CleanupExecutor(self.journal, totals=totals, home_trash=self.trash)
+
+    def test_undo_does_not_touch_another_store(self):
+        store_a, cats_a = _scan(self.a)
+        big = store_a.path(0)
+        self.executor(LiveTotals(cats_a, store=store_a)).execute([store_a[0]])
+        self.assertFalse(os.path.exists(big))
+
+        # Otra vista (otra sesión): los agregados ahora son los de B
+        store_b, cats_b = _scan(self.b)
+        sizes_before = list(store_b.sizes)
+        cats_before = dict(cats_b)
+        folders = {"A": 0, "B": 30}
+        totals_b = LiveTotals(cats_b, folders, {"A": self.a, "B": self.b}, store_b)
+        report = self.executor(totals_b).undo()
+
+        self.assertEqual(len(report.done), 1)
+        self.assertTrue(os.path.exists(big))
+        self.assertEqual(list(store_b.sizes), sizes_before)
+        self.assertEqual(dict(cats_b), cats_before)
+        self.assertEqual(folders, {"A": 5000, "B": 30})
+
+    def test_undo_finds_the_row_by_path_in_another_store(self):
+        store, cats = _scan(self.b)
+        row = next(i for i in range(len(store)) if store.name(i) == "other.mp4")
+        self.executor(LiveTotals(cats, store=store)).execute([store[row]])
+        self.assertEqual(cats["Videos"], 0)
+
+        # Mismo árbol en otro almacén con otro orden: el índice guardado ya no vale
+        fresh = FileStore()
+        fresh.append(fresh.add_dir(self.b), "decoy.mp4", 7, 0, "Videos")
+        for i in range(len(store)):
+            fresh.append(fresh.add_dir(store.dirs[store.dir_ids[i]]), store.name(i),
+                         store.sizes[i], store.mtimes[i], store.category(i))
+        fresh_cats = dict(cats)
+        self.executor(LiveTotals(fresh_cats, store=fresh, root=self.b)).undo()
+
+        self.assertEqual(fresh.sizes[0], 7)
+        self.assertEqual(fresh.sizes[row + 1], 20)
+        self.assertEqual(fresh_cats["Videos"], 20)
+
+
+    def test_file_inside_a_selected_folder_is_dropped(self):
+        store, cats = _scan(self.b)
+        sub = os.path.join(self.b, "sub")
+        row = next(i for i in range(len(store)) if store.name(i) == "other.mp4")
+        report = self.executor(LiveTotals(cats, store=store)).execute(
+            [store[row], CleanupItem(sub), CleanupItem(sub)])
+
+        self.assertEqual([it.path for it in report.done], [sub])
+        self.assertEqual(report.failed, [])
+        self.assertEqual(report.freed_bytes, 20)
+        self.assertEqual(cats["Videos"], 0)
+
+
+    def test_deleted_rows_leave_listings_until_undo(self):
+        store, cats = _scan(self.b)
+        index = SearchIndex()
+        index.replace_root(self.b, store)
+        search = RootIndexes()
+        search.swap(self.b, index)
+        row = next(i for i in range(len(store)) if store.name(i) == "other.mp4")
+        executor = self.executor(LiveTotals(cats, store=store, search_index=search))
+
+        def listed():
+            return ([r.name for r in store.top_n(10)],
+                    [r.name for r in query_store(store, "size>=0").records],
+                    [os.path.basename(i.path(e)) for i, e in search.search("other")])
+
+        executor.execute([store[row]])
+        self.assertEqual(listed(), (["small.txt"], ["small.txt"], []))
+        executor.undo()
+        self.assertEqual(listed(), (["other.mp4", "small.txt"], ["other.mp4", "small.txt"], ["other.mp4"]))
+
+
+    def test_post_defers_corrections_to_the_owner_thread(self):
+        store, cats = _scan(self.b)
+        calls = []
+        totals = LiveTotals(cats, store=store, post=lambda fn, *args: calls.append((fn, args)))
+        before, size, category = dict(cats), store.sizes[0], store.category(0)
+        self.executor(totals).execute([store[0]])
+        self.assertEqual((dict(cats), store.sizes[0]), (before, size))
+        self.assertEqual(len(calls), 1)
+        for fn, args in calls:
+            fn(*args)
+        self.assertEqual(store.sizes[0], 0)
+        self.assertEqual(cats[category], before[category] - size)
+
+
+    def test_compact_keeps_recent_batches_that_can_be_undone(self):
+        executor = self.executor(None)
+        batches = []
+        for k in range(4):
+            path = os.path.join(self.b, f"f{k}.txt")
+            _write(path, 1)
+            batches.append(executor.execute([CleanupItem(path, 1)]).batch)
+        executor.undo(batches[3])
+        size = os.path.getsize(self.journal)
+
+        self.assertEqual(executor.compact(keep=2), 2)
+        self.assertLess(os.path.getsize(self.journal), size)
+        self.assertEqual([h["batch"] for h in executor.history()], batches[1:3])
+        self.assertEqual(executor.undo().batch, batches[2])
+        self.assertTrue(os.path.exists(os.path.join(self.b, "f2.txt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
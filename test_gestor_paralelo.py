@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from gestor_core import scan_directory
+from gestor_paralelo import parallel_scan_directory, plan_partitions
+from gestor_recorrido import TraversalPolicy
+from gestor_registros import FileStore
+
+
+def _write(path: str, size: int = 10):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def _policy(**kwargs) -> TraversalPolicy:
+    return TraversalPolicy(exclude=["node_modules", "*.tmp"], mounts={}, **kwargs)
+
+
+class ParallelPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for top in ("a", "b", "c", "d"):
+            for sub in ("x", "y"):
+                base = os.path.join(self.root, top, sub)
+                _write(os.path.join(base, "f.txt"))
+                _write(os.path.join(base, "g.tmp"))
+                _write(os.path.join(base, "node_modules", "m.js"))
+                _write(os.path.join(base, "z", "node_modules", "n.js"))
+            _write(os.path.join(self.root, top, "node_modules", "p.js"))
+        # Carpeta cuyas subcarpetas se podan todas
+        _write(os.path.join(self.root, "solo", "node_modules", "q.js"))
+        _write(os.path.join(self.root, "solo", "r.txt"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_report_matches_sequential_scan(self):
+        seq, par = _policy(), _policy()
+        seq_store, par_store = FileStore(), FileStore()
+        seq_total = scan_directory(self.root, store=seq_store, policy=seq)[0]
+        par_total = parallel_scan_directory(self.root, store=par_store, policy=par, workers=2)[0]
+
+        self.assertGreater(len(plan_partitions(self.root, 2, _policy())), 1)
+        self.assertEqual(par.report(), seq.report())
+        self.assertEqual(seq.pruned["exclude"], 8 + 8 + 4 + 1 + 8)
+        self.assertEqual(par_total, seq_total)
+        self.assertEqual([par_store.path(i) for i in range(len(par_store))],
+                         [seq_store.path(i) for i in range(len(seq_store))])
+
+    def test_entry_budget_is_shared(self):
+        policy = _policy(max_entries=6)
+        store = FileStore()
+        parallel_scan_directory(self.root, store=store, policy=policy, workers=2)
+        self.assertLessEqual(len(store), 6)
+        self.assertIn(self.root, policy.truncated)
+
+
+if __name__ == "__main__":
+    unittest.main()